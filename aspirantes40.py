@@ -13,10 +13,13 @@ from datetime import datetime, timedelta
 import sqlite3
 import tempfile
 import hashlib
+import hmac
 import bcrypt
 import time
+import threading
 import re
 from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor, Future
 import sys
 
 # Importar módulos compartidos
@@ -98,6 +101,20 @@ class EstadoAspirantes(EstadoPersistenteBase):
 class GestorBaseDatosAspirantes:
     """Gestor de base de datos específico para aspirantes"""
     
+    # Pool compartido entre reruns para transferencias SFTP en segundo plano.
+    # Un solo worker serializa el uso del cliente SFTP compartido.
+    _pool_io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sftp_aspirantes")
+    _subida_pendiente: Optional[Future] = None
+    _progreso_subida: Dict[str, int] = {'transferidos': 0, 'total': 0}
+    
+    # Descarga y subida usan el mismo archivo local y el mismo cliente SFTP: nunca
+    # se ejecutan a la vez (la subida en segundo plano incluida)
+    _lock_transferencias = threading.RLock()
+    # Subida en curso y cambios llegados durante ella (se suben al terminar)
+    _lock_subidas = threading.Lock()
+    _subida_activa = False
+    _subida_repetir = False
+    
     def __init__(self, config: ConfiguracionAspirantes):
         self.config = config
         self.logger = config.logger
@@ -125,6 +142,11 @@ class GestorBaseDatosAspirantes:
     
     def sincronizar_desde_remoto(self) -> bool:
         """Sincronizar base de datos desde el servidor remoto"""
+        with GestorBaseDatosAspirantes._lock_transferencias:
+            return self._sincronizar_desde_remoto()
+    
+    def _sincronizar_desde_remoto(self) -> bool:
+        """Descargar la base de datos (con _lock_transferencias tomado)"""
         try:
             self.logger.info("📥 Sincronizando base de datos de aspirantes desde remoto...")
             
@@ -153,8 +175,8 @@ class GestorBaseDatosAspirantes:
             try:
                 sftp.get(self.config.db_path_remoto, self.db_local_temp)
                 
-                # Verificar que se descargó correctamente
-                if os.path.exists(self.db_local_temp) and os.path.getsize(self.db_local_temp) > 0:
+                # Verificar que se descargó correctamente (cabecera SQLite válida)
+                if UtilidadesCompartidas.es_archivo_sqlite(self.db_local_temp):
                     self.ultima_sincronizacion = datetime.now()
                     file_size = os.path.getsize(self.db_local_temp)
                     self.logger.info(f"✅ Base de datos descargada: {file_size} bytes")
@@ -172,7 +194,7 @@ class GestorBaseDatosAspirantes:
                     
                     return True
                 else:
-                    self.logger.warning("⚠️ Archivo descargado vacío, creando nueva base de datos")
+                    self.logger.warning("⚠️ Archivo descargado vacío o inválido, creando nueva base de datos")
                     return self._crear_nueva_db_remota()
                     
             except FileNotFoundError:
@@ -442,6 +464,11 @@ class GestorBaseDatosAspirantes:
     
     def sincronizar_hacia_remoto(self) -> bool:
         """Sincronizar cambios locales hacia el servidor remoto"""
+        with GestorBaseDatosAspirantes._lock_transferencias:
+            return self._sincronizar_hacia_remoto()
+    
+    def _sincronizar_hacia_remoto(self) -> bool:
+        """Subir la base de datos local (con _lock_transferencias tomado)"""
         try:
             self.logger.info("📤 Sincronizando cambios hacia servidor remoto...")
             
@@ -469,8 +496,8 @@ class GestorBaseDatosAspirantes:
                 except Exception as e:
                     self.logger.warning(f"⚠️ No se pudo crear backup: {e}")
             
-            # Subir archivo
-            sftp.put(self.db_local_temp, self.config.db_path_remoto)
+            # Subir archivo reportando progreso
+            sftp.put(self.db_local_temp, self.config.db_path_remoto, callback=self._registrar_progreso_subida)
             
             self.ultima_sincronizacion = datetime.now()
             self.estado.marcar_sincronizacion()
@@ -482,6 +509,62 @@ class GestorBaseDatosAspirantes:
             self.logger.error(f"❌ Error sincronizando hacia remoto: {e}")
             return False
     
+    @classmethod
+    def _registrar_progreso_subida(cls, transferidos: int, total: int):
+        """Callback de paramiko para registrar el avance de la subida"""
+        cls._progreso_subida = {'transferidos': transferidos, 'total': total}
+    
+    def sincronizar_hacia_remoto_async(self) -> Future:
+        """Encolar la subida al servidor remoto sin bloquear la interfaz
+        
+        Si ya hay una subida en curso, la petición no se descarta: al terminar la
+        actual se sube de nuevo para incluir los cambios hechos mientras tanto.
+        """
+        cls = GestorBaseDatosAspirantes
+        with cls._lock_subidas:
+            if cls._subida_activa:
+                cls._subida_repetir = True
+                self.logger.info("🔄 Ya hay una subida en curso, se repetirá al terminar")
+                return cls._subida_pendiente
+            cls._subida_activa = True
+            cls._subida_repetir = False
+            cls._progreso_subida = {'transferidos': 0, 'total': 0}
+            cls._subida_pendiente = cls._pool_io.submit(self._subir_hasta_sin_cambios)
+            return cls._subida_pendiente
+    
+    def _subir_hasta_sin_cambios(self) -> bool:
+        """Subir y repetir mientras lleguen peticiones durante la subida (en el pool)"""
+        cls = GestorBaseDatosAspirantes
+        try:
+            while True:
+                exito = self.sincronizar_hacia_remoto()
+                with cls._lock_subidas:
+                    if not cls._subida_repetir:
+                        cls._subida_activa = False
+                        return exito
+                    cls._subida_repetir = False
+                self.logger.info("🔄 Hubo cambios durante la subida, subiendo de nuevo")
+        except Exception:
+            with cls._lock_subidas:
+                cls._subida_activa = False
+                cls._subida_repetir = False
+            raise
+    
+    @classmethod
+    def obtener_estado_subida(cls) -> Optional[Dict[str, Any]]:
+        """Obtener estado de la última subida en segundo plano"""
+        if cls._subida_pendiente is None:
+            return None
+        
+        estado = dict(cls._progreso_subida)
+        estado['en_curso'] = not cls._subida_pendiente.done()
+        if not estado['en_curso']:
+            try:
+                estado['exitosa'] = bool(cls._subida_pendiente.result())
+            except Exception:
+                estado['exitosa'] = False
+        return estado
+    
     def obtener_conexion(self):
         """Obtener conexión a la base de datos local"""
         try:
@@ -549,7 +632,7 @@ class GestorBaseDatosAspirantes:
                 count_query = f"SELECT COUNT(*) FROM aspirantes WHERE {where_clause}"
                 count_params = parametros[:-2] if len(parametros) > 2 else []
                 
-                total = pd.read_sql_query(count_query, conn, params=count_params).iloc[0, 0]
+                total = conn.execute(count_query, count_params).fetchone()[0]
                 total_paginas = max(1, (total + tamano_pagina - 1) // tamano_pagina)
                 
                 self.logger.debug(f"Obtenidos {len(df)} aspirantes (página {pagina}/{total_paginas})")
@@ -772,6 +855,17 @@ class InterfazAspirantes:
                 else:
                     st.error("❌ SSH Desconectado")
             
+            # Estado de la subida en segundo plano
+            estado_subida = self.gestor_db.obtener_estado_subida()
+            if estado_subida:
+                if estado_subida['en_curso']:
+                    total = estado_subida['total'] or 1
+                    st.progress(min(estado_subida['transferidos'] / total, 1.0), text="📤 Subiendo cambios...")
+                elif estado_subida['exitosa']:
+                    st.caption("✅ Cambios sincronizados con servidor remoto")
+                else:
+                    st.caption("❌ Error en la última sincronización hacia remoto")
+            
             # Estadísticas
             st.subheader("📊 Estadísticas")
             st.metric("Total Aspirantes", self.estado.estado.get('total_aspirantes', 0))
@@ -864,7 +958,9 @@ class InterfazAspirantes:
                     init_btn = st.form_submit_button("🔄 Inicializar DB", use_container_width=True, type="secondary")
                 
                 if login_btn:
-                    if usuario == "admin" and password == "admin123":
+                    usuario_ok = hmac.compare_digest(usuario.encode('utf-8'), b"admin")
+                    password_ok = hmac.compare_digest(password.encode('utf-8'), b"admin123")
+                    if usuario_ok and password_ok:
                         st.session_state.login_exitoso = True
                         st.session_state.usuario_actual = {"usuario": "admin", "rol": "administrador"}
                         st.session_state.rol_usuario = "administrador"
@@ -1205,9 +1301,9 @@ class InterfazAspirantes:
                     if aspirante_id:
                         st.success("✅ Aspirante registrado exitosamente")
                         
-                        # Sincronizar cambios
-                        if self.gestor_db.sincronizar_hacia_remoto():
-                            st.success("✅ Cambios sincronizados con servidor remoto")
+                        # Sincronizar cambios en segundo plano
+                        self.gestor_db.sincronizar_hacia_remoto_async()
+                        st.info("📤 Sincronizando cambios con servidor remoto en segundo plano...")
                         
                         # Resetear formulario después de 2 segundos
                         time.sleep(2)
@@ -1409,44 +1505,53 @@ class InterfazAspirantes:
                             st.error("❌ Error recreando base de datos")
     
     def ejecutar(self):
-        """Ejecutar la interfaz principal"""
-        try:
-            # Mostrar sidebar siempre
-            self.mostrar_sidebar()
+        """Ejecutar la interfaz principal (los errores los maneja main())"""
+        # Mostrar sidebar siempre
+        self.mostrar_sidebar()
+        
+        # Mostrar contenido principal según estado
+        if not st.session_state.login_exitoso:
+            self.mostrar_login()
+        else:
+            self.mostrar_panel_principal()
+    
+    def mostrar_diagnostico(self):
+        """Mostrar información de diagnóstico tras un error"""
+        with st.expander("🔧 Información de diagnóstico"):
+            st.write("**Estado del sistema:**")
+            st.json(self.estado.estado)
             
-            # Mostrar contenido principal según estado
-            if not st.session_state.login_exitoso:
-                self.mostrar_login()
-            else:
-                self.mostrar_panel_principal()
-                
-        except Exception as e:
-            st.error(f"❌ Error crítico en la aplicación: {str(e)}")
-            self.logger.error(f"Error en interfaz: {e}", exc_info=True)
+            st.write("**Configuración SSH:**")
+            st.write(self.config.ssh_config)
             
-            with st.expander("🔧 Información de diagnóstico"):
-                st.write("**Estado del sistema:**")
-                st.json(self.estado.estado)
-                
-                st.write("**Configuración SSH:**")
-                st.write(self.config.ssh_config)
-                
-                if self.gestor_db.db_local_temp:
-                    st.write(f"**Base de datos local:** {self.gestor_db.db_local_temp}")
-                    st.write(f"**Existe:** {os.path.exists(self.gestor_db.db_local_temp)}")
+            if self.gestor_db.db_local_temp:
+                st.write(f"**Base de datos local:** {self.gestor_db.db_local_temp}")
+                st.write(f"**Existe:** {os.path.exists(self.gestor_db.db_local_temp)}")
 
 # =============================================================================
 # EJECUCIÓN PRINCIPAL
 # =============================================================================
 
 def main():
-    """Función principal del sistema de aspirantes"""
+    """Función principal del sistema de aspirantes
+    
+    Único manejador de errores de la aplicación: las páginas no envuelven cada
+    llamada en su propio try/except.
+    """
+    app = None
     try:
         # Inicializar y ejecutar interfaz
         app = InterfazAspirantes()
         app.ejecutar()
         
     except Exception as e:
+        if app is not None:
+            # Error en la interfaz: el sistema está inicializado y puede diagnosticarse
+            st.error(f"❌ Error crítico en la aplicación: {str(e)}")
+            app.logger.error(f"Error en interfaz: {e}", exc_info=True)
+            app.mostrar_diagnostico()
+            return
+        
         st.error(f"❌ Error fatal en el sistema de aspirantes: {e}")
         
         # Intentar logging si es posible
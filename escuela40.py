@@ -15,10 +15,18 @@ import json
 import time
 from datetime import datetime, timedelta
 import io
-import hashlib
+import threading
 from pathlib import Path
-import warnings
-warnings.filterwarnings('ignore')
+from functools import lru_cache
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, Future
+
+try:
+    import xlsxwriter  # Informes Excel en modo constant_memory
+    HAS_XLSXWRITER = True
+except ImportError:
+    HAS_XLSXWRITER = False
+    xlsxwriter = None
 
 # Importar módulos compartidos - CORREGIDO PARA STREAMLIT CLOUD
 try:
@@ -30,7 +38,8 @@ try:
         UtilidadesCompartidas
     )
     IMPORTACIONES_COMPLETAS = True
-    print("✅ Módulos compartidos importados correctamente")
+    logger_arranque = SistemaLogging.obtener_logger('escuela_arranque')
+    logger_arranque.info("✅ Módulos compartidos importados correctamente")
 except ImportError as e:
     IMPORTACIONES_COMPLETAS = False
     print(f"❌ Error importando módulos compartidos: {e}")
@@ -45,7 +54,7 @@ except ImportError as e:
 # Obtener configuración para el sistema escuela
 try:
     config = CargadorConfiguracion.obtener_config_sistema('escuela')
-    print(f"✅ Configuración cargada: SSH habilitado = {config.get('ssh', {}).get('enabled', False)}")
+    logger_arranque.info("✅ Configuración cargada: SSH habilitado = %s", config.get('ssh', {}).get('enabled', False))
     
     # Validar configuración básica
     if not config.get('ssh', {}).get('host') and config.get('ssh', {}).get('enabled', False):
@@ -65,7 +74,7 @@ except Exception as e:
         'backup': {'enabled': False},
         'sync_on_start': False
     }
-    print("⚠️ Usando configuración de emergencia")
+    logger_arranque.warning("⚠️ Usando configuración de emergencia")
 
 # Configurar logging
 logger = SistemaLogging.obtener_logger('escuela', config.get('log_file', 'escuela_detallado.log'))
@@ -74,25 +83,64 @@ logger = SistemaLogging.obtener_logger('escuela', config.get('log_file', 'escuel
 try:
     estado_archivo = config.get('estado_file', 'estado_escuela.json')
     estado = EstadoPersistenteBase(estado_archivo, 'escuela')
-    print(f"✅ Estado persistente creado: {estado_archivo}")
+    logger.info("✅ Estado persistente creado: %s", estado_archivo)
 except Exception as e:
     logger.error(f"❌ Error creando estado persistente: {e}")
     # Estado de emergencia
     estado = None
-    print("⚠️ Estado persistente no creado")
+    logger.warning("⚠️ Estado persistente no creado")
+
+@st.cache_resource(show_spinner=False)
+def obtener_gestor_ssh():
+    """Gestor SSH compartido por todas las sesiones del servidor
+    
+    cache_resource lo conserva entre reruns y pestañas: la conexión autenticada
+    (con keepalive) se reutiliza en lugar de repetir el handshake por sesión.
+    """
+    return GestorSSHCompartido()
 
 # Instancia global del gestor SSH
 try:
-    gestor_ssh = GestorSSHCompartido()
-    print("✅ Gestor SSH creado")
+    gestor_ssh = obtener_gestor_ssh()
+    logger.info("✅ Gestor SSH creado")
 except Exception as e:
     logger.error(f"❌ Error creando gestor SSH: {e}")
     gestor_ssh = None
-    print("⚠️ Gestor SSH no creado")
+    logger.warning("⚠️ Gestor SSH no creado")
 
 # Instancia de utilidades
 util = UtilidadesCompartidas()
-print("✅ Utilidades creadas")
+logger.debug("✅ Utilidades creadas")
+
+# Segundos entre comprobaciones del hilo de vigilancia SSH
+INTERVALO_MONITOR_SSH = 10
+
+def _al_cambiar_conexion_ssh(conectado: bool):
+    """Reflejar en el estado persistente un cambio detectado por la vigilancia SSH
+    
+    Solo se escribe cuando difiere de lo registrado; la interfaz lee ese estado sin
+    comprobar la conexión al renderizar. El oyente se registra una vez por proceso,
+    así que obtiene el estado compartido del archivo en cada llamada en lugar de
+    usar el 'estado' global del primer rerun.
+    """
+    estado_actual = EstadoPersistenteBase(estado_archivo, 'escuela')
+    if conectado == bool(estado_actual.estado.get('ssh_conectado')):
+        return
+    estado_actual.set_ssh_conectado(conectado, None if conectado else "Conexión SSH perdida")
+    logger.info("🔄 Estado SSH actualizado en segundo plano: %s",
+                'conectado' if conectado else 'desconectado')
+
+@st.cache_resource(show_spinner=False)
+def iniciar_monitor_ssh():
+    """Vigilancia SSH compartida en segundo plano, registrada una vez por proceso"""
+    gestor_ssh.iniciar_vigilancia(INTERVALO_MONITOR_SSH, _al_cambiar_conexion_ssh)
+    return True
+
+if gestor_ssh and estado and config.get('ssh', {}).get('enabled', False):
+    try:
+        iniciar_monitor_ssh()
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo iniciar el monitor SSH: {e}")
 
 # =============================================================================
 # CONSTANTES Y CONFIGURACIÓN
@@ -105,9 +153,103 @@ PAGE_SIZE = config.get('page_size', 50)
 CACHE_TTL = config.get('cache_ttl', 300)
 
 # Estados de los estudiantes
-ESTADOS_ESTUDIANTE = ['Activo', 'Inactivo', 'Egresado', 'Baja Temporal', 'Baja Definitiva']
-NIVELES_ESTUDIO = ['Licenciatura', 'Maestría', 'Doctorado', 'Especialidad']
-TURNOS = ['Matutino', 'Vespertino', 'Nocturno', 'Mixto']
+ESTADOS_ESTUDIANTE = ('Activo', 'Inactivo', 'Egresado', 'Baja Temporal', 'Baja Definitiva')
+NIVELES_ESTUDIO = ('Licenciatura', 'Maestría', 'Doctorado', 'Especialidad')
+TURNOS = ('Matutino', 'Vespertino', 'Nocturno', 'Mixto')
+GENEROS = ('M', 'F', 'Otro')
+
+# Caracteres mínimos para aplicar la búsqueda de la lista de estudiantes
+LONGITUD_MINIMA_BUSQUEDA = 3
+
+# Lista de estudiantes: filas por página (se piden al servidor página a página)
+# y altura fija de la tabla en píxeles
+FILAS_POR_PAGINA_LISTA = 25
+ALTURA_TABLA_ESTUDIANTES = 400
+
+# Opciones de filtro precalculadas (no se reconstruyen en cada rerun)
+OPCIONES_FILTRO_ESTADO = ('Todos',) + ESTADOS_ESTUDIANTE
+OPCIONES_FILTRO_NIVEL = ('Todos',) + NIVELES_ESTUDIO
+
+# Conjunto inmutable para validar estados en O(1); las listas conservan el orden de la UI
+ESTADOS_ESTUDIANTE_VALIDOS = frozenset(ESTADOS_ESTUDIANTE)
+
+# Ajustes de las conexiones SQLite locales (cache_size negativo = KiB)
+SQLITE_CACHE_SIZE_KIB = -8192
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+
+# Columnas que se pueden capturar al dar de alta un estudiante
+CAMPOS_ESTUDIANTE = (
+    'matricula', 'nombre', 'apellido_paterno', 'apellido_materno', 'fecha_nacimiento',
+    'genero', 'curp', 'rfc', 'telefono', 'email', 'direccion', 'ciudad', 'estado',
+    'codigo_postal', 'nivel_estudio', 'carrera', 'semestre', 'turno', 'fecha_ingreso',
+    'fecha_egreso', 'estado_estudiante', 'promedio', 'creditos_aprobados',
+    'creditos_totales', 'foto_path', 'documentos_path'
+)
+
+# INSERT de alta individual generado una sola vez (mismo texto SQL en todas las
+# altas, reutilizable por la caché de sentencias de sqlite3). Los valores vacíos
+# se envían como NULL y estado_estudiante conserva su valor por defecto.
+_DEFAULTS_SQL_ESTUDIANTE = {'estado_estudiante': "'Activo'"}
+SQL_INSERTAR_ESTUDIANTE = "INSERT INTO estudiantes ({}, fecha_creacion, fecha_actualizacion) VALUES ({}, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)".format(
+    ', '.join(CAMPOS_ESTUDIANTE),
+    ', '.join(
+        f"COALESCE(?, {_DEFAULTS_SQL_ESTUDIANTE[campo]})" if campo in _DEFAULTS_SQL_ESTUDIANTE else '?'
+        for campo in CAMPOS_ESTUDIANTE
+    )
+)
+
+SQL_INSERTAR_AUDITORIA = (
+    "INSERT INTO auditoria (usuario_id, accion, tabla_afectada, registro_id, detalles) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+
+# Columnas que usan las vistas de lista/selección de estudiantes
+# (el detalle completo se obtiene con obtener_estudiante_por_id)
+COLUMNAS_LISTA_ESTUDIANTES = (
+    'id', 'matricula', 'nombre', 'apellido_paterno', 'apellido_materno', 'email',
+    'carrera', 'nivel_estudio', 'semestre', 'estado_estudiante', 'promedio', 'fecha_ingreso'
+)
+
+# Columnas visibles en las tablas de la lista y de la búsqueda de estudiantes
+# (subconjuntos fijos del esquema, no hace falta intersectarlos en cada render)
+COLUMNAS_TABLA_ESTUDIANTES = (
+    'id', 'matricula', 'nombre', 'apellido_paterno', 'apellido_materno', 'carrera',
+    'semestre', 'estado_estudiante', 'promedio', 'fecha_ingreso'
+)
+COLUMNAS_TABLA_BUSQUEDA = (
+    'id', 'matricula', 'nombre', 'apellido_paterno', 'apellido_materno', 'carrera', 'estado_estudiante'
+)
+
+# Hash PBKDF2-HMAC-SHA256 ('sal$hash' en hex, 200k iteraciones) precalculado de la
+# contraseña por defecto del administrador, para no calcularlo en cada arranque.
+# La aplicación aún no tiene inicio de sesión que lo verifique.
+ADMIN_PASSWORD_HASH_DEFAULT = (
+    "e49c67916c32efd35584e21c7ea3cd17$"
+    "924a2f0229f72517089510ba8c405af85ed9d2cf6326c584883e2c60aadaa6c2"
+)
+# SHA-256 sin sal de la misma contraseña, sembrado por versiones anteriores
+ADMIN_PASSWORD_HASH_LEGADO = "240be518fabd2724ddb6f04eeb1da5967448d7e831c08c8fa822809f74c720a9"
+
+# =============================================================================
+# GRÁFICOS CACHEADOS
+# =============================================================================
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def grafico_barras(elementos: tuple, eje_x: str, eje_y: str) -> dict:
+    """Especificación Vega-Lite de un gráfico de barras, generada una vez por conjunto de datos
+    
+    elementos es una tupla de pares (categoría, valor): al ser hashable sirve de clave
+    del caché. Se guarda la especificación ya serializada (to_dict valida contra el
+    esquema de Vega-Lite, que es la parte costosa), de modo que un rerun con los
+    mismos datos solo reenvía el diccionario.
+    """
+    import altair as alt
+    
+    df = pd.DataFrame(list(elementos), columns=[eje_x, eje_y])
+    return alt.Chart(df).mark_bar().encode(
+        x=alt.X(eje_x, type='nominal', sort=None),
+        y=alt.Y(eje_y, type='quantitative')
+    ).to_dict()
 
 # =============================================================================
 # CLASE PRINCIPAL DEL SISTEMA - CORREGIDA PARA STREAMLIT CLOUD
@@ -116,6 +258,16 @@ TURNOS = ['Matutino', 'Vespertino', 'Nocturno', 'Mixto']
 class SistemaGestionEscolar:
     """Clase principal del sistema de gestión escolar"""
     
+    # Subidas al servidor en segundo plano: atributos de clase, compartidos por
+    # cualquier instancia del proceso
+    _pool_subidas = ThreadPoolExecutor(max_workers=1, thread_name_prefix='subidas_escuela')
+    _subida_pendiente = None
+    _progreso_subida = {'transferidos': 0, 'total': 0}
+    # Subida en curso y cambios llegados durante ella (se suben al terminar)
+    _lock_subidas = threading.Lock()
+    _subida_activa = False
+    _subida_repetir = False
+    
     def __init__(self):
         self.config = config
         self.logger = logger
@@ -126,6 +278,7 @@ class SistemaGestionEscolar:
         # Configuración de rutas
         self.rutas = config.get('remote_paths', {})
         self.ssh_config = config.get('ssh', {})
+        self.backup_config = config.get('backup', {})
         
         # Estado interno
         self.conexion_local = None
@@ -133,6 +286,14 @@ class SistemaGestionEscolar:
         self.cache_data = {}
         self.cache_timestamps = {}
         
+        # Versión por tabla: se incrementa en cada escritura e invalida los
+        # cachés que dependen de ella (p. ej. estadísticas generales)
+        self.versiones_tablas = {'estudiantes': 0, 'inscritos': 0, 'egresados': 0, 'contratados': 0}
+        
+        # La instancia (y su conexión) se comparte entre sesiones: toda escritura pasa
+        # por transaccion() y la sincronización reemplaza la BD con este candado tomado
+        self._lock_transacciones = threading.RLock()
+        
         # Inicializar
         self._inicializar_sistema()
     
@@ -183,8 +344,7 @@ class SistemaGestionEscolar:
                     self.logger.warning(f"⚠️ No se pudo eliminar archivo existente: {e}")
             
             # Crear conexión
-            self.conexion_local = sqlite3.connect(self.db_local_path, check_same_thread=False)
-            self.conexion_local.row_factory = sqlite3.Row
+            self.conexion_local = self._abrir_conexion(self.db_local_path)
             
             # Crear estructura de tablas
             self._crear_estructura_bd()
@@ -200,8 +360,7 @@ class SistemaGestionEscolar:
             # FALLBACK: base de datos en memoria
             try:
                 self.logger.info("🔄 Intentando base de datos en memoria como fallback...")
-                self.conexion_local = sqlite3.connect(":memory:", check_same_thread=False)
-                self.conexion_local.row_factory = sqlite3.Row
+                self.conexion_local = self._abrir_conexion(":memory:")
                 self._crear_estructura_bd()
                 self.db_local_path = ":memory:"
                 if self.estado:
@@ -212,6 +371,20 @@ class SistemaGestionEscolar:
                 st.error(f"Error crítico al inicializar la base de datos: {str(e2)}")
                 raise
     
+    @staticmethod
+    def _abrir_conexion(ruta: str) -> sqlite3.Connection:
+        """Abrir la conexión local con la configuración común
+        
+        Además del caché de sentencias, amplía el caché de páginas de SQLite y mapea
+        el archivo en memoria para que las lecturas repetidas no pasen por read().
+        """
+        conexion = sqlite3.connect(ruta, check_same_thread=False, cached_statements=128)
+        conexion.row_factory = sqlite3.Row
+        conexion.execute(f"PRAGMA cache_size = {SQLITE_CACHE_SIZE_KIB}")
+        if ruta != ":memory:":
+            conexion.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+        return conexion
+    
     def _crear_estructura_bd(self):
         """Crear estructura completa de la base de datos"""
         try:
@@ -345,13 +518,51 @@ class SistemaGestionEscolar:
                 )
             ''')
             
+            # Índices NOCASE: permiten que LIKE 'valor%' (sin distinguir mayúsculas)
+            # se resuelva con un rango del B-Tree en lugar de un recorrido completo
+            indices = [
+                ('idx_estudiantes_matricula_nocase', 'estudiantes(matricula COLLATE NOCASE)'),
+                ('idx_estudiantes_nombre_nocase', 'estudiantes(nombre COLLATE NOCASE)'),
+                ('idx_estudiantes_apellido_nocase', 'estudiantes(apellido_paterno COLLATE NOCASE)'),
+                ('idx_estudiantes_email_nocase', 'estudiantes(email COLLATE NOCASE)'),
+                ('idx_estudiantes_curp_nocase', 'estudiantes(curp COLLATE NOCASE)'),
+                # Filtro por ciclo con orden por fecha de obtener_inscripciones
+                ('idx_inscritos_ciclo_fecha', 'inscritos(ciclo_escolar, fecha_inscripcion DESC)'),
+                # Combinaciones filtro/orden de obtener_estudiantes (evitan ordenar el conjunto filtrado)
+                ('idx_estudiantes_fecha_ingreso', 'estudiantes(fecha_ingreso DESC)'),
+                ('idx_estudiantes_estado_nivel_fecha', 'estudiantes(estado_estudiante, nivel_estudio, fecha_ingreso DESC)'),
+                ('idx_estudiantes_estado_fecha', 'estudiantes(estado_estudiante, fecha_ingreso DESC)'),
+                ('idx_estudiantes_nivel_fecha', 'estudiantes(nivel_estudio, fecha_ingreso DESC)'),
+                # Listado de egresados ordenado por fecha y búsquedas por estudiante
+                ('idx_egresados_fecha', 'egresados(fecha_egreso DESC, estudiante_id)'),
+                ('idx_egresados_estudiante', 'egresados(estudiante_id)')
+            ]
+            
+            for nombre_idx, definicion in indices:
+                try:
+                    cursor.execute(f'CREATE INDEX IF NOT EXISTS {nombre_idx} ON {definicion}')
+                except Exception as e:
+                    self.logger.warning(f"⚠️ Error creando índice {nombre_idx}: {e}")
+            
+            # Duplicaba el índice automático de UNIQUE(estudiante_id, ciclo_escolar)
+            cursor.execute('DROP INDEX IF EXISTS idx_inscritos_estudiante_ciclo')
+            
+            # Estadísticas para el planificador: ANALYZE solo la primera vez
+            # (después basta con que se conserve sqlite_stat1)
+            cursor.execute("SELECT EXISTS(SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1')")
+            if not cursor.fetchone()[0]:
+                cursor.execute("ANALYZE")
+            
             # Insertar usuario administrador por defecto si no existe
-            cursor.execute("SELECT COUNT(*) FROM usuarios WHERE username = 'admin'")
-            if cursor.fetchone()[0] == 0:
+            # username es UNIQUE, por lo que la búsqueda usa su índice implícito
+            cursor.execute("SELECT EXISTS(SELECT 1 FROM usuarios WHERE username = 'admin')")
+            if not cursor.fetchone()[0]:
                 cursor.execute(
                     "INSERT INTO usuarios (username, password_hash, nombre_completo, email, rol) VALUES (?, ?, ?, ?, ?)",
-                    ('admin', hashlib.sha256('admin123'.encode()).hexdigest(), 'Administrador del Sistema', 'admin@escuela.edu.mx', 'admin')
+                    ('admin', ADMIN_PASSWORD_HASH_DEFAULT, 'Administrador del Sistema', 'admin@escuela.edu.mx', 'admin')
                 )
+            else:
+                self._actualizar_hash_admin_legado(cursor)
             
             self.conexion_local.commit()
             self.logger.info("✅ Estructura de base de datos creada")
@@ -360,6 +571,22 @@ class SistemaGestionEscolar:
             self.logger.error(f"❌ Error creando estructura de BD: {e}")
             raise
     
+    def _actualizar_hash_admin_legado(self, cursor):
+        """Reemplazar el hash antiguo sin sal del administrador por el PBKDF2
+        
+        Solo se reconoce el de la contraseña por defecto (la única conocida); el
+        commit queda a cargo del llamador.
+        """
+        try:
+            cursor.execute(
+                "UPDATE usuarios SET password_hash = ? WHERE username = 'admin' AND password_hash = ?",
+                (ADMIN_PASSWORD_HASH_DEFAULT, ADMIN_PASSWORD_HASH_LEGADO)
+            )
+            if cursor.rowcount:
+                self.logger.info("🔐 Hash de la contraseña por defecto del administrador actualizado")
+        except sqlite3.Error as e:
+            self.logger.warning(f"⚠️ No se pudo actualizar el hash del administrador: {e}")
+    
     # =============================================================================
     # OPERACIONES DE SINCRONIZACIÓN CON SERVIDOR - CORREGIDAS
     # =============================================================================
@@ -395,21 +622,16 @@ class SistemaGestionEscolar:
             db_remota = self.rutas.get('escuela_db')
             if db_remota and self.db_local_path and self.db_local_path != ":memory:":
                 try:
-                    self._descargar_base_datos(sftp, db_remota, self.db_local_path)
+                    # La conexión compartida se cierra y reabre: ninguna otra sesión
+                    # puede escribir ni abrir transacciones mientras tanto
+                    with self._lock_transacciones:
+                        self._descargar_base_datos(sftp, db_remota, self.db_local_path)
+                        with self.transaccion() as cursor:
+                            self._actualizar_hash_admin_legado(cursor)
                 except Exception as e:
                     self.logger.error(f"❌ Error descargando BD principal: {e}")
                     # Continuar con otras operaciones
             
-            # Descargar base de datos de inscritos si está configurada
-            db_inscritos_remota = self.rutas.get('inscritos_db')
-            if db_inscritos_remota:
-                try:
-                    temp_inscritos_path = self.util.crear_archivo_temporal(".db")
-                    self._descargar_base_datos(sftp, db_inscritos_remota, temp_inscritos_path)
-                    # Aquí podrías procesar o fusionar esta BD
-                except Exception as e:
-                    self.logger.warning(f"⚠️ Error descargando BD de inscritos: {e}")
-            
             # Sincronizar archivos de uploads
             self._sincronizar_uploads(sftp)
             
@@ -418,9 +640,11 @@ class SistemaGestionEscolar:
                 self.estado.marcar_sincronizacion()
                 self.estado.set_ssh_conectado(True)
             
-            # Limpiar cache
+            # Limpiar cache (la BD local fue reemplazada: todas las tablas cambian de versión)
             self.cache_data.clear()
             self.cache_timestamps.clear()
+            self._marcar_tablas_modificadas(*self.versiones_tablas)
+            st.session_state.pop('resumen_estado', None)
             
             self.logger.info("✅ Sincronización completada exitosamente")
             return True
@@ -436,34 +660,49 @@ class SistemaGestionEscolar:
         try:
             self.logger.info(f"📥 Descargando {ruta_remota}...")
             
+            backup_path = None
+            
             # Verificar si existe localmente
             if os.path.exists(ruta_local):
                 # Crear backup
                 backup_path = f"{ruta_local}.backup_{self.util.generar_timestamp()}"
-                try:
-                    import shutil
-                    shutil.copy2(ruta_local, backup_path)
+                conexion_origen = self.conexion_local if ruta_local == self.db_local_path else None
+                if self.util.respaldar_sqlite(ruta_local, backup_path, conexion_origen):
                     self.logger.debug(f"Backup creado: {backup_path}")
-                except Exception as e:
-                    self.logger.warning(f"⚠️ No se pudo crear backup: {e}")
+                else:
+                    self.logger.warning(f"⚠️ No se pudo crear backup de {ruta_local}")
+                    backup_path = None
             
-            # Descargar archivo
-            sftp.get(ruta_remota, ruta_local)
+            # La conexión principal mapea el archivo en memoria (mmap): cerrarla antes
+            # de sobrescribirlo y reabrirla al terminar, haya éxito o no
+            es_principal = ruta_local == self.db_local_path
+            if es_principal and self.conexion_local:
+                self.conexion_local.close()
+                self.conexion_local = None
             
-            # Verificar que se descargó
-            if os.path.exists(ruta_local):
-                file_size = os.path.getsize(ruta_local)
-                self.logger.info(f"✅ Base de datos descargada: {ruta_local} ({file_size} bytes)")
+            try:
+                # Descargar archivo
+                sftp.get(ruta_remota, ruta_local)
                 
-                # Re-conectar a la nueva BD
-                if ruta_local == self.db_local_path:
-                    if self.conexion_local:
-                        self.conexion_local.close()
-                    self.conexion_local = sqlite3.connect(self.db_local_path, check_same_thread=False)
-                    self.conexion_local.row_factory = sqlite3.Row
-                    self.logger.info("✅ Reconectado a base de datos descargada")
-            else:
-                self.logger.error(f"❌ Archivo descargado no encontrado: {ruta_local}")
+                # Verificar cabecera SQLite del archivo descargado (sin abrir conexión)
+                if not self.util.es_archivo_sqlite(ruta_local):
+                    self.logger.error(f"❌ El archivo descargado no es una base de datos SQLite válida: {ruta_remota}")
+                    if backup_path:
+                        os.replace(backup_path, ruta_local)
+                        self.logger.info(f"🔄 Restaurado backup previo: {ruta_local}")
+                    raise ValueError(f"Archivo remoto inválido: {ruta_remota}")
+                
+                # Verificar que se descargó
+                if os.path.exists(ruta_local):
+                    file_size = os.path.getsize(ruta_local)
+                    self.logger.info(f"✅ Base de datos descargada: {ruta_local} ({file_size} bytes)")
+                else:
+                    self.logger.error(f"❌ Archivo descargado no encontrado: {ruta_local}")
+            finally:
+                # Re-conectar a la BD (descargada o restaurada)
+                if es_principal and self.conexion_local is None:
+                    self.conexion_local = self._abrir_conexion(self.db_local_path)
+                    self.logger.info("✅ Reconectado a base de datos local")
             
         except FileNotFoundError:
             self.logger.warning(f"⚠️ Archivo remoto no encontrado: {ruta_remota}")
@@ -499,8 +738,12 @@ class SistemaGestionEscolar:
         except Exception as e:
             self.logger.error(f"❌ Error en sincronización de uploads: {e}")
     
-    def subir_cambios_al_servidor(self):
-        """Subir cambios locales al servidor remoto"""
+    def subir_cambios_al_servidor(self, ruta_origen: str = None):
+        """Subir cambios locales al servidor remoto
+        
+        ruta_origen permite subir una instantánea de la BD en lugar del archivo en uso.
+        """
+        ruta_origen = ruta_origen or self.db_local_path
         try:
             self.logger.info("🔼 Subiendo cambios al servidor...")
             
@@ -523,8 +766,8 @@ class SistemaGestionEscolar:
             
             # Subir base de datos principal
             db_remota = self.rutas.get('escuela_db')
-            if db_remota and self.db_local_path and os.path.exists(self.db_local_path):
-                sftp.put(self.db_local_path, db_remota)
+            if db_remota and ruta_origen and os.path.exists(ruta_origen):
+                sftp.put(ruta_origen, db_remota, callback=self._registrar_progreso_subida)
                 self.logger.info(f"✅ Base de datos subida: {db_remota}")
             
             self.logger.info("✅ Cambios subidos exitosamente")
@@ -534,6 +777,83 @@ class SistemaGestionEscolar:
             self.logger.error(f"❌ Error subiendo cambios: {e}")
             return False
     
+    @classmethod
+    def _registrar_progreso_subida(cls, transferidos: int, total: int):
+        """Callback de paramiko para registrar el avance de la subida"""
+        cls._progreso_subida = {'transferidos': transferidos, 'total': total}
+    
+    def subir_cambios_async(self) -> Future:
+        """Encolar la subida al servidor sin bloquear la interfaz
+        
+        La instantánea de la BD se toma aquí (con la conexión local, en este hilo) y
+        solo la transferencia SFTP se ejecuta en segundo plano. Si ya hay una subida
+        en curso no se descarta la petición: se marca y, al terminar la actual, se
+        sube una instantánea nueva con los cambios hechos mientras tanto.
+        """
+        cls = SistemaGestionEscolar
+        
+        def subir(ruta: str):
+            try:
+                while True:
+                    try:
+                        exito = self.subir_cambios_al_servidor(ruta)
+                    finally:
+                        if os.path.exists(ruta):
+                            os.remove(ruta)
+                    
+                    with cls._lock_subidas:
+                        if not cls._subida_repetir:
+                            cls._subida_activa = False
+                            return exito
+                        cls._subida_repetir = False
+                    
+                    self.logger.info("🔄 Hubo cambios durante la subida, subiendo de nuevo")
+                    ruta = self._tomar_instantanea_subida()
+            except Exception:
+                with cls._lock_subidas:
+                    cls._subida_activa = False
+                    cls._subida_repetir = False
+                raise
+        
+        with cls._lock_subidas:
+            if cls._subida_activa:
+                cls._subida_repetir = True
+                self.logger.info("🔄 Ya hay una subida en curso, se repetirá al terminar")
+                return cls._subida_pendiente
+            
+            instantanea = self._tomar_instantanea_subida()
+            cls._subida_activa = True
+            cls._subida_repetir = False
+            cls._progreso_subida = {'transferidos': 0, 'total': 0}
+            cls._subida_pendiente = cls._pool_subidas.submit(subir, instantanea)
+            return cls._subida_pendiente
+    
+    def _tomar_instantanea_subida(self) -> str:
+        """Copia consistente de la BD local en un temporal para subirla"""
+        instantanea = self.util.crear_archivo_temporal(".db")
+        with self._lock_transacciones:
+            copiada = self.util.respaldar_sqlite(self.db_local_path, instantanea, self.conexion_local)
+        if not copiada:
+            if os.path.exists(instantanea):
+                os.remove(instantanea)
+            raise ValueError("No se pudo preparar la base de datos para subirla")
+        return instantanea
+    
+    @classmethod
+    def obtener_estado_subida(cls) -> dict:
+        """Obtener estado de la última subida en segundo plano (None si no hubo)"""
+        if cls._subida_pendiente is None:
+            return None
+        
+        estado = dict(cls._progreso_subida)
+        estado['en_curso'] = not cls._subida_pendiente.done()
+        if not estado['en_curso']:
+            try:
+                estado['exitosa'] = bool(cls._subida_pendiente.result())
+            except Exception:
+                estado['exitosa'] = False
+        return estado
+    
     # =============================================================================
     # OPERACIONES DE BACKUP - CORREGIDAS
     # =============================================================================
@@ -541,7 +861,7 @@ class SistemaGestionEscolar:
     def crear_backup(self):
         """Crear backup de la base de datos - CORREGIDO"""
         try:
-            if not self.config.get('backup', {}).get('enabled', True):
+            if not self.backup_config.get('enabled', True):
                 self.logger.info("Backup deshabilitado en configuración")
                 return True
             
@@ -559,7 +879,7 @@ class SistemaGestionEscolar:
             # Verificar espacio en disco
             espacio_ok, espacio_mb = self.util.verificar_espacio_disco(
                 backup_dir,
-                self.config.get('backup', {}).get('min_disk_space_mb', 100)
+                self.backup_config.get('min_disk_space_mb', 100)
             )
             
             if not espacio_ok:
@@ -569,9 +889,13 @@ class SistemaGestionEscolar:
             timestamp = self.util.generar_timestamp()
             backup_file = os.path.join(backup_dir, f"escuela_backup_{timestamp}.db")
             
-            # Crear copia de la base de datos
-            import shutil
-            shutil.copy2(self.db_local_path, backup_file)
+            # Crear copia consistente de la base de datos (API de backup de SQLite); con
+            # el candado, la copia no incluye transacciones a medias de otra sesión
+            with self._lock_transacciones:
+                copiada = self.util.respaldar_sqlite(self.db_local_path, backup_file, self.conexion_local)
+            if not copiada:
+                self.logger.error("❌ No se pudo copiar la base de datos para el backup")
+                return False
             
             # Comprimir si es grande
             if os.path.getsize(backup_file) > 10 * 1024 * 1024:  # > 10MB
@@ -602,7 +926,7 @@ class SistemaGestionEscolar:
     def _limpiar_backups_antiguos(self, backup_dir: str):
         """Limpiar backups antiguos manteniendo solo los más recientes"""
         try:
-            max_backups = self.config.get('backup', {}).get('max_backups', 10)
+            max_backups = self.backup_config.get('max_backups', 10)
             
             if not os.path.exists(backup_dir):
                 return
@@ -636,34 +960,97 @@ class SistemaGestionEscolar:
     # OPERACIONES CRUD PARA ESTUDIANTES
     # =============================================================================
     
-    @st.cache_data(ttl=CACHE_TTL)
-    def obtener_estudiantes(_self, filtro_estado: str = None, busqueda: str = None, limite: int = PAGE_SIZE):
-        """Obtener lista de estudiantes con filtros"""
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _sql_obtener_estudiantes(con_estado: bool, con_nivel: bool, con_busqueda: bool,
+                                 paginacion: str = None) -> str:
+        """Construir (una sola vez por combinación de filtros) la consulta de estudiantes
+        
+        Reutilizar el mismo texto SQL permite que el caché de sentencias de sqlite3
+        reaproveche la sentencia ya compilada.
+        
+        paginacion: None (primera página), 'fecha' (filas posteriores a un cursor
+        (fecha_ingreso, id)) o 'nulos' (filas sin fecha_ingreso, que van al final).
+        """
+        query = f"SELECT {', '.join(COLUMNAS_LISTA_ESTUDIANTES)} FROM estudiantes WHERE 1=1"
+        if con_estado:
+            query += " AND estado_estudiante = ?"
+        if con_nivel:
+            query += " AND nivel_estudio = ?"
+        if con_busqueda:
+            query += " AND (matricula LIKE ? OR nombre LIKE ? OR apellido_paterno LIKE ? OR email LIKE ?)"
+        if paginacion == 'fecha':
+            query += " AND (fecha_ingreso, id) < (?, ?)"
+        elif paginacion == 'nulos':
+            query += " AND fecha_ingreso IS NULL AND id < ?"
+        return query + " ORDER BY fecha_ingreso DESC, id DESC LIMIT ?"
+    
+    def obtener_estudiantes(self, filtro_estado: str = None, busqueda: str = None, limite: int = PAGE_SIZE,
+                            busqueda_contiene: bool = False, filtro_nivel: str = None,
+                            despues_de: tuple = None):
+        """Obtener lista de estudiantes con filtros
+        
+        La búsqueda es por prefijo (aprovecha índices); busqueda_contiene=True
+        busca el texto en cualquier posición a costa de un recorrido completo.
+        
+        Paginación por cursor: despues_de=(fecha_ingreso, id) de la última fila de la
+        página anterior devuelve la siguiente página sin recorrer las ya mostradas
+        (a diferencia de OFFSET).
+        
+        El resultado se cachea por combinación de filtros y por la versión de datos
+        (version_datos), de modo que tras una escritura no se sirven listas obsoletas.
+        """
+        return self._consultar_estudiantes(
+            filtro_estado, busqueda, limite, busqueda_contiene, filtro_nivel, despues_de,
+            self.version_datos
+        )
+    
+    @st.cache_data(ttl=CACHE_TTL, max_entries=32)
+    def _consultar_estudiantes(_self, filtro_estado, busqueda, limite, busqueda_contiene,
+                               filtro_nivel, despues_de, version_datos):
+        """Consulta de estudiantes cacheada (version_datos solo forma parte de la clave)"""
         try:
             if not _self.conexion_local:
                 _self.logger.error("❌ No hay conexión a base de datos")
                 return []
             
-            query = "SELECT * FROM estudiantes WHERE 1=1"
+            con_estado = bool(filtro_estado) and filtro_estado != 'Todos'
+            con_nivel = bool(filtro_nivel) and filtro_nivel != 'Todos'
             params = []
             
-            if filtro_estado and filtro_estado != 'Todos':
-                query += " AND estado_estudiante = ?"
+            if con_estado:
                 params.append(filtro_estado)
             
+            if con_nivel:
+                params.append(filtro_nivel)
+            
             if busqueda:
-                query += " AND (matricula LIKE ? OR nombre LIKE ? OR apellido_paterno LIKE ? OR email LIKE ?)"
-                search_term = f"%{busqueda}%"
+                search_term = f"%{busqueda}%" if busqueda_contiene else f"{busqueda}%"
                 params.extend([search_term] * 4)
             
-            query += " ORDER BY fecha_ingreso DESC LIMIT ?"
-            params.append(limite)
-            
             cursor = _self.conexion_local.cursor()
-            cursor.execute(query, params)
-            estudiantes = cursor.fetchall()
             
-            return estudiantes
+            if despues_de is None:
+                paginacion, params_cursor = None, []
+            elif despues_de[0] is None:
+                paginacion, params_cursor = 'nulos', [despues_de[1]]
+            else:
+                paginacion, params_cursor = 'fecha', list(despues_de)
+            
+            query = _self._sql_obtener_estudiantes(con_estado, con_nivel, bool(busqueda), paginacion)
+            cursor.execute(query, params + params_cursor + [limite])
+            filas = cursor.fetchall()
+            
+            # Las filas sin fecha_ingreso quedan al final del orden descendente:
+            # si la página no se llenó, se completa con ellas
+            if paginacion == 'fecha' and len(filas) < limite:
+                query = _self._sql_obtener_estudiantes(con_estado, con_nivel, bool(busqueda), 'nulos')
+                cursor.execute(query, params + [sys.maxsize, limite - len(filas)])
+                filas += cursor.fetchall()
+            
+            # st.cache_data serializa el resultado y sqlite3.Row no es serializable:
+            # se convierte a dict solo en este límite del caché
+            return [dict(fila) for fila in filas]
             
         except Exception as e:
             _self.logger.error(f"❌ Error obteniendo estudiantes: {e}")
@@ -683,8 +1070,8 @@ class SistemaGestionEscolar:
             self.logger.error(f"❌ Error obteniendo estudiante {estudiante_id}: {e}")
             return None
     
-    def buscar_estudiante(self, criterio: str, valor: str):
-        """Buscar estudiante por cualquier criterio"""
+    def buscar_estudiante(self, criterio: str, valor: str, contiene: bool = False):
+        """Buscar estudiante por cualquier criterio (por prefijo, o en cualquier posición si contiene=True)"""
         try:
             if not self.conexion_local:
                 self.logger.error("❌ No hay conexión a base de datos")
@@ -696,7 +1083,8 @@ class SistemaGestionEscolar:
             
             cursor = self.conexion_local.cursor()
             query = f"SELECT * FROM estudiantes WHERE {criterio} LIKE ?"
-            cursor.execute(query, (f"%{valor}%",))
+            patron = f"%{valor}%" if contiene else f"{valor}%"
+            cursor.execute(query, (patron,))
             return cursor.fetchall()
             
         except Exception as e:
@@ -710,37 +1098,26 @@ class SistemaGestionEscolar:
                 self.logger.error("❌ No hay conexión a base de datos")
                 raise ValueError("No hay conexión a base de datos")
             
-            cursor = self.conexion_local.cursor()
-            
-            # Preparar campos y valores
-            campos = []
-            placeholders = []
-            valores = []
-            
-            for campo, valor in datos_estudiante.items():
-                if valor is not None and valor != '':
-                    campos.append(campo)
-                    placeholders.append('?')
-                    valores.append(valor)
-            
-            # Añadir fechas de creación y actualización
-            campos.append('fecha_creacion')
-            campos.append('fecha_actualizacion')
-            placeholders.append('CURRENT_TIMESTAMP')
-            placeholders.append('CURRENT_TIMESTAMP')
-            
-            query = f"INSERT INTO estudiantes ({', '.join(campos)}) VALUES ({', '.join(placeholders)})"
+            # Valores en posición fija según la lista blanca de columnas
+            # (las claves desconocidas se ignoran y nunca llegan al SQL)
+            valores = tuple(
+                None if (valor := datos_estudiante.get(campo)) == '' else valor
+                for campo in CAMPOS_ESTUDIANTE
+            )
             
-            cursor.execute(query, valores)
-            self.conexion_local.commit()
+            # Alta y auditoría se confirman juntas en una sola transacción
+            with self.transaccion() as cursor:
+                cursor.execute(SQL_INSERTAR_ESTUDIANTE, valores)
+                estudiante_id = cursor.lastrowid
+                
+                # Registrar en auditoría
+                self._registrar_auditoria('INSERT', 'estudiantes', estudiante_id, 
+                                         f"Estudiante creado: {datos_estudiante.get('matricula', 'N/A')}",
+                                         cursor=cursor)
             
-            estudiante_id = cursor.lastrowid
+            self._marcar_tablas_modificadas('estudiantes')
             self.logger.info(f"✅ Estudiante agregado: ID {estudiante_id}")
             
-            # Registrar en auditoría
-            self._registrar_auditoria('INSERT', 'estudiantes', estudiante_id, 
-                                     f"Estudiante creado: {datos_estudiante.get('matricula', 'N/A')}")
-            
             return estudiante_id
             
         except sqlite3.IntegrityError as e:
@@ -755,51 +1132,134 @@ class SistemaGestionEscolar:
             self.logger.error(f"❌ Error agregando estudiante: {e}")
             raise
     
+    def agregar_estudiantes_lote(self, estudiantes: list) -> dict:
+        """Agregar varios estudiantes en una sola transacción (importaciones masivas)
+        
+        Valida el lote de forma vectorizada, descarta matrículas/CURP duplicadas
+        (en el lote o ya existentes) con una consulta por columna e inserta el resto
+        con executemany. Retorna un resumen con insertados, duplicados e inválidos.
+        """
+        resumen = {'insertados': 0, 'duplicados': [], 'invalidos': {}}
+        
+        if not self.conexion_local:
+            self.logger.error("❌ No hay conexión a base de datos")
+            raise ValueError("No hay conexión a base de datos")
+        
+        if not estudiantes:
+            return resumen
+        
+        df = pd.DataFrame(estudiantes)
+        df = df.astype(object).where(df.notna(), None)
+        
+        # Validación vectorizada
+        resumen['invalidos'] = self.validar_datos_estudiantes_lote(df)
+        df = df.drop(index=list(resumen['invalidos'].keys()))
+        if df.empty:
+            return resumen
+        
+        # Duplicados dentro del propio lote
+        repetidos = df['matricula'].duplicated(keep='first')
+        if 'curp' in df.columns:
+            repetidos |= df['curp'].notna() & df['curp'].duplicated(keep='first')
+        resumen['duplicados'].extend(df.loc[repetidos, 'matricula'].tolist())
+        df = df[~repetidos]
+        
+        try:
+            # Comprobación de existentes e inserción en la misma transacción (con el
+            # candado): otra sesión no puede colar un duplicado entre ambas
+            with self.transaccion() as cursor:
+                # Duplicados contra la base de datos: una consulta IN por bloque de valores
+                for columna in ('matricula', 'curp'):
+                    if columna not in df.columns or df.empty:
+                        continue
+                    valores = [v for v in df[columna].tolist() if v]
+                    existentes = set()
+                    for inicio in range(0, len(valores), 500):
+                        bloque = valores[inicio:inicio + 500]
+                        cursor.execute(
+                            f"SELECT {columna} FROM estudiantes WHERE {columna} IN ({', '.join('?' * len(bloque))})",
+                            bloque
+                        )
+                        existentes.update(fila[0] for fila in cursor.fetchall())
+                    if existentes:
+                        ya_existen = df[columna].isin(existentes)
+                        resumen['duplicados'].extend(df.loc[ya_existen, 'matricula'].tolist())
+                        df = df[~ya_existen]
+                
+                if df.empty:
+                    return resumen
+                
+                campos = [campo for campo in CAMPOS_ESTUDIANTE if campo in df.columns]
+                if 'estado_estudiante' not in campos:
+                    campos.append('estado_estudiante')
+                    df = df.assign(estado_estudiante='Activo')
+                else:
+                    df = df.assign(estado_estudiante=df['estado_estudiante'].fillna('Activo'))
+                
+                query = (
+                    f"INSERT INTO estudiantes ({', '.join(campos)}, fecha_creacion, fecha_actualizacion) "
+                    f"VALUES ({', '.join('?' * len(campos))}, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
+                )
+                
+                cursor.executemany(query, df[campos].itertuples(index=False, name=None))
+                self._registrar_auditoria('INSERT', 'estudiantes', None,
+                                         f"Alta masiva de {len(df)} estudiantes", cursor=cursor)
+            
+            resumen['insertados'] = len(df)
+            self._marcar_tablas_modificadas('estudiantes')
+            self.logger.info(f"✅ {resumen['insertados']} estudiantes agregados en lote "
+                             f"({len(resumen['duplicados'])} duplicados, {len(resumen['invalidos'])} inválidos)")
+            return resumen
+            
+        except sqlite3.IntegrityError as e:
+            self.logger.error(f"❌ Error de integridad en alta masiva de estudiantes: {e}")
+            raise ValueError(f"Error de duplicación de datos en el lote: {e}")
+        except Exception as e:
+            self.logger.error(f"❌ Error agregando estudiantes en lote: {e}")
+            raise
+    
     def actualizar_estudiante(self, estudiante_id: int, datos_actualizados: dict):
-        """Actualizar estudiante existente"""
+        """Actualizar estudiante existente
+        
+        Solo se escriben los campos que cambian; la actualización y su auditoría
+        se confirman (o revierten) juntas en una sola transacción.
+        """
         try:
             if not self.conexion_local:
                 self.logger.error("❌ No hay conexión a base de datos")
                 raise ValueError("No hay conexión a base de datos")
             
-            # Obtener estudiante actual
-            estudiante_actual = self.obtener_estudiante_por_id(estudiante_id)
-            if not estudiante_actual:
-                raise ValueError(f"Estudiante {estudiante_id} no encontrado")
-            
-            # Preparar SET clauses
-            set_clauses = []
-            valores = []
-            
-            for campo, valor in datos_actualizados.items():
-                if campo not in ['id', 'fecha_creacion']:  # Campos que no se actualizan
-                    if valor != estudiante_actual[campo]:  # Solo actualizar si cambió
-                        set_clauses.append(f"{campo} = ?")
-                        valores.append(valor)
-            
-            if not set_clauses:
+            # Solo columnas conocidas (lista blanca); id y fecha_creacion nunca se actualizan
+            campos = [campo for campo in CAMPOS_ESTUDIANTE if campo in datos_actualizados]
+            if not campos:
                 self.logger.warning(f"⚠️ No hay cambios para actualizar en estudiante {estudiante_id}")
                 return True
             
-            # Añadir fecha de actualización
-            set_clauses.append("fecha_actualizacion = CURRENT_TIMESTAMP")
-            
-            # Construir y ejecutar query
-            valores.append(estudiante_id)
-            query = f"UPDATE estudiantes SET {', '.join(set_clauses)} WHERE id = ?"
-            
-            cursor = self.conexion_local.cursor()
-            cursor.execute(query, valores)
-            self.conexion_local.commit()
+            with self.transaccion() as cursor:
+                cursor.execute(f"SELECT {', '.join(campos)} FROM estudiantes WHERE id = ?", (estudiante_id,))
+                estudiante_actual = cursor.fetchone()
+                if estudiante_actual is None:
+                    raise ValueError(f"Estudiante {estudiante_id} no encontrado")
+                
+                cambiados = [campo for campo in campos
+                             if estudiante_actual[campo] != datos_actualizados[campo]]
+                if not cambiados:
+                    self.logger.warning(f"⚠️ No hay cambios para actualizar en estudiante {estudiante_id}")
+                    return True
+                
+                cursor.execute(
+                    f"UPDATE estudiantes SET {', '.join(f'{campo} = ?' for campo in cambiados)}, "
+                    f"fecha_actualizacion = CURRENT_TIMESTAMP WHERE id = ?",
+                    [datos_actualizados[campo] for campo in cambiados] + [estudiante_id]
+                )
+                
+                # Registrar en auditoría (en la misma transacción)
+                cambios = ', '.join(f"{campo}: {datos_actualizados[campo]}" for campo in cambiados)
+                self._registrar_auditoria('UPDATE', 'estudiantes', estudiante_id,
+                                         f"Estudiante actualizado: {cambios}", cursor=cursor)
             
+            self._marcar_tablas_modificadas('estudiantes')
             self.logger.info(f"✅ Estudiante actualizado: ID {estudiante_id}")
-            
-            # Registrar en auditoría
-            cambios = ', '.join([f"{k}: {v}" for k, v in datos_actualizados.items() 
-                               if k in datos_actualizados and estudiante_actual[k] != v])
-            self._registrar_auditoria('UPDATE', 'estudiantes', estudiante_id, 
-                                     f"Estudiante actualizado: {cambios}")
-            
             return True
             
         except Exception as e:
@@ -813,30 +1273,27 @@ class SistemaGestionEscolar:
                 self.logger.error("❌ No hay conexión a base de datos")
                 raise ValueError("No hay conexión a base de datos")
             
-            cursor = self.conexion_local.cursor()
-            
-            # Verificar si tiene registros relacionados
-            cursor.execute("SELECT COUNT(*) FROM inscritos WHERE estudiante_id = ?", (estudiante_id,))
-            if cursor.fetchone()[0] > 0:
+            # Verificar si tiene registros relacionados (se detiene en la primera coincidencia)
+            if self._existe("SELECT 1 FROM inscritos WHERE estudiante_id = ?", (estudiante_id,)):
                 raise ValueError("No se puede eliminar estudiante con inscripciones activas")
             
-            cursor.execute("SELECT COUNT(*) FROM egresados WHERE estudiante_id = ?", (estudiante_id,))
-            if cursor.fetchone()[0] > 0:
+            if self._existe("SELECT 1 FROM egresados WHERE estudiante_id = ?", (estudiante_id,)):
                 raise ValueError("No se puede eliminar estudiante egresado")
             
-            # Baja lógica (cambio de estado)
-            cursor.execute(
-                "UPDATE estudiantes SET estado_estudiante = 'Baja Definitiva', fecha_actualizacion = CURRENT_TIMESTAMP WHERE id = ?",
-                (estudiante_id,)
-            )
-            self.conexion_local.commit()
+            with self.transaccion() as cursor:
+                # Baja lógica (cambio de estado)
+                cursor.execute(
+                    "UPDATE estudiantes SET estado_estudiante = 'Baja Definitiva', fecha_actualizacion = CURRENT_TIMESTAMP WHERE id = ?",
+                    (estudiante_id,)
+                )
+                
+                # Registrar en auditoría
+                self._registrar_auditoria('UPDATE', 'estudiantes', estudiante_id, 
+                                         "Estudiante dado de baja (Baja Definitiva)", cursor=cursor)
             
+            self._marcar_tablas_modificadas('estudiantes')
             self.logger.info(f"✅ Estudiante dado de baja: ID {estudiante_id}")
             
-            # Registrar en auditoría
-            self._registrar_auditoria('UPDATE', 'estudiantes', estudiante_id, 
-                                     "Estudiante dado de baja (Baja Definitiva)")
-            
             return True
             
         except Exception as e:
@@ -850,26 +1307,25 @@ class SistemaGestionEscolar:
                 self.logger.error("❌ No hay conexión a base de datos")
                 raise ValueError("No hay conexión a base de datos")
             
-            if nuevo_estado not in ESTADOS_ESTUDIANTE:
+            if nuevo_estado not in ESTADOS_ESTUDIANTE_VALIDOS:
                 raise ValueError(f"Estado inválido. Debe ser: {', '.join(ESTADOS_ESTUDIANTE)}")
             
-            cursor = self.conexion_local.cursor()
-            cursor.execute(
-                "UPDATE estudiantes SET estado_estudiante = ?, fecha_actualizacion = CURRENT_TIMESTAMP WHERE id = ?",
-                (nuevo_estado, estudiante_id)
-            )
-            
-            if cursor.rowcount == 0:
-                raise ValueError(f"Estudiante {estudiante_id} no encontrado")
-            
-            self.conexion_local.commit()
+            with self.transaccion() as cursor:
+                cursor.execute(
+                    "UPDATE estudiantes SET estado_estudiante = ?, fecha_actualizacion = CURRENT_TIMESTAMP WHERE id = ?",
+                    (nuevo_estado, estudiante_id)
+                )
+                
+                if cursor.rowcount == 0:
+                    raise ValueError(f"Estudiante {estudiante_id} no encontrado")
+                
+                # Registrar en auditoría
+                self._registrar_auditoria('UPDATE', 'estudiantes', estudiante_id, 
+                                         f"Estado cambiado a: {nuevo_estado}", cursor=cursor)
             
+            self._marcar_tablas_modificadas('estudiantes')
             self.logger.info(f"✅ Estado cambiado a '{nuevo_estado}' para estudiante {estudiante_id}")
             
-            # Registrar en auditoría
-            self._registrar_auditoria('UPDATE', 'estudiantes', estudiante_id, 
-                                     f"Estado cambiado a: {nuevo_estado}")
-            
             return True
             
         except Exception as e:
@@ -880,19 +1336,27 @@ class SistemaGestionEscolar:
     # OPERACIONES PARA INSCRITOS
     # =============================================================================
     
-    def obtener_inscripciones(self, estudiante_id: int = None, ciclo_escolar: str = None):
-        """Obtener inscripciones"""
+    def obtener_inscripciones(self, estudiante_id: int = None, ciclo_escolar: str = None,
+                              incluir_estudiante: bool = True):
+        """Obtener inscripciones
+        
+        Con incluir_estudiante=False se omite el JOIN con estudiantes cuando solo
+        se necesitan columnas propias de la inscripción.
+        """
         try:
             if not self.conexion_local:
                 self.logger.error("❌ No hay conexión a base de datos")
                 return []
             
-            query = """
-                SELECT i.*, e.matricula, e.nombre, e.apellido_paterno, e.apellido_materno
-                FROM inscritos i
-                JOIN estudiantes e ON i.estudiante_id = e.id
-                WHERE 1=1
-            """
+            if incluir_estudiante:
+                query = """
+                    SELECT i.*, e.matricula, e.nombre, e.apellido_paterno, e.apellido_materno
+                    FROM inscritos i
+                    JOIN estudiantes e ON i.estudiante_id = e.id
+                    WHERE 1=1
+                """
+            else:
+                query = "SELECT i.* FROM inscritos i WHERE 1=1"
             params = []
             
             if estudiante_id:
@@ -921,43 +1385,45 @@ class SistemaGestionEscolar:
                 self.logger.error("❌ No hay conexión a base de datos")
                 raise ValueError("No hay conexión a base de datos")
             
-            # Verificar que el estudiante existe y está activo
-            cursor = self.conexion_local.cursor()
-            cursor.execute(
-                "SELECT estado_estudiante FROM estudiantes WHERE id = ?",
-                (estudiante_id,)
-            )
-            resultado = cursor.fetchone()
-            
-            if not resultado:
-                raise ValueError(f"Estudiante {estudiante_id} no encontrado")
-            
-            if resultado[0] != 'Activo':
-                raise ValueError(f"Estudiante no está activo (estado: {resultado[0]})")
-            
-            # Verificar que no esté ya inscrito en el mismo ciclo
-            cursor.execute(
-                "SELECT COUNT(*) FROM inscritos WHERE estudiante_id = ? AND ciclo_escolar = ?",
-                (estudiante_id, ciclo_escolar)
-            )
-            if cursor.fetchone()[0] > 0:
-                raise ValueError(f"Estudiante ya inscrito en el ciclo {ciclo_escolar}")
-            
-            # Insertar inscripción
-            cursor.execute("""
-                INSERT INTO inscritos (estudiante_id, ciclo_escolar, semestre, creditos_inscritos, fecha_inscripcion)
-                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
-            """, (estudiante_id, ciclo_escolar, semestre, creditos_inscritos))
-            
-            self.conexion_local.commit()
+            # Inscripción y auditoría se confirman juntas en una sola transacción
+            with self.transaccion() as cursor:
+                # Insertar solo si el estudiante existe, está activo y no está inscrito en el ciclo
+                cursor.execute("""
+                    INSERT INTO inscritos (estudiante_id, ciclo_escolar, semestre, creditos_inscritos, fecha_inscripcion)
+                    SELECT id, ?, ?, ?, CURRENT_TIMESTAMP
+                    FROM estudiantes
+                    WHERE id = ? AND estado_estudiante = 'Activo'
+                      AND NOT EXISTS (
+                          SELECT 1 FROM inscritos WHERE estudiante_id = ? AND ciclo_escolar = ?
+                      )
+                """, (ciclo_escolar, semestre, creditos_inscritos, estudiante_id, estudiante_id, ciclo_escolar))
+                
+                if cursor.rowcount == 0:
+                    # Diagnóstico solo en el camino de error
+                    cursor.execute(
+                        "SELECT estado_estudiante FROM estudiantes WHERE id = ?",
+                        (estudiante_id,)
+                    )
+                    resultado = cursor.fetchone()
+                    
+                    if not resultado:
+                        raise ValueError(f"Estudiante {estudiante_id} no encontrado")
+                    
+                    if resultado[0] != 'Activo':
+                        raise ValueError(f"Estudiante no está activo (estado: {resultado[0]})")
+                    
+                    raise ValueError(f"Estudiante ya inscrito en el ciclo {ciclo_escolar}")
+                
+                inscripcion_id = cursor.lastrowid
+                
+                # Registrar en auditoría
+                self._registrar_auditoria('INSERT', 'inscritos', inscripcion_id,
+                                         f"Estudiante {estudiante_id} inscrito en {ciclo_escolar}",
+                                         cursor=cursor)
             
-            inscripcion_id = cursor.lastrowid
+            self._marcar_tablas_modificadas('inscritos')
             self.logger.info(f"✅ Estudiante {estudiante_id} inscrito en ciclo {ciclo_escolar}")
             
-            # Registrar en auditoría
-            self._registrar_auditoria('INSERT', 'inscritos', inscripcion_id,
-                                     f"Estudiante {estudiante_id} inscrito en {ciclo_escolar}")
-            
             return inscripcion_id
             
         except Exception as e:
@@ -971,23 +1437,22 @@ class SistemaGestionEscolar:
                 self.logger.error("❌ No hay conexión a base de datos")
                 raise ValueError("No hay conexión a base de datos")
             
-            cursor = self.conexion_local.cursor()
-            cursor.execute(
-                "UPDATE inscritos SET promedio_ciclo = ? WHERE id = ?",
-                (promedio_ciclo, inscripcion_id)
-            )
-            
-            if cursor.rowcount == 0:
-                raise ValueError(f"Inscripción {inscripcion_id} no encontrada")
-            
-            self.conexion_local.commit()
+            with self.transaccion() as cursor:
+                cursor.execute(
+                    "UPDATE inscritos SET promedio_ciclo = ? WHERE id = ?",
+                    (promedio_ciclo, inscripcion_id)
+                )
+                
+                if cursor.rowcount == 0:
+                    raise ValueError(f"Inscripción {inscripcion_id} no encontrada")
+                
+                # Registrar en auditoría
+                self._registrar_auditoria('UPDATE', 'inscritos', inscripcion_id,
+                                         f"Promedio actualizado a {promedio_ciclo}", cursor=cursor)
             
+            self._marcar_tablas_modificadas('inscritos')
             self.logger.info(f"✅ Promedio actualizado para inscripción {inscripcion_id}: {promedio_ciclo}")
             
-            # Registrar en auditoría
-            self._registrar_auditoria('UPDATE', 'inscritos', inscripcion_id,
-                                     f"Promedio actualizado a {promedio_ciclo}")
-            
             return True
             
         except Exception as e:
@@ -1006,41 +1471,39 @@ class SistemaGestionEscolar:
                 self.logger.error("❌ No hay conexión a base de datos")
                 raise ValueError("No hay conexión a base de datos")
             
-            # Verificar que el estudiante existe
-            estudiante = self.obtener_estudiante_por_id(estudiante_id)
-            if not estudiante:
-                raise ValueError(f"Estudiante {estudiante_id} no encontrado")
-            
-            # Verificar que no esté ya registrado como egresado
-            cursor = self.conexion_local.cursor()
-            cursor.execute(
-                "SELECT COUNT(*) FROM egresados WHERE estudiante_id = ?",
-                (estudiante_id,)
-            )
-            if cursor.fetchone()[0] > 0:
-                raise ValueError(f"Estudiante {estudiante_id} ya está registrado como egresado")
-            
-            # Insertar registro de egresado
-            cursor.execute("""
-                INSERT INTO egresados (estudiante_id, fecha_egreso, titulo_obtenido, promedio_final, fecha_registro)
-                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
-            """, (estudiante_id, fecha_egreso, titulo_obtenido, promedio_final))
-            
-            # Actualizar estado del estudiante
-            cursor.execute(
-                "UPDATE estudiantes SET estado_estudiante = 'Egresado', fecha_egreso = ? WHERE id = ?",
-                (fecha_egreso, estudiante_id)
-            )
-            
-            self.conexion_local.commit()
+            # Alta de egresado, cambio de estado y auditoría en una sola transacción
+            with self.transaccion() as cursor:
+                # Insertar egresado solo si el estudiante existe y aún no es egresado (una sola consulta)
+                cursor.execute("""
+                    INSERT INTO egresados (estudiante_id, fecha_egreso, titulo_obtenido, promedio_final, fecha_registro)
+                    SELECT ?, ?, ?, ?, CURRENT_TIMESTAMP
+                    WHERE EXISTS (SELECT 1 FROM estudiantes WHERE id = ?)
+                      AND NOT EXISTS (SELECT 1 FROM egresados WHERE estudiante_id = ?)
+                """, (estudiante_id, fecha_egreso, titulo_obtenido, promedio_final, estudiante_id, estudiante_id))
+                
+                if cursor.rowcount == 0:
+                    # Diagnóstico solo en el camino de error
+                    cursor.execute("SELECT EXISTS(SELECT 1 FROM estudiantes WHERE id = ?)", (estudiante_id,))
+                    if not cursor.fetchone()[0]:
+                        raise ValueError(f"Estudiante {estudiante_id} no encontrado")
+                    raise ValueError(f"Estudiante {estudiante_id} ya está registrado como egresado")
+                
+                egresado_id = cursor.lastrowid
+                
+                # Actualizar estado del estudiante
+                cursor.execute(
+                    "UPDATE estudiantes SET estado_estudiante = 'Egresado', fecha_egreso = ? WHERE id = ?",
+                    (fecha_egreso, estudiante_id)
+                )
+                
+                # Registrar en auditoría
+                self._registrar_auditoria('INSERT', 'egresados', egresado_id,
+                                         f"Estudiante {estudiante_id} registrado como egresado",
+                                         cursor=cursor)
             
-            egresado_id = cursor.lastrowid
+            self._marcar_tablas_modificadas('egresados', 'estudiantes')
             self.logger.info(f"✅ Egresado registrado: ID {egresado_id} (Estudiante: {estudiante_id})")
             
-            # Registrar en auditoría
-            self._registrar_auditoria('INSERT', 'egresados', egresado_id,
-                                     f"Estudiante {estudiante_id} registrado como egresado")
-            
             return egresado_id
             
         except Exception as e:
@@ -1081,6 +1544,10 @@ class SistemaGestionEscolar:
             self.logger.error(f"❌ Error obteniendo egresados: {e}")
             return []
     
+    def contar_egresados(self) -> int:
+        """Contar egresados reutilizando las estadísticas generales (cacheadas por versión)"""
+        return self.obtener_estadisticas_generales().get('total_egresados', 0)
+    
     # =============================================================================
     # OPERACIONES PARA CONTRATADOS
     # =============================================================================
@@ -1094,33 +1561,32 @@ class SistemaGestionEscolar:
                 self.logger.error("❌ No hay conexión a base de datos")
                 raise ValueError("No hay conexión a base de datos")
             
-            # Verificar que el egresado existe
-            cursor = self.conexion_local.cursor()
-            cursor.execute(
-                "SELECT estudiante_id FROM egresados WHERE id = ?",
-                (egresado_id,)
-            )
-            resultado = cursor.fetchone()
-            
-            if not resultado:
-                raise ValueError(f"Egresado {egresado_id} no encontrado")
-            
-            # Insertar registro de contratación
-            cursor.execute("""
-                INSERT INTO contratados (egresado_id, empresa, puesto, fecha_contratacion, 
-                                       salario_inicial, tipo_contrato, fecha_registro)
-                VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-            """, (egresado_id, empresa, puesto, fecha_contratacion, salario_inicial, tipo_contrato))
-            
-            self.conexion_local.commit()
+            with self.transaccion() as cursor:
+                # Verificar que el egresado existe
+                cursor.execute(
+                    "SELECT estudiante_id FROM egresados WHERE id = ?",
+                    (egresado_id,)
+                )
+                resultado = cursor.fetchone()
+                
+                if not resultado:
+                    raise ValueError(f"Egresado {egresado_id} no encontrado")
+                
+                # Insertar registro de contratación
+                cursor.execute("""
+                    INSERT INTO contratados (egresado_id, empresa, puesto, fecha_contratacion, 
+                                           salario_inicial, tipo_contrato, fecha_registro)
+                    VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                """, (egresado_id, empresa, puesto, fecha_contratacion, salario_inicial, tipo_contrato))
+                contratado_id = cursor.lastrowid
+                
+                # Registrar en auditoría
+                self._registrar_auditoria('INSERT', 'contratados', contratado_id,
+                                         f"Egresado {egresado_id} contratado por {empresa}", cursor=cursor)
             
-            contratado_id = cursor.lastrowid
+            self._marcar_tablas_modificadas('contratados')
             self.logger.info(f"✅ Contratación registrada: ID {contratado_id} (Egresado: {egresado_id})")
             
-            # Registrar en auditoría
-            self._registrar_auditoria('INSERT', 'contratados', contratado_id,
-                                     f"Egresado {egresado_id} contratado por {empresa}")
-            
             return contratado_id
             
         except Exception as e:
@@ -1168,117 +1634,97 @@ class SistemaGestionEscolar:
     # =============================================================================
     
     def obtener_estadisticas_generales(self):
-        """Obtener estadísticas generales del sistema - CORREGIDO"""
+        """Obtener estadísticas generales del sistema - CORREGIDO
+        
+        Se sirven desde st.cache_data para que los reruns del panel no repitan la
+        agregación; cada escritura incrementa version_datos y con ello cambia la
+        clave del caché.
+        """
+        try:
+            return self._estadisticas_en_cache(self.version_datos)
+        except Exception as e:
+            self.logger.error(f"❌ Error obteniendo estadísticas: {e}")
+            return self._estadisticas_vacias()
+    
+    @st.cache_data(max_entries=4)
+    def _estadisticas_en_cache(_self, version_datos: int):
+        """Estadísticas cacheadas por versión de datos (los errores no se cachean)
+        
+        Sin TTL: la versión cambia con cada escritura y es la única invalidación
+        necesaria (único caché de las estadísticas).
+        """
+        return _self._calcular_estadisticas_generales()
+    
+    def _calcular_estadisticas_generales(self):
+        """Calcular las estadísticas generales con una sola consulta agregada"""
         try:
             if not self.conexion_local:
-                self.logger.error("❌ No hay conexión a base de datos para estadísticas")
-                return self._estadisticas_vacias()
+                raise ValueError("No hay conexión a base de datos para estadísticas")
             
-            cursor = self.conexion_local.cursor()
-            estadisticas = {}
+            cursor = self._cursor_tuplas()
             
-            # Total de estudiantes por estado
-            try:
-                cursor.execute("""
-                    SELECT estado_estudiante, COUNT(*) as total
-                    FROM estudiantes
-                    GROUP BY estado_estudiante
-                """)
-                resultados = cursor.fetchall()
-                if resultados:
-                    estadisticas['estudiantes_por_estado'] = dict(resultados)
-                else:
-                    estadisticas['estudiantes_por_estado'] = {}
-            except Exception as e:
-                self.logger.warning(f"⚠️ Error obteniendo estudiantes por estado: {e}")
-                estadisticas['estudiantes_por_estado'] = {}
-            
-            # Total de estudiantes
-            estadisticas['total_estudiantes'] = sum(estadisticas['estudiantes_por_estado'].values())
-            
-            # Estudiantes activos
-            estadisticas['estudiantes_activos'] = estadisticas['estudiantes_por_estado'].get('Activo', 0)
-            
-            # Egresados
-            try:
-                cursor.execute("SELECT COUNT(*) FROM egresados")
-                resultado = cursor.fetchone()
-                estadisticas['total_egresados'] = resultado[0] if resultado else 0
-            except:
-                estadisticas['total_egresados'] = 0
-            
-            # Contratados
-            try:
-                cursor.execute("SELECT COUNT(DISTINCT egresado_id) FROM contratados")
-                resultado = cursor.fetchone()
-                estadisticas['egresados_contratados'] = resultado[0] if resultado else 0
-            except:
-                estadisticas['egresados_contratados'] = 0
-            
-            # Promedio general de estudiantes activos
-            try:
-                cursor.execute("SELECT AVG(promedio) FROM estudiantes WHERE estado_estudiante = 'Activo' AND promedio IS NOT NULL")
-                resultado = cursor.fetchone()
-                estadisticas['promedio_general'] = resultado[0] if resultado and resultado[0] else 0
-            except:
-                estadisticas['promedio_general'] = 0
-            
-            # Estudiantes por nivel de estudio
-            try:
-                cursor.execute("""
-                    SELECT nivel_estudio, COUNT(*) as total
-                    FROM estudiantes
-                    WHERE nivel_estudio IS NOT NULL
-                    GROUP BY nivel_estudio
-                """)
-                resultados = cursor.fetchall()
-                if resultados:
-                    estadisticas['estudiantes_por_nivel'] = dict(resultados)
-                else:
-                    estadisticas['estudiantes_por_nivel'] = {}
-            except:
-                estadisticas['estudiantes_por_nivel'] = {}
-            
-            # Estudiantes por carrera
-            try:
-                cursor.execute("""
-                    SELECT carrera, COUNT(*) as total
+            # Todas las métricas en una sola consulta; cada fila se etiqueta con su grupo
+            cursor.execute("""
+                SELECT 'por_estado' AS grupo, estado_estudiante AS clave, COUNT(*) AS valor
+                FROM estudiantes
+                GROUP BY estado_estudiante
+                UNION ALL
+                SELECT 'total_egresados', NULL, COUNT(*) FROM egresados
+                UNION ALL
+                SELECT 'egresados_contratados', NULL, COUNT(DISTINCT egresado_id) FROM contratados
+                UNION ALL
+                SELECT 'promedio_general', NULL, AVG(promedio)
+                FROM estudiantes
+                WHERE estado_estudiante = 'Activo' AND promedio IS NOT NULL
+                UNION ALL
+                SELECT 'por_nivel', nivel_estudio, COUNT(*)
+                FROM estudiantes
+                WHERE nivel_estudio IS NOT NULL
+                GROUP BY nivel_estudio
+                UNION ALL
+                SELECT * FROM (
+                    SELECT 'top_carreras', carrera, COUNT(*) AS total
                     FROM estudiantes
                     WHERE carrera IS NOT NULL
                     GROUP BY carrera
                     ORDER BY total DESC
                     LIMIT 10
-                """)
-                resultados = cursor.fetchall()
-                if resultados:
-                    estadisticas['top_carreras'] = dict(resultados)
-                else:
-                    estadisticas['top_carreras'] = {}
-            except:
-                estadisticas['top_carreras'] = {}
-            
-            # Inscripciones por ciclo escolar
-            try:
-                cursor.execute("""
-                    SELECT ciclo_escolar, COUNT(*) as total
+                )
+                UNION ALL
+                SELECT * FROM (
+                    SELECT 'por_ciclo', ciclo_escolar, COUNT(*)
                     FROM inscritos
                     GROUP BY ciclo_escolar
                     ORDER BY ciclo_escolar DESC
                     LIMIT 5
-                """)
-                resultados = cursor.fetchall()
-                if resultados:
-                    estadisticas['inscripciones_por_ciclo'] = dict(resultados)
+                )
+            """)
+            
+            grupos = {'por_estado': {}, 'por_nivel': {}, 'top_carreras': {}, 'por_ciclo': {}}
+            escalares = {}
+            for grupo, clave, valor in cursor.fetchall():
+                if grupo in grupos:
+                    grupos[grupo][clave] = valor
                 else:
-                    estadisticas['inscripciones_por_ciclo'] = {}
-            except:
-                estadisticas['inscripciones_por_ciclo'] = {}
+                    escalares[grupo] = valor
+            
+            estadisticas = {
+                'estudiantes_por_estado': grupos['por_estado'],
+                'total_estudiantes': sum(grupos['por_estado'].values()),
+                'estudiantes_activos': grupos['por_estado'].get('Activo', 0),
+                'total_egresados': escalares.get('total_egresados') or 0,
+                'egresados_contratados': escalares.get('egresados_contratados') or 0,
+                'promedio_general': escalares.get('promedio_general') or 0,
+                'estudiantes_por_nivel': grupos['por_nivel'],
+                'top_carreras': dict(sorted(grupos['top_carreras'].items(), key=lambda x: x[1], reverse=True)),
+                'inscripciones_por_ciclo': dict(sorted(grupos['por_ciclo'].items(), key=lambda x: str(x[0]), reverse=True))
+            }
             
             return estadisticas
             
         except Exception as e:
-            self.logger.error(f"❌ Error obteniendo estadísticas: {e}")
-            return self._estadisticas_vacias()
+            self.logger.error(f"❌ Error calculando estadísticas: {e}")
+            raise
     
     def _estadisticas_vacias(self):
         """Devolver estadísticas vacías"""
@@ -1295,10 +1741,8 @@ class SistemaGestionEscolar:
         }
     
     def generar_informe_excel(self, tipo_informe: str = 'estudiantes'):
-        """Generar informe en formato Excel"""
+        """Generar informe en formato Excel (escritura en streaming, sin DataFrame intermedio)"""
         try:
-            import pandas as pd
-            
             if not self.conexion_local:
                 raise ValueError("No hay conexión a base de datos")
             
@@ -1328,18 +1772,15 @@ class SistemaGestionEscolar:
             else:
                 raise ValueError(f"Tipo de informe no válido: {tipo_informe}")
             
-            # Ejecutar consulta y crear DataFrame
-            df = pd.read_sql_query(query, self.conexion_local)
-            
-            # Si no hay datos, crear DataFrame vacío
-            if df.empty:
-                df = pd.DataFrame({'Mensaje': ['No hay datos para el informe seleccionado']})
+            cursor = self._cursor_tuplas()
+            cursor.execute(query)
             
-            # Crear archivo Excel en memoria
+            # Crear archivo Excel en memoria volcando las filas directamente desde el cursor
             output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Datos', index=False)
-            
+            if HAS_XLSXWRITER:
+                self._escribir_excel_xlsxwriter(cursor, output)
+            else:
+                self._escribir_excel_openpyxl(cursor, output)
             output.seek(0)
             
             self.logger.info(f"✅ Informe {tipo_informe} generado: {nombre_archivo}")
@@ -1357,29 +1798,165 @@ class SistemaGestionEscolar:
             
             return output, f"error_informe_{self.util.generar_timestamp()}.xlsx"
     
+    def _escribir_excel_xlsxwriter(self, cursor, output):
+        """Escribir el resultado del cursor con xlsxwriter en modo constant_memory
+        
+        Cada fila se vuelca a disco al escribir la siguiente, por lo que la memoria
+        no crece con el número de filas.
+        """
+        wb = xlsxwriter.Workbook(output, {'constant_memory': True, 'use_zip64': True})
+        ws = wb.add_worksheet('Datos')
+        ws.write_row(0, 0, [descripcion[0] for descripcion in cursor.description])
+        
+        num_fila = 0
+        for lote in self._iterar_lotes(cursor):
+            for fila in lote:
+                num_fila += 1
+                ws.write_row(num_fila, 0, fila)
+        
+        # Si no hay datos, dejar un mensaje en la hoja
+        if num_fila == 0:
+            ws.write_row(1, 0, ['No hay datos para el informe seleccionado'])
+        
+        wb.close()
+    
+    def _escribir_excel_openpyxl(self, cursor, output):
+        """Escribir el resultado del cursor con openpyxl en modo write_only (sin xlsxwriter)"""
+        from openpyxl import Workbook
+        
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet('Datos')
+        ws.append([descripcion[0] for descripcion in cursor.description])
+        
+        filas_escritas = 0
+        for lote in self._iterar_lotes(cursor):
+            for fila in lote:
+                ws.append(fila)
+            filas_escritas += len(lote)
+        
+        # Si no hay datos, dejar un mensaje en la hoja
+        if filas_escritas == 0:
+            ws.append(['No hay datos para el informe seleccionado'])
+        
+        wb.save(output)
+    
     # =============================================================================
     # UTILIDADES Y MÉTODOS AUXILIARES
     # =============================================================================
     
-    def _registrar_auditoria(self, accion: str, tabla: str, registro_id: int, detalles: str = None):
-        """Registrar acción en auditoría"""
+    def _cursor_tuplas(self):
+        """Cursor que devuelve tuplas simples (sin sqlite3.Row) para agregados y exportaciones"""
+        cursor = self.conexion_local.cursor()
+        cursor.row_factory = None
+        return cursor
+    
+    def _opciones_seleccion(self, clave: str, registros, contexto=None) -> tuple:
+        """(ids, etiquetas 'id - matrícula - nombre apellido') para los selectbox
+        
+        Se construyen con concatenación vectorizada de pandas y se guardan en la sesión
+        mientras no cambien los datos ('version_datos') ni el contexto de la vista.
+        Junto a las etiquetas se guarda la tupla de ids, de modo que el selectbox
+        recibe siempre el mismo objeto de opciones entre reruns.
+        """
+        firma = (self.version_datos, contexto, len(registros))
+        en_cache = st.session_state.get(clave)
+        if en_cache and en_cache[0] == firma:
+            return en_cache[1:]
+        
+        if isinstance(registros, pd.DataFrame):
+            df = registros
+        elif isinstance(registros[0], dict):
+            df = pd.DataFrame(registros)
+        else:
+            df = self._filas_a_dataframe(registros)
+        
+        # str.cat con na_rep: un campo nulo no anula la etiqueta completa
+        nombre = df['nombre'].str.cat(df['apellido_paterno'], sep=' ', na_rep='')
+        etiquetas = df['id'].astype(str).str.cat([df['matricula'], nombre], sep=' - ', na_rep='')
+        ids = tuple(df['id'].tolist())
+        opciones = dict(zip(ids, etiquetas.tolist()))
+        st.session_state[clave] = (firma, ids, opciones)
+        return ids, opciones
+    
+    def _seleccionar_registro(self, etiqueta: str, clave: str, registros, clave_widget: str,
+                              contexto=None):
+        """Selectbox de estudiantes/egresados ligado a las opciones guardadas en la sesión
+        
+        La clave del widget incluye 'version_datos': mientras los datos no cambien,
+        Streamlit lo trata como el mismo widget y conserva la selección; al cambiar
+        los datos se crea uno nuevo en lugar de comparar la lista de opciones anterior.
+        """
+        ids, opciones = self._opciones_seleccion(clave, registros, contexto)
+        version = self.version_datos
+        return st.selectbox(
+            etiqueta,
+            ids,
+            format_func=opciones.__getitem__,
+            key=f"{clave_widget}_{version}"
+        )
+    
+    @staticmethod
+    def _filas_a_dataframe(filas):
+        """Construir un DataFrame directamente desde filas sqlite3.Row (sin dicts intermedios)"""
+        return pd.DataFrame.from_records(filas, columns=filas[0].keys())
+    
+    def _existe(self, consulta: str, parametros: tuple = ()) -> bool:
+        """Comprobar existencia con SELECT EXISTS(...): devuelve 0/1 sin construir filas"""
+        cursor = self._cursor_tuplas()
+        cursor.execute(f"SELECT EXISTS({consulta})", parametros)
+        return bool(cursor.fetchone()[0])
+    
+    @staticmethod
+    def _iterar_lotes(cursor, tamano_lote: int = 1000):
+        """Iterar el resultado de un cursor en lotes de fetchmany"""
+        while True:
+            lote = cursor.fetchmany(tamano_lote)
+            if not lote:
+                break
+            yield lote
+    
+    @contextmanager
+    def transaccion(self):
+        """Agrupar varias sentencias en una sola transacción (un único commit)
+        
+        Confirma al salir del bloque o revierte todo si ocurre una excepción. Un
+        candado evita que dos sesiones mezclen sentencias en la misma transacción.
+        """
+        with self._lock_transacciones:
+            if self.conexion_local.in_transaction:
+                self.conexion_local.commit()
+            
+            cursor = self.conexion_local.cursor()
+            cursor.execute("BEGIN")
+            try:
+                yield cursor
+                self.conexion_local.commit()
+            except Exception:
+                self.conexion_local.rollback()
+                raise
+    
+    def _registrar_auditoria(self, accion: str, tabla: str, registro_id: int, detalles: str = None,
+                             cursor=None):
+        """Registrar acción en auditoría
+        
+        Si se recibe el cursor de una transacción abierta, el registro se confirma
+        junto con ella en lugar de hacer un commit propio.
+        """
         try:
             if not self.conexion_local:
                 return
             
-            cursor = self.conexion_local.cursor()
-            
             # Obtener usuario actual si hay sesión
             usuario_id = None
             if hasattr(st, 'session_state') and hasattr(st.session_state, 'get'):
                 usuario_id = st.session_state.get('usuario_id')
             
-            cursor.execute("""
-                INSERT INTO auditoria (usuario_id, accion, tabla_afectada, registro_id, detalles)
-                VALUES (?, ?, ?, ?, ?)
-            """, (usuario_id, accion, tabla, registro_id, detalles))
-            
-            self.conexion_local.commit()
+            parametros = (usuario_id, accion, tabla, registro_id, detalles)
+            if cursor is not None:
+                cursor.execute(SQL_INSERTAR_AUDITORIA, parametros)
+            else:
+                with self.transaccion() as cursor_propio:
+                    cursor_propio.execute(SQL_INSERTAR_AUDITORIA, parametros)
             
         except Exception as e:
             self.logger.warning(f"⚠️ Error registrando auditoría: {e}")
@@ -1413,14 +1990,53 @@ class SistemaGestionEscolar:
         # Validar fecha de nacimiento
         if datos.get('fecha_nacimiento'):
             try:
-                fecha_nac = datetime.strptime(datos['fecha_nacimiento'], '%Y-%m-%d')
+                fecha_nac = self.util.parsear_fecha(datos['fecha_nacimiento'])
                 if fecha_nac > datetime.now():
                     errores.append("La fecha de nacimiento no puede ser futura")
             except:
                 errores.append("Formato de fecha inválido (usar YYYY-MM-DD)")
-        
+
         return errores
-    
+
+    def validar_datos_estudiantes_lote(self, df: pd.DataFrame) -> dict:
+        """Validar un lote de estudiantes de forma vectorizada (importaciones masivas)
+
+        Retorna un diccionario {índice: [errores]} solo con las filas inválidas.
+        """
+        if df.empty:
+            return {}
+
+        def columna(nombre):
+            if nombre in df.columns:
+                return df[nombre].fillna('').astype(str).str.strip()
+            return pd.Series('', index=df.index)
+
+        matricula = columna('matricula')
+        email = columna('email')
+        curp = columna('curp')
+        fecha_texto = columna('fecha_nacimiento')
+        fechas = pd.to_datetime(fecha_texto, format='%Y-%m-%d', errors='coerce')
+
+        reglas = [
+            (matricula == '', "La matrícula es obligatoria"),
+            ((matricula != '') & ((matricula.str.len() < 3) | ~matricula.str.contains(self.util.PATRON_DIGITO)),
+             "Formato de matrícula inválido"),
+            (columna('nombre') == '', "El nombre es obligatorio"),
+            (columna('apellido_paterno') == '', "El apellido paterno es obligatorio"),
+            ((email != '') & ~email.str.match(self.util.PATRON_EMAIL), "Formato de email inválido"),
+            ((curp != '') & (curp.str.len() != 18), "El CURP debe tener 18 caracteres"),
+            ((fecha_texto != '') & fechas.isna(), "Formato de fecha inválido (usar YYYY-MM-DD)"),
+            (fechas > pd.Timestamp(datetime.now()), "La fecha de nacimiento no puede ser futura"),
+        ]
+
+        mascaras = pd.DataFrame({mensaje: mascara.to_numpy() for mascara, mensaje in reglas}, index=df.index)
+        invalidas = mascaras[mascaras.any(axis=1)]
+
+        return {
+            indice: [mensaje for mensaje, falla in fila.items() if falla]
+            for indice, fila in invalidas.iterrows()
+        }
+
     def obtener_proximo_ciclo_escolar(self):
         """Obtener el próximo ciclo escolar basado en la fecha actual"""
         hoy = datetime.now()
@@ -1433,16 +2049,55 @@ class SistemaGestionEscolar:
         else:
             return f"{año_actual - 1}-{año_actual}"
     
+    def _marcar_tablas_modificadas(self, *tablas: str):
+        """Incrementar la versión de las tablas modificadas para invalidar cachés"""
+        for tabla in tablas:
+            self.versiones_tablas[tabla] = self.versiones_tablas.get(tabla, 0) + 1
+    
+    @property
+    def version_datos(self) -> int:
+        """Versión global de los datos: clave de los cachés st.cache_data
+        
+        La instancia es compartida por todas las sesiones (cache_resource), así que
+        una escritura en una sesión invalida también los cachés de las demás.
+        """
+        return sum(self.versiones_tablas.values())
+    
     def limpiar_cache(self):
         """Limpiar caché del sistema"""
         self.cache_data.clear()
         self.cache_timestamps.clear()
+        self._estadisticas_en_cache.clear()
         self.logger.info("🗑️ Caché limpiado")
     
+    def obtener_resumen_estado(self) -> dict:
+        """Resumen del estado del sistema (inicialización, SSH, sincronización)
+        
+        Se calcula una sola vez por ejecución del script (clave 'num_ejecucion',
+        que main() incrementa) y lo comparten la barra lateral y los paneles.
+        """
+        ejecucion = st.session_state.get('num_ejecucion', 0)
+        en_cache = st.session_state.get('resumen_estado')
+        if en_cache and en_cache[0] == ejecucion:
+            return en_cache[1]
+        
+        datos = self.estado.estado if self.estado else {}
+        resumen = {
+            'inicializada': bool(self.estado and self.estado.esta_inicializada()),
+            'ssh_habilitado': self.ssh_config.get('enabled', False),
+            'ssh_conectado': bool(datos.get('ssh_conectado')),
+            'ssh_error': datos.get('ssh_error'),
+            'ultima_sincronizacion': self.estado.fecha_legible('ultima_sincronizacion') if self.estado else None,
+            'ultima_verificacion': self.estado.fecha_legible('ultima_verificacion') if self.estado else None,
+            'backups_realizados': datos.get('backups_realizados', 0)
+        }
+        st.session_state['resumen_estado'] = (ejecucion, resumen)
+        return resumen
+    
     def obtener_edad_estudiante(self, estudiante_id: int) -> int:
         """Obtener edad del estudiante"""
         estudiante = self.obtener_estudiante_por_id(estudiante_id)
-        if estudiante and estudiante.get('fecha_nacimiento'):
+        if estudiante and estudiante['fecha_nacimiento']:
             return self.util.calcular_edad(estudiante['fecha_nacimiento'])
         return None
     
@@ -1459,16 +2114,17 @@ class SistemaGestionEscolar:
         st.title("📊 Panel de Control - Sistema de Gestión Escolar")
         
         # Estado del sistema
+        resumen = self.obtener_resumen_estado()
         col1, col2 = st.columns(2)
         with col1:
-            if self.estado and self.estado.esta_inicializada():
+            if resumen['inicializada']:
                 st.success("✅ Sistema inicializado")
             else:
                 st.error("❌ Sistema no inicializado")
         
         with col2:
-            if self.ssh_config.get('enabled', False):
-                if self.estado and self.estado.estado.get('ssh_conectado'):
+            if resumen['ssh_habilitado']:
+                if resumen['ssh_conectado']:
                     st.success("🔗 Conectado al servidor")
                 else:
                     st.error("❌ Desconectado del servidor")
@@ -1490,115 +2146,137 @@ class SistemaGestionEscolar:
             st.metric("💼 Contratados", estadisticas.get('egresados_contratados', 0))
         
         # Gráfico de distribución por estado
-        if estadisticas.get('estudiantes_por_estado'):
-            st.subheader("📈 Distribución de Estudiantes por Estado")
-            df_estados = pd.DataFrame(
-                list(estadisticas['estudiantes_por_estado'].items()),
-                columns=['Estado', 'Cantidad']
-            )
-            if not df_estados.empty:
-                st.bar_chart(df_estados.set_index('Estado'))
+        self._mostrar_graficos_panel(estadisticas)
         
         # Información del sistema
         with st.expander("ℹ️ Información del Sistema"):
-            st.write(f"**Base de datos:** {self.db_local_path}")
-            st.write(f"**Modo SSH:** {'Habilitado' if self.ssh_config.get('enabled', False) else 'Deshabilitado'}")
-            
-            if self.estado and self.estado.estado.get('ultima_sincronizacion'):
-                try:
-                    fecha_sync = datetime.fromisoformat(self.estado.estado['ultima_sincronizacion'])
-                    st.write(f"**Última sincronización:** {fecha_sync.strftime('%Y-%m-%d %H:%M:%S')}")
-                except:
-                    st.write(f"**Última sincronización:** {self.estado.estado['ultima_sincronizacion']}")
-            
+            # Un solo bloque markdown (saltos de línea '  \n') en lugar de un elemento por línea
+            lineas = [
+                f"**Base de datos:** {self.db_local_path}",
+                f"**Modo SSH:** {'Habilitado' if resumen['ssh_habilitado'] else 'Deshabilitado'}"
+            ]
+            if resumen['ultima_sincronizacion']:
+                lineas.append(f"**Última sincronización:** {resumen['ultima_sincronizacion']}")
             if self.estado:
-                st.write(f"**Backups realizados:** {self.estado.estado.get('backups_realizados', 0)}")
+                lineas.append(f"**Backups realizados:** {resumen['backups_realizados']}")
+            st.markdown("  \n".join(lineas))
+    
+    @st.fragment
+    def _mostrar_graficos_panel(self, estadisticas: dict):
+        """Gráficos del panel de control en un fragmento propio (se redibujan por separado)"""
+        if estadisticas.get('estudiantes_por_estado'):
+            st.subheader("📈 Distribución de Estudiantes por Estado")
+            st.vega_lite_chart(
+                grafico_barras(tuple(estadisticas['estudiantes_por_estado'].items()), 'Estado', 'Cantidad'),
+                use_container_width=True
+            )
+    
+    def _mostrar_secciones(self, clave: str, secciones: dict):
+        """Selector de secciones que ejecuta solo la sección activa
+        
+        A diferencia de st.tabs (que ejecuta el contenido de todas las pestañas en
+        cada rerun), solo la sección elegida hace sus consultas. La selección se
+        conserva en session_state bajo 'clave'.
+        """
+        nombres = list(secciones)
+        activa = st.segmented_control(
+            "Sección", nombres, default=nombres[0], key=clave, label_visibility="collapsed"
+        )
+        # Al deseleccionar el botón activo segmented_control devuelve None
+        secciones[activa or nombres[0]]()
     
     def mostrar_gestion_estudiantes(self):
         """Mostrar interfaz de gestión de estudiantes"""
         st.title("👨‍🎓 Gestión de Estudiantes")
         
-        # Pestañas para diferentes funciones
-        tab1, tab2, tab3, tab4 = st.tabs([
-            "📋 Lista de Estudiantes", 
-            "➕ Nuevo Estudiante", 
-            "🔍 Buscar Estudiante",
-            "📊 Estadísticas"
-        ])
-        
-        with tab1:
-            self._mostrar_lista_estudiantes()
-        
-        with tab2:
-            self._mostrar_formulario_nuevo_estudiante()
-        
-        with tab3:
-            self._mostrar_busqueda_estudiantes()
-        
-        with tab4:
-            self._mostrar_estadisticas_estudiantes()
+        # Secciones para diferentes funciones (solo se ejecuta la activa)
+        self._mostrar_secciones('seccion_estudiantes', {
+            "📋 Lista de Estudiantes": self._mostrar_lista_estudiantes,
+            "➕ Nuevo Estudiante": self._mostrar_formulario_nuevo_estudiante,
+            "🔍 Buscar Estudiante": self._mostrar_busqueda_estudiantes,
+            "📊 Estadísticas": self._mostrar_estadisticas_estudiantes
+        })
     
     def _mostrar_lista_estudiantes(self):
         """Mostrar lista de estudiantes con filtros"""
-        # Filtros
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            filtro_estado = st.selectbox(
-                "Filtrar por estado:",
-                ['Todos'] + ESTADOS_ESTUDIANTE,
-                key="filtro_estado_lista"
-            )
+        # Filtros dentro de un formulario: escribir en la búsqueda o cambiar un filtro
+        # no relanza la consulta; los valores solo se aplican al pulsar "Aplicar"
+        with st.form("filtros_lista_estudiantes_form", clear_on_submit=False):
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                filtro_estado = st.selectbox(
+                    "Filtrar por estado:",
+                    OPCIONES_FILTRO_ESTADO,
+                    key="filtro_estado_lista"
+                )
+            
+            with col2:
+                filtro_nivel = st.selectbox(
+                    "Filtrar por nivel:",
+                    OPCIONES_FILTRO_NIVEL,
+                    key="filtro_nivel_lista"
+                )
+            
+            with col3:
+                busqueda = st.text_input("Buscar (matrícula/nombre):", key="busqueda_estudiantes")
+            
+            st.form_submit_button("🔍 Aplicar")
         
-        with col2:
-            filtro_nivel = st.selectbox(
-                "Filtrar por nivel:",
-                ['Todos'] + NIVELES_ESTUDIO,
-                key="filtro_nivel_lista"
-            )
+        # Con 1-2 caracteres la búsqueda casi no filtra: se espera a tener al menos 3
+        if 0 < len(busqueda) < LONGITUD_MINIMA_BUSQUEDA:
+            st.caption(f"Escribe al menos {LONGITUD_MINIMA_BUSQUEDA} caracteres para buscar")
+            busqueda = ''
         
-        with col3:
-            busqueda = st.text_input("Buscar (matrícula/nombre):", key="busqueda_estudiantes")
+        # Paginación por cursor: pila con el cursor de inicio de cada página visitada;
+        # se reinicia cuando cambian los filtros
+        filtros = (filtro_estado, filtro_nivel, busqueda)
+        if st.session_state.get('filtros_lista_estudiantes') != filtros:
+            st.session_state['filtros_lista_estudiantes'] = filtros
+            st.session_state['paginas_lista_estudiantes'] = [None]
+        paginas = st.session_state['paginas_lista_estudiantes']
+        tamano_pagina = FILAS_POR_PAGINA_LISTA
         
         # Obtener estudiantes
         estudiantes = self.obtener_estudiantes(
             filtro_estado if filtro_estado != 'Todos' else None,
             busqueda if busqueda else None,
-            100  # Límite aumentado para la vista
+            tamano_pagina,
+            filtro_nivel=filtro_nivel if filtro_nivel != 'Todos' else None,
+            despues_de=paginas[-1]
         )
         
+        col_anterior, col_pagina, col_siguiente = st.columns([1, 2, 1])
+        with col_anterior:
+            if st.button("⬅️ Anterior", key="pagina_anterior_estudiantes", disabled=len(paginas) == 1):
+                paginas.pop()
+                st.rerun()
+        with col_pagina:
+            st.caption(f"Página {len(paginas)}")
+        with col_siguiente:
+            if st.button("Siguiente ➡️", key="pagina_siguiente_estudiantes",
+                         disabled=len(estudiantes) < tamano_pagina):
+                ultimo = estudiantes[-1]
+                paginas.append((ultimo['fecha_ingreso'], ultimo['id']))
+                st.rerun()
+        
         # Mostrar tabla
         if estudiantes:
-            # Convertir a lista de diccionarios
-            datos_estudiantes = []
-            for e in estudiantes:
-                datos_estudiantes.append(dict(e))
-            
-            df = pd.DataFrame(datos_estudiantes)
-            
-            # Seleccionar columnas para mostrar
-            columnas_mostrar = ['id', 'matricula', 'nombre', 'apellido_paterno', 
-                              'apellido_materno', 'carrera', 'semestre', 'estado_estudiante', 
-                              'promedio', 'fecha_ingreso']
+            df = pd.DataFrame(estudiantes)
             
-            # Filtrar columnas existentes
-            columnas_existentes = [col for col in columnas_mostrar if col in df.columns]
-            
-            if columnas_existentes:
-                st.dataframe(df[columnas_existentes], use_container_width=True)
+            # Columnas fijas: la consulta proyecta siempre COLUMNAS_LISTA_ESTUDIANTES
+            st.dataframe(df[list(COLUMNAS_TABLA_ESTUDIANTES)], use_container_width=True,
+                         hide_index=True, height=ALTURA_TABLA_ESTUDIANTES)
             
             # Opciones para cada estudiante
             st.subheader("Acciones")
             if estudiantes:
-                estudiante_seleccionado = st.selectbox(
-                    "Seleccionar estudiante:",
-                    [f"{e['id']} - {e['matricula']} - {e['nombre']} {e['apellido_paterno']}" 
-                     for e in estudiantes],
-                    key="seleccionar_estudiante"
+                estudiante_id = self._seleccionar_registro(
+                    "Seleccionar estudiante:", 'etiquetas_lista_estudiantes', df,
+                    "seleccionar_estudiante", (filtros, paginas[-1])
                 )
                 
-                if estudiante_seleccionado:
-                    estudiante_id = int(estudiante_seleccionado.split(' - ')[0])
+                if estudiante_id:
                     
                     col1, col2, col3 = st.columns(3)
                     
@@ -1651,7 +2329,7 @@ class SistemaGestionEscolar:
                 apellido_paterno = st.text_input("Apellido Paterno *", max_chars=100, key="apellido_paterno_nuevo")
                 apellido_materno = st.text_input("Apellido Materno", max_chars=100, key="apellido_materno_nuevo")
                 fecha_nacimiento = st.date_input("Fecha de Nacimiento", key="fecha_nacimiento_nuevo")
-                genero = st.selectbox("Género", ['M', 'F', 'Otro'], key="genero_nuevo")
+                genero = st.selectbox("Género", GENEROS, key="genero_nuevo")
                 curp = st.text_input("CURP", max_chars=18, key="curp_nuevo")
                 rfc = st.text_input("RFC", max_chars=13, key="rfc_nuevo")
             
@@ -1737,24 +2415,17 @@ class SistemaGestionEscolar:
         with col2:
             valor = st.text_input("Valor a buscar:", key="valor_busqueda")
         
+        contiene = st.checkbox("Buscar en cualquier parte del texto (más lento)", key="busqueda_contiene")
+        
         if valor:
-            resultados = self.buscar_estudiante(criterio, valor)
+            resultados = self.buscar_estudiante(criterio, valor, contiene)
             
             if resultados:
                 st.success(f"✅ Encontrados {len(resultados)} estudiantes")
                 
-                # Convertir a lista de diccionarios
-                datos_resultados = []
-                for r in resultados:
-                    datos_resultados.append(dict(r))
-                
-                df = pd.DataFrame(datos_resultados)
-                columnas_mostrar = ['id', 'matricula', 'nombre', 'apellido_paterno', 
-                                  'apellido_materno', 'carrera', 'estado_estudiante']
-                
-                columnas_existentes = [col for col in columnas_mostrar if col in df.columns]
-                if columnas_existentes:
-                    st.dataframe(df[columnas_existentes], use_container_width=True)
+                # sqlite3.Row es una secuencia: construir el DataFrame sin dicts intermedios
+                df = pd.DataFrame.from_records(resultados, columns=resultados[0].keys())
+                st.dataframe(df[list(COLUMNAS_TABLA_BUSQUEDA)], use_container_width=True)
             else:
                 st.info("📭 No se encontraron estudiantes con esos criterios")
     
@@ -1767,12 +2438,10 @@ class SistemaGestionEscolar:
         # Distribución por nivel de estudio
         if estadisticas.get('estudiantes_por_nivel'):
             st.write("### 📚 Distribución por Nivel de Estudio")
-            df_niveles = pd.DataFrame(
-                list(estadisticas['estudiantes_por_nivel'].items()),
-                columns=['Nivel', 'Cantidad']
+            st.vega_lite_chart(
+                grafico_barras(tuple(estadisticas['estudiantes_por_nivel'].items()), 'Nivel', 'Cantidad'),
+                use_container_width=True
             )
-            if not df_niveles.empty:
-                st.bar_chart(df_niveles.set_index('Nivel'))
         
         # Top carreras
         if estadisticas.get('top_carreras'):
@@ -1789,32 +2458,46 @@ class SistemaGestionEscolar:
         col1, col2 = st.columns(2)
         
         with col1:
-            if st.button("📊 Generar Informe Excel (Estudiantes)", key="informe_estudiantes"):
-                try:
-                    output, nombre = self.generar_informe_excel('estudiantes')
-                    st.download_button(
-                        label="⬇️ Descargar Informe",
-                        data=output,
-                        file_name=nombre,
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                        key="descargar_estudiantes"
-                    )
-                except Exception as e:
-                    st.error(f"❌ Error generando informe: {e}")
+            self._mostrar_exportacion_excel('estudiantes', "📊 Generar Informe Excel (Estudiantes)")
         
         with col2:
-            if st.button("📊 Generar Informe Excel (Egresados)", key="informe_egresados"):
-                try:
-                    output, nombre = self.generar_informe_excel('egresados')
-                    st.download_button(
-                        label="⬇️ Descargar Informe",
-                        data=output,
-                        file_name=nombre,
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                        key="descargar_egresados"
-                    )
-                except Exception as e:
-                    st.error(f"❌ Error generando informe: {e}")
+            self._mostrar_exportacion_excel('egresados', "📊 Generar Informe Excel (Egresados)")
+    
+    def _mostrar_exportacion_excel(self, tipo_informe: str, etiqueta: str):
+        """Botón de generación + descarga de un informe Excel
+        
+        El informe solo se genera tras pulsar el botón y se cachea por versión de
+        datos; el botón de descarga no provoca un rerun (on_click="ignore").
+        """
+        clave_listo = f"informe_{tipo_informe}_solicitado"
+        if st.button(etiqueta, key=f"informe_{tipo_informe}"):
+            st.session_state[clave_listo] = True
+        
+        if not st.session_state.get(clave_listo):
+            return
+        
+        try:
+            contenido, nombre = self._informe_excel_en_cache(
+                tipo_informe, self.version_datos
+            )
+            st.download_button(
+                label="⬇️ Descargar Informe",
+                data=contenido,
+                file_name=nombre,
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                key=f"descargar_{tipo_informe}",
+                on_click="ignore"
+            )
+        except Exception as e:
+            st.error(f"❌ Error generando informe: {e}")
+    
+    @st.cache_data(ttl=300, max_entries=6, show_spinner="Generando informe...")
+    def _informe_excel_en_cache(_self, tipo_informe: str, version_datos: int):
+        """Bytes del informe Excel cacheados por tipo y versión de datos (los errores no se cachean)"""
+        output, nombre = _self.generar_informe_excel(tipo_informe)
+        if nombre.startswith('error_informe_'):
+            raise RuntimeError(f"No se pudo generar el informe de {tipo_informe}")
+        return output.getvalue(), nombre
     
     def mostrar_gestion_inscripciones(self):
         """Mostrar interfaz de gestión de inscripciones"""
@@ -1824,21 +2507,12 @@ class SistemaGestionEscolar:
         ciclo_actual = self.obtener_proximo_ciclo_escolar()
         st.info(f"🏫 Ciclo escolar actual: **{ciclo_actual}**")
         
-        # Pestañas
-        tab1, tab2, tab3 = st.tabs([
-            "📋 Inscripciones Actuales",
-            "➕ Nueva Inscripción",
-            "📊 Estadísticas por Ciclo"
-        ])
-        
-        with tab1:
-            self._mostrar_inscripciones_actuales(ciclo_actual)
-        
-        with tab2:
-            self._mostrar_nueva_inscripcion(ciclo_actual)
-        
-        with tab3:
-            self._mostrar_estadisticas_inscripciones()
+        # Secciones (solo se ejecuta la activa)
+        self._mostrar_secciones('seccion_inscripciones', {
+            "📋 Inscripciones Actuales": lambda: self._mostrar_inscripciones_actuales(ciclo_actual),
+            "➕ Nueva Inscripción": lambda: self._mostrar_nueva_inscripcion(ciclo_actual),
+            "📊 Estadísticas por Ciclo": self._mostrar_estadisticas_inscripciones
+        })
     
     def _mostrar_inscripciones_actuales(self, ciclo_actual: str):
         """Mostrar inscripciones del ciclo actual"""
@@ -1847,21 +2521,19 @@ class SistemaGestionEscolar:
         if inscripciones:
             st.subheader(f"Inscripciones del ciclo {ciclo_actual}")
             
-            # Crear DataFrame
-            datos = []
-            for ins in inscripciones:
-                datos.append({
-                    'ID': ins['id'],
-                    'Matrícula': ins['matricula'],
-                    'Estudiante': f"{ins['nombre']} {ins['apellido_paterno']} {ins.get('apellido_materno', '')}",
-                    'Semestre': ins['semestre'],
-                    'Créditos': ins['creditos_inscritos'],
-                    'Promedio': ins['promedio_ciclo'],
-                    'Estatus': ins['estatus'],
-                    'Fecha': ins['fecha_inscripcion'][:10] if ins['fecha_inscripcion'] else ''
-                })
-            
-            df = pd.DataFrame(datos)
+            # Crear DataFrame directamente de las filas y derivar columnas vectorizadas
+            registros = self._filas_a_dataframe(inscripciones)
+            df = pd.DataFrame({
+                'ID': registros['id'],
+                'Matrícula': registros['matricula'],
+                'Estudiante': registros['nombre'] + ' ' + registros['apellido_paterno'] + ' '
+                              + registros['apellido_materno'].fillna(''),
+                'Semestre': registros['semestre'],
+                'Créditos': registros['creditos_inscritos'],
+                'Promedio': registros['promedio_ciclo'],
+                'Estatus': registros['estatus'],
+                'Fecha': registros['fecha_inscripcion'].fillna('').str[:10]
+            })
             st.dataframe(df, use_container_width=True)
             
             # Opciones para actualizar promedio
@@ -1900,15 +2572,16 @@ class SistemaGestionEscolar:
                 st.session_state['nueva_inscripcion'] = True
                 st.rerun()
     
+    @st.fragment
     def _mostrar_nueva_inscripcion(self, ciclo_actual: str):
-        """Mostrar formulario para nueva inscripción"""
+        """Mostrar formulario para nueva inscripción (fragmento: sus widgets no relanzan la página)"""
         st.subheader("Nueva Inscripción")
         
         # Listar estudiantes activos no inscritos en este ciclo
         estudiantes_activos = self.obtener_estudiantes('Activo', None, 1000)
         
         # Filtrar estudiantes ya inscritos en este ciclo
-        inscripciones_actuales = self.obtener_inscripciones(ciclo_escolar=ciclo_actual)
+        inscripciones_actuales = self.obtener_inscripciones(ciclo_escolar=ciclo_actual, incluir_estudiante=False)
         ids_inscritos = {ins['estudiante_id'] for ins in inscripciones_actuales}
         
         estudiantes_disponibles = [
@@ -1921,19 +2594,12 @@ class SistemaGestionEscolar:
             return
         
         # Formulario
-        estudiante_opciones = {
-            f"{est['id']} - {est['matricula']} - {est['nombre']} {est['apellido_paterno']}": est['id']
-            for est in estudiantes_disponibles
-        }
-        
-        estudiante_seleccionado = st.selectbox(
-            "Seleccionar estudiante:",
-            list(estudiante_opciones.keys()),
-            key="seleccionar_estudiante_inscripcion"
+        estudiante_id = self._seleccionar_registro(
+            "Seleccionar estudiante:", 'etiquetas_inscripcion', estudiantes_disponibles,
+            "seleccionar_estudiante_inscripcion", ciclo_actual
         )
         
-        if estudiante_seleccionado:
-            estudiante_id = estudiante_opciones[estudiante_seleccionado]
+        if estudiante_id:
             
             # Obtener información del estudiante
             estudiante = self.obtener_estudiante_por_id(estudiante_id)
@@ -1942,18 +2608,18 @@ class SistemaGestionEscolar:
                 st.write(f"**Información del estudiante:**")
                 col1, col2 = st.columns(2)
                 with col1:
-                    st.write(f"📚 Carrera: {estudiante.get('carrera', 'No especificada')}")
-                    st.write(f"🎓 Nivel: {estudiante.get('nivel_estudio', 'No especificado')}")
+                    st.markdown(f"📚 Carrera: {estudiante['carrera'] or 'No especificada'}  \n"
+                                f"🎓 Nivel: {estudiante['nivel_estudio'] or 'No especificado'}")
                 with col2:
-                    st.write(f"📅 Semestre actual: {estudiante.get('semestre', 'No especificado')}")
-                    st.write(f"⭐ Promedio: {estudiante.get('promedio', 'No registrado')}")
+                    st.markdown(f"📅 Semestre actual: {estudiante['semestre'] or 'No especificado'}  \n"
+                                f"⭐ Promedio: {estudiante['promedio'] or 'No registrado'}")
                 
                 # Datos de la inscripción
                 semestre_inscripcion = st.number_input(
                     "Semestre a inscribir:", 
                     min_value=1, 
                     max_value=20, 
-                    value=estudiante.get('semestre', 1),
+                    value=estudiante['semestre'] or 1,
                     key="semestre_inscripcion"
                 )
                 
@@ -1993,7 +2659,11 @@ class SistemaGestionEscolar:
             
             if not df_ciclos.empty:
                 st.dataframe(df_ciclos, use_container_width=True)
-                st.bar_chart(df_ciclos.set_index('Ciclo Escolar'))
+                st.vega_lite_chart(
+                    grafico_barras(tuple(estadisticas['inscripciones_por_ciclo'].items()),
+                                   'Ciclo Escolar', 'Inscripciones'),
+                    use_container_width=True
+                )
         else:
             st.info("📭 No hay datos de inscripciones para mostrar")
     
@@ -2001,20 +2671,11 @@ class SistemaGestionEscolar:
         """Mostrar interfaz de gestión de egresados"""
         st.title("🎓 Gestión de Egresados")
         
-        tab1, tab2, tab3 = st.tabs([
-            "📋 Lista de Egresados",
-            "➕ Registrar Egresado",
-            "💼 Contrataciones"
-        ])
-        
-        with tab1:
-            self._mostrar_lista_egresados()
-        
-        with tab2:
-            self._mostrar_registro_egresado()
-        
-        with tab3:
-            self._mostrar_gestion_contrataciones()
+        self._mostrar_secciones('seccion_egresados', {
+            "📋 Lista de Egresados": self._mostrar_lista_egresados,
+            "➕ Registrar Egresado": self._mostrar_registro_egresado,
+            "💼 Contrataciones": self._mostrar_gestion_contrataciones
+        })
     
     def _mostrar_lista_egresados(self):
         """Mostrar lista de egresados"""
@@ -2034,21 +2695,18 @@ class SistemaGestionEscolar:
         )
         
         if egresados:
-            # Preparar datos para mostrar
-            datos = []
-            for eg in egresados:
-                datos.append({
-                    'ID': eg['id'],
-                    'Matrícula': eg['matricula'],
-                    'Egresado': f"{eg['nombre']} {eg['apellido_paterno']}",
-                    'Carrera': eg['carrera'],
-                    'Título': eg['titulo_obtenido'],
-                    'Promedio': eg['promedio_final'],
-                    'Fecha Egreso': eg['fecha_egreso'][:10] if eg['fecha_egreso'] else '',
-                    'Cédula': eg['numero_cedula']
-                })
-            
-            df = pd.DataFrame(datos)
+            # Preparar datos para mostrar (columnas vectorizadas sobre las filas)
+            registros = self._filas_a_dataframe(egresados)
+            df = pd.DataFrame({
+                'ID': registros['id'],
+                'Matrícula': registros['matricula'],
+                'Egresado': registros['nombre'] + ' ' + registros['apellido_paterno'],
+                'Carrera': registros['carrera'],
+                'Título': registros['titulo_obtenido'],
+                'Promedio': registros['promedio_final'],
+                'Fecha Egreso': registros['fecha_egreso'].fillna('').str[:10],
+                'Cédula': registros['numero_cedula']
+            })
             st.dataframe(df, use_container_width=True)
             
             # Estadísticas de egresados
@@ -2078,8 +2736,9 @@ class SistemaGestionEscolar:
                 st.session_state['registrar_egresado'] = True
                 st.rerun()
     
+    @st.fragment
     def _mostrar_registro_egresado(self):
-        """Mostrar formulario para registrar egresado"""
+        """Mostrar formulario para registrar egresado (fragmento: sus widgets no relanzan la página)"""
         st.subheader("Registrar Nuevo Egresado")
         
         # Listar estudiantes activos no egresados
@@ -2089,27 +2748,20 @@ class SistemaGestionEscolar:
             st.warning("⚠️ No hay estudiantes activos disponibles")
             return
         
-        estudiante_opciones = {
-            f"{est['id']} - {est['matricula']} - {est['nombre']} {est['apellido_paterno']}": est['id']
-            for est in estudiantes_activos
-        }
-        
-        estudiante_seleccionado = st.selectbox(
-            "Seleccionar estudiante:",
-            list(estudiante_opciones.keys()),
-            key="seleccionar_estudiante_egresado"
+        estudiante_id = self._seleccionar_registro(
+            "Seleccionar estudiante:", 'etiquetas_registro_egresado', estudiantes_activos,
+            "seleccionar_estudiante_egresado"
         )
         
-        if estudiante_seleccionado:
-            estudiante_id = estudiante_opciones[estudiante_seleccionado]
+        if estudiante_id:
             
             # Obtener información del estudiante
             estudiante = self.obtener_estudiante_por_id(estudiante_id)
             
             if estudiante:
-                st.write(f"**Información del estudiante:**")
-                st.write(f"📚 Carrera: {estudiante.get('carrera', 'No especificada')}")
-                st.write(f"⭐ Promedio actual: {estudiante.get('promedio', 'No registrado')}")
+                st.markdown(f"**Información del estudiante:**  \n"
+                            f"📚 Carrera: {estudiante['carrera'] or 'No especificada'}  \n"
+                            f"⭐ Promedio actual: {estudiante['promedio'] or 'No registrado'}")
                 
                 # Formulario de egreso
                 fecha_egreso = st.date_input("Fecha de Egreso *", value=datetime.now(), key="fecha_egreso")
@@ -2118,7 +2770,7 @@ class SistemaGestionEscolar:
                     "Promedio Final *", 
                     min_value=0.0, 
                     max_value=10.0, 
-                    value=float(estudiante.get('promedio', 0.0) or 0.0),
+                    value=float(estudiante['promedio'] or 0.0),
                     step=0.1,
                     key="promedio_final"
                 )
@@ -2159,23 +2811,22 @@ class SistemaGestionEscolar:
             contratados = self.obtener_contratados()
             
             if contratados:
-                # Preparar datos
-                datos = []
-                for cont in contratados:
-                    datos.append({
-                        'ID': cont['id'],
-                        'Matrícula': cont['matricula'],
-                        'Egresado': f"{cont['nombre']} {cont['apellido_paterno']}",
-                        'Carrera': cont['carrera'],
-                        'Empresa': cont['empresa'],
-                        'Puesto': cont['puesto'],
-                        'Salario': f"${cont['salario_actual'] or cont['salario_inicial']:,.2f}" 
-                                   if cont['salario_actual'] or cont['salario_inicial'] else 'No especificado',
-                        'Fecha Contratación': cont['fecha_contratacion'][:10] 
-                                             if cont['fecha_contratacion'] else ''
-                    })
-                
-                df = pd.DataFrame(datos)
+                # Preparar datos (columnas vectorizadas sobre las filas)
+                registros = self._filas_a_dataframe(contratados)
+                salario = registros['salario_actual'].where(
+                    registros['salario_actual'].fillna(0) != 0, registros['salario_inicial']
+                )
+                df = pd.DataFrame({
+                    'ID': registros['id'],
+                    'Matrícula': registros['matricula'],
+                    'Egresado': registros['nombre'] + ' ' + registros['apellido_paterno'],
+                    'Carrera': registros['carrera'],
+                    'Empresa': registros['empresa'],
+                    'Puesto': registros['puesto'],
+                    'Salario': salario.map(lambda valor: f"${valor:,.2f}" if pd.notna(valor) and valor
+                                           else 'No especificado'),
+                    'Fecha Contratación': registros['fecha_contratacion'].fillna('').str[:10]
+                })
                 st.dataframe(df, use_container_width=True)
                 
                 # Estadísticas
@@ -2187,7 +2838,7 @@ class SistemaGestionEscolar:
                     st.metric("Empresas", empresas_unicas)
                 
                 with col2:
-                    egresados_totales = len(self.obtener_egresados())
+                    egresados_totales = self.contar_egresados()
                     if egresados_totales > 0:
                         tasa_contratacion = (len(contratados) / egresados_totales) * 100
                         st.metric("Tasa de Contratación", f"{tasa_contratacion:.1f}%")
@@ -2203,27 +2854,20 @@ class SistemaGestionEscolar:
             if not egresados:
                 st.warning("⚠️ No hay egresados registrados")
             else:
-                egresado_opciones = {
-                    f"{eg['id']} - {eg['matricula']} - {eg['nombre']} {eg['apellido_paterno']}": eg['id']
-                    for eg in egresados
-                }
-                
-                egresado_seleccionado = st.selectbox(
-                    "Seleccionar egresado:",
-                    list(egresado_opciones.keys()),
-                    key="seleccionar_egresado_contratacion"
+                egresado_id = self._seleccionar_registro(
+                    "Seleccionar egresado:", 'etiquetas_contratacion', egresados,
+                    "seleccionar_egresado_contratacion"
                 )
                 
-                if egresado_seleccionado:
-                    egresado_id = egresado_opciones[egresado_seleccionado]
+                if egresado_id:
                     
                     # Información del egresado
                     egresado_info = next((eg for eg in egresados if eg['id'] == egresado_id), None)
                     
                     if egresado_info:
-                        st.write(f"**Información del egresado:**")
-                        st.write(f"🎓 Título: {egresado_info['titulo_obtenido']}")
-                        st.write(f"⭐ Promedio: {egresado_info['promedio_final']}")
+                        st.markdown(f"**Información del egresado:**  \n"
+                                    f"🎓 Título: {egresado_info['titulo_obtenido']}  \n"
+                                    f"⭐ Promedio: {egresado_info['promedio_final']}")
                         
                         # Formulario de contratación
                         empresa = st.text_input("Empresa *", max_chars=200, key="empresa_contratacion")
@@ -2259,24 +2903,12 @@ class SistemaGestionEscolar:
         """Mostrar configuración del sistema"""
         st.title("⚙️ Configuración del Sistema")
         
-        tab1, tab2, tab3, tab4 = st.tabs([
-            "📊 Estado del Sistema",
-            "🔄 Sincronización",
-            "💾 Backup",
-            "🔧 Configuración"
-        ])
-        
-        with tab1:
-            self._mostrar_estado_sistema()
-        
-        with tab2:
-            self._mostrar_sincronizacion()
-        
-        with tab3:
-            self._mostrar_backup()
-        
-        with tab4:
-            self._mostrar_configuracion()
+        self._mostrar_secciones('seccion_configuracion', {
+            "📊 Estado del Sistema": self._mostrar_estado_sistema,
+            "🔄 Sincronización": self._mostrar_sincronizacion,
+            "💾 Backup": self._mostrar_backup,
+            "🔧 Configuración": self._mostrar_configuracion
+        })
     
     def _mostrar_estado_sistema(self):
         """Mostrar estado actual del sistema"""
@@ -2284,37 +2916,33 @@ class SistemaGestionEscolar:
         
         # Información de conexión SSH
         st.write("### 🔗 Estado de Conexión SSH")
+        resumen = self.obtener_resumen_estado()
         col1, col2 = st.columns(2)
         
         with col1:
-            if self.ssh_config.get('enabled', False):
-                if self.estado and self.estado.estado.get('ssh_conectado'):
+            if resumen['ssh_habilitado']:
+                if resumen['ssh_conectado']:
                     st.success("✅ Conectado al servidor remoto")
-                    st.write(f"**Servidor:** {self.ssh_config.get('host', 'Desconocido')}")
-                    st.write(f"**Usuario:** {self.ssh_config.get('username', 'Desconocido')}")
+                    st.markdown(f"**Servidor:** {self.ssh_config.get('host', 'Desconocido')}  \n"
+                                f"**Usuario:** {self.ssh_config.get('username', 'Desconocido')}")
                 else:
                     st.error("❌ Desconectado del servidor remoto")
-                    if self.estado and self.estado.estado.get('ssh_error'):
-                        st.error(f"**Error:** {self.estado.estado['ssh_error']}")
+                    if resumen['ssh_error']:
+                        st.error(f"**Error:** {resumen['ssh_error']}")
             else:
                 st.info("🔌 SSH deshabilitado en configuración")
         
         with col2:
-            if self.estado and self.estado.estado.get('ultima_sincronizacion'):
-                try:
-                    fecha_sync = datetime.fromisoformat(self.estado.estado['ultima_sincronizacion'])
-                    st.write(f"**Última sincronización:** {fecha_sync.strftime('%Y-%m-%d %H:%M:%S')}")
-                except:
-                    st.write(f"**Última sincronización:** {self.estado.estado['ultima_sincronizacion']}")
+            lineas = []
+            if resumen['ultima_sincronizacion']:
+                lineas.append(f"**Última sincronización:** {resumen['ultima_sincronizacion']}")
             else:
                 st.warning("⚠️ Nunca sincronizado")
             
-            if self.estado and self.estado.estado.get('ultima_verificacion'):
-                try:
-                    fecha_ver = datetime.fromisoformat(self.estado.estado['ultima_verificacion'])
-                    st.write(f"**Última verificación:** {fecha_ver.strftime('%Y-%m-%d %H:%M:%S')}")
-                except:
-                    st.write(f"**Última verificación:** {self.estado.estado['ultima_verificacion']}")
+            if resumen['ultima_verificacion']:
+                lineas.append(f"**Última verificación:** {resumen['ultima_verificacion']}")
+            if lineas:
+                st.markdown("  \n".join(lineas))
         
         # Estadísticas de la base de datos
         st.write("### 🗄️ Estadísticas de Base de Datos")
@@ -2323,17 +2951,26 @@ class SistemaGestionEscolar:
             if not self.conexion_local:
                 st.error("❌ No hay conexión a base de datos")
             else:
-                cursor = self.conexion_local.cursor()
+                cursor = self._cursor_tuplas()
                 
-                # Contar registros por tabla
+                # Contar registros de todas las tablas existentes en una sola consulta
                 tablas = ['estudiantes', 'inscritos', 'egresados', 'contratados', 'usuarios']
-                for tabla in tablas:
-                    try:
-                        cursor.execute(f"SELECT COUNT(*) FROM {tabla}")
-                        count = cursor.fetchone()[0]
-                        st.write(f"**{tabla.capitalize()}:** {count} registros")
-                    except:
-                        st.write(f"**{tabla.capitalize()}:** Tabla no existe")
+                cursor.execute(
+                    f"SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ({', '.join('?' * len(tablas))})",
+                    tablas
+                )
+                existentes = [tabla for tabla in tablas if tabla in {fila[0] for fila in cursor.fetchall()}]
+                
+                conteos = {}
+                if existentes:
+                    cursor.execute("SELECT " + ", ".join(f"(SELECT COUNT(*) FROM {tabla})" for tabla in existentes))
+                    conteos = dict(zip(existentes, cursor.fetchone()))
+                
+                st.markdown("  \n".join(
+                    f"**{tabla.capitalize()}:** {conteos[tabla]} registros" if tabla in conteos
+                    else f"**{tabla.capitalize()}:** Tabla no existe"
+                    for tabla in tablas
+                ))
             
         except Exception as e:
             st.error(f"❌ Error obteniendo estadísticas: {e}")
@@ -2349,7 +2986,7 @@ class SistemaGestionEscolar:
             with col2:
                 st.metric("Migraciones Fallidas", estadisticas_mig.get('fallidas', 0))
             with col3:
-                st.metric("Backups Realizados", self.estado.estado.get('backups_realizados', 0))
+                st.metric("Backups Realizados", resumen['backups_realizados'])
     
     def _mostrar_sincronizacion(self):
         """Mostrar opciones de sincronización"""
@@ -2368,18 +3005,16 @@ class SistemaGestionEscolar:
                 with st.spinner("🔄 Sincronizando..."):
                     if self.sincronizar_con_servidor():
                         st.success("✅ Sincronización completada")
-                        time.sleep(2)
-                        st.rerun()
                     else:
                         st.error("❌ Error en sincronización")
         
         with col2:
             if st.button("🔼 Subir Cambios al Servidor", key="subir_cambios"):
-                with st.spinner("🔼 Subiendo cambios..."):
-                    if self.subir_cambios_al_servidor():
-                        st.success("✅ Cambios subidos exitosamente")
-                    else:
-                        st.error("❌ Error subiendo cambios")
+                try:
+                    self.subir_cambios_async()
+                except Exception as e:
+                    st.error(f"❌ Error subiendo cambios: {e}")
+            self._mostrar_estado_subida()
         
         # Información de conexión
         st.write("### 🔗 Configuración de Conexión")
@@ -2396,6 +3031,38 @@ class SistemaGestionEscolar:
         else:
             st.info("SSH deshabilitado en configuración")
     
+    def _mostrar_estado_subida(self):
+        """Resultado de la última subida en segundo plano
+        
+        Solo mientras hay una subida en curso se muestra el fragmento que se
+        refresca periódicamente; sin subida activa no hay sondeo.
+        """
+        estado_subida = self.obtener_estado_subida()
+        if not estado_subida:
+            return
+        
+        if estado_subida['en_curso']:
+            self._fragmento_progreso_subida()
+        elif estado_subida['exitosa']:
+            st.success("✅ Cambios subidos exitosamente")
+        else:
+            st.error("❌ Error subiendo cambios")
+    
+    @st.fragment(run_every=2)
+    def _fragmento_progreso_subida(self):
+        """Progreso de la subida en curso (se refresca solo este fragmento)
+        
+        Al terminar la subida se vuelve a ejecutar la app completa, que muestra el
+        resultado y deja de incluir este fragmento.
+        """
+        estado_subida = self.obtener_estado_subida()
+        if not estado_subida or not estado_subida['en_curso']:
+            st.rerun(scope="app")
+        
+        total = estado_subida['total']
+        avance = estado_subida['transferidos'] / total if total else 0.0
+        st.progress(avance, text="🔼 Subiendo cambios...")
+    
     def _mostrar_backup(self):
         """Mostrar opciones de backup"""
         st.subheader("💾 Sistema de Backup")
@@ -2464,7 +3131,7 @@ class SistemaGestionEscolar:
                     "Máximo de backups a mantener:",
                     min_value=1,
                     max_value=50,
-                    value=self.config.get('backup', {}).get('max_backups', 10),
+                    value=self.backup_config.get('max_backups', 10),
                     key="max_backups"
                 )
                 
@@ -2472,20 +3139,20 @@ class SistemaGestionEscolar:
                     "Espacio mínimo requerido (MB):",
                     min_value=10,
                     max_value=1000,
-                    value=self.config.get('backup', {}).get('min_disk_space_mb', 100),
+                    value=self.backup_config.get('min_disk_space_mb', 100),
                     key="min_space"
                 )
             
             with col2:
                 backup_enabled = st.checkbox(
                     "Habilitar sistema de backup",
-                    value=self.config.get('backup', {}).get('enabled', True),
+                    value=self.backup_config.get('enabled', True),
                     key="backup_enabled"
                 )
                 
                 auto_backup = st.checkbox(
                     "Backup automático antes de operaciones críticas",
-                    value=self.config.get('backup', {}).get('auto_backup_before_migration', True),
+                    value=self.backup_config.get('auto_backup_before_migration', True),
                     key="auto_backup"
                 )
         
@@ -2513,6 +3180,61 @@ class SistemaGestionEscolar:
 # FUNCIÓN PRINCIPAL DE LA APLICACIÓN - CORREGIDA
 # =============================================================================
 
+@st.cache_resource(show_spinner=False)
+def obtener_sistema():
+    """Sistema compartido por todas las sesiones del proceso
+    
+    La inicialización (base de datos, sincronización inicial con el servidor) se
+    hace una sola vez en lugar de en cada rerun o pestaña nueva.
+    """
+    return SistemaGestionEscolar()
+
+@st.fragment
+def _fragmento_estado_lateral(sistema):
+    """Estado del sistema y acciones rápidas de la barra lateral
+    
+    Al ser un fragmento, interactuar con estos botones solo re-ejecuta este bloque.
+    """
+    # Estado del sistema
+    st.subheader("⚡ Estado del Sistema")
+    resumen = sistema.obtener_resumen_estado()
+
+    if resumen['inicializada']:
+        st.success("✅ Sistema OK")
+    else:
+        st.error("❌ Sistema no inicializado")
+
+    if resumen['ssh_habilitado']:
+        if resumen['ssh_conectado']:
+            st.success("🔗 Conectado")
+        else:
+            st.error("❌ Desconectado")
+
+    st.divider()
+
+    # Acciones rápidas
+    st.subheader("🚀 Acciones Rápidas")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("🔄 Sincronizar", use_container_width=True):
+            with st.spinner("Sincronizando..."):
+                # Sin rerun: la sincronización ya invalida los cachés por versión de
+                # datos y el resto de la página se actualiza en la siguiente interacción
+                if sistema.sincronizar_con_servidor():
+                    st.success("✅ Sincronizado")
+                else:
+                    st.error("❌ Error")
+
+    with col2:
+        if st.button("💾 Backup", use_container_width=True):
+            with st.spinner("Creando backup..."):
+                if sistema.crear_backup():
+                    st.success("✅ Backup creado")
+                else:
+                    st.warning("⚠️ Error backup")
+
+
 def main():
     """Función principal de la aplicación"""
 
@@ -2524,10 +3246,13 @@ def main():
         initial_sidebar_state="expanded"
     )
 
+    # Contador de ejecuciones: clave de los valores memoizados por ejecución
+    st.session_state['num_ejecucion'] = st.session_state.get('num_ejecucion', 0) + 1
+
     # Inicializar sistema
     try:
-        sistema = SistemaGestionEscolar()
-        logger.info("✅ Sistema inicializado para interfaz web")
+        sistema = obtener_sistema()
+        logger.debug("✅ Sistema disponible para interfaz web")
     except Exception as e:
         logger.error(f"❌ Error crítico inicializando sistema: {e}")
         st.error(f"❌ Error crítico: {e}")
@@ -2555,44 +3280,8 @@ def main():
 
         st.divider()
 
-        # Estado del sistema
-        st.subheader("⚡ Estado del Sistema")
-
-        if sistema.estado and sistema.estado.esta_inicializada():
-            st.success("✅ Sistema OK")
-        else:
-            st.error("❌ Sistema no inicializado")
-
-        if sistema.ssh_config.get('enabled', False):
-            if sistema.estado and sistema.estado.estado.get('ssh_conectado'):
-                st.success("🔗 Conectado")
-            else:
-                st.error("❌ Desconectado")
-
-        st.divider()
-
-        # Acciones rápidas
-        st.subheader("🚀 Acciones Rápidas")
-
-        col1, col2 = st.columns(2)
-        with col1:
-            if st.button("🔄 Sincronizar", use_container_width=True):
-                with st.spinner("Sincronizando..."):
-                    if sistema.sincronizar_con_servidor():
-                        st.success("✅ Sincronizado")
-                    else:
-                        st.error("❌ Error")
-                    time.sleep(1)
-                    st.rerun()
-
-        with col2:
-            if st.button("💾 Backup", use_container_width=True):
-                with st.spinner("Creando backup..."):
-                    if sistema.crear_backup():
-                        st.success("✅ Backup creado")
-                    else:
-                        st.warning("⚠️ Error backup")
-                    time.sleep(1)
+        # Estado y acciones rápidas: fragmento propio, sus botones no re-ejecutan la página
+        _fragmento_estado_lateral(sistema)
 
         st.divider()
 
@@ -5,19 +5,18 @@ Sistema REMOTO exclusivo para administradores - Operaciones de migración masiva
 """
 
 import streamlit as st
-import pandas as pd
-import numpy as np
 import sqlite3
 import os
-import sys
+import re
 import json
 import time
+import shutil
+import threading
 from datetime import datetime, timedelta
-import io
-import hashlib
 from pathlib import Path
-import warnings
-warnings.filterwarnings('ignore')
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import gc
 
 # Importar módulos compartidos
 try:
@@ -39,18 +38,44 @@ except ImportError as e:
 # Obtener configuración para el sistema migración
 config = CargadorConfiguracion.obtener_config_sistema('migration')
 
-# Configurar logging
+# Configurar logging (INFO por defecto: los mensajes DEBUG de los bucles de
+# migración se descartan sin formatearse; 'log_level': 'DEBUG' los recupera)
 logger = SistemaLogging.obtener_logger(
     'migration', 
-    config.get('log_file', 'migracion_detallado.log')
+    config.get('log_file', 'migracion_detallado.log'),
+    config.get('log_level', 'INFO')
 )
 
 # Crear instancia de estado persistente
 estado_archivo = config.get('estado_file', 'estado_migracion.json')
 estado = EstadoPersistenteBase(estado_archivo, 'migration')
 
+@st.cache_resource(show_spinner=False)
+def obtener_gestor_ssh():
+    """Gestor SSH compartido entre reruns y sesiones
+    
+    cache_resource lo conserva sin copiarlo ni serializarlo: el cliente paramiko
+    (con keepalive) sobrevive a los reruns en lugar de reconectar en cada uno.
+    """
+    return GestorSSHCompartido()
+
 # Instancia global del gestor SSH
-gestor_ssh = GestorSSHCompartido()
+gestor_ssh = obtener_gestor_ssh()
+
+# Segundos entre comprobaciones del hilo de vigilancia SSH
+INTERVALO_VIGILANCIA_SSH = config.get('ssh_watch_interval', 3)
+
+@st.cache_resource(show_spinner=False)
+def iniciar_vigilancia_ssh():
+    """Vigilancia SSH compartida en segundo plano, arrancada una vez por proceso"""
+    gestor_ssh.iniciar_vigilancia(INTERVALO_VIGILANCIA_SSH)
+    return True
+
+if config.get('ssh', {}).get('enabled', True):
+    try:
+        iniciar_vigilancia_ssh()
+    except Exception as e:
+        logger.warning("⚠️ No se pudo iniciar la vigilancia SSH: %s", e)
 
 # =============================================================================
 # CONSTANTES Y CONFIGURACIÓN
@@ -62,24 +87,142 @@ APP_ICON = "🔄"
 RETRY_ATTEMPTS = config.get('retry_attempts', 3)
 RETRY_DELAY = config.get('retry_delay', 5)
 
-# Tipos de migración soportados
-TIPOS_MIGRACION = [
+# Lotes de las migraciones masivas (un executemany y un commit por lote): tamaño
+# adaptativo que empieza pequeño (primer avance visible enseguida) y se ajusta para
+# que cada lote tarde ~TIEMPO_OBJETIVO_LOTE segundos. El máximo respeta el límite de
+# parámetros de SQLite (los ids del lote van en un IN (...))
+TAMANO_LOTE_INICIAL = config.get('batch_size', 100)
+TAMANO_LOTE_MAXIMO = min(config.get('batch_size_max', 20000),
+                         32000 if sqlite3.sqlite_version_info >= (3, 32, 0) else 900)
+TIEMPO_OBJETIVO_LOTE = config.get('batch_target_seconds', 0.2)
+
+# INSERT ... RETURNING (SQLite 3.35+): ids asignados sin una consulta adicional
+SQLITE_ADMITE_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# Registros de detalle (registros_migrados) acumulados antes de cada executemany;
+# el commit de la base de control se hace una sola vez al final de la migración
+LOTE_REGISTROS_MIGRADOS = config.get('detail_flush_size', 1000)
+
+# Datos vacíos de un registro migrado (los registros fallidos no llevan datos)
+JSON_VACIO = '{}'
+
+# Tamaño de bloque al copiar las descargas SFTP al disco local
+BLOQUE_COPIA_SFTP = 1024 * 1024
+
+# Conexiones SQLite: WAL con synchronous=NORMAL (un fsync por checkpoint en lugar
+# de dos por commit), caché de páginas ampliada (KiB si es negativo), mmap y espera
+# ante bloqueos en lugar de fallar con "database is locked"
+SQLITE_CACHE_SIZE_KIB = config.get('sqlite_cache_kib', -65536)
+SQLITE_MMAP_SIZE = config.get('sqlite_mmap_size', 256 * 1024 * 1024)
+SQLITE_BUSY_TIMEOUT_MS = config.get('sqlite_busy_timeout_ms', 5000)
+# Páginas de WAL antes del checkpoint automático: alto para que no salte a mitad
+# de una migración; al terminar cada una se hace en segundo plano
+SQLITE_WAL_AUTOCHECKPOINT = config.get('sqlite_wal_autocheckpoint', 10000)
+
+# Recolector de basura: umbral de generación 0 elevado (cada rerun crea muchos
+# objetos de vida corta) y recolección completa explícita cada N ejecuciones
+GC_UMBRAL_GENERACION_0 = config.get('gc_threshold', 50000)
+GC_RECOLECTAR_CADA = config.get('gc_collect_every', 50)
+gc.set_threshold(GC_UMBRAL_GENERACION_0, 10, 10)
+
+# Directorio de backups resuelto y creado una sola vez al importar
+BACKUP_DIR = Path(config.get('backup_dir', 'backups_migracion'))
+try:
+    BACKUP_DIR.mkdir(parents=True, exist_ok=True)
+except OSError as e:
+    logger.warning("⚠️ No se pudo crear el directorio de backups %s: %s", BACKUP_DIR, e)
+
+# Tipos de migración soportados (tupla ordenada para los selectores de la interfaz
+# y frozenset para validar pertenencia)
+TIPOS_MIGRACION = (
     'estudiantes_a_egresados',
     'egresados_a_contratados',
     'aspirantes_a_estudiantes',
     'consolidar_bases',
     'limpiar_duplicados',
     'migrar_historico'
-]
+)
+TIPOS_MIGRACION_VALIDOS = frozenset(TIPOS_MIGRACION)
+
+# Fragmentos de nombre de columna que suelen identificar un registro (candidatas a duplicado)
+PALABRAS_COLUMNAS_UNICAS = ('id', 'codigo', 'matricula', 'curp', 'rfc', 'email', 'unique')
+
+# Columnas de estudiantes rellenadas al migrar un aspirante: la sentencia se arma
+# una sola vez (los valores None se guardan como NULL). ON CONFLICT DO NOTHING
+# descarta en la misma sentencia las filas con CURP o matrícula ya registradas
+# (solo restricciones UNIQUE; un NOT NULL incumplido sigue siendo un error)
+COLUMNAS_ESTUDIANTE_MIGRADO = (
+    'matricula', 'nombre', 'apellido_paterno', 'apellido_materno', 'fecha_nacimiento',
+    'genero', 'curp', 'telefono', 'email', 'direccion', 'ciudad', 'estado',
+    'codigo_postal', 'nivel_estudio', 'carrera', 'semestre', 'turno',
+    'fecha_ingreso', 'estado_estudiante'
+)
+SQL_INSERTAR_ESTUDIANTE_MIGRADO = (
+    f"INSERT INTO estudiantes ({', '.join(COLUMNAS_ESTUDIANTE_MIGRADO)}, fecha_creacion, fecha_actualizacion) "
+    f"VALUES ({', '.join('?' * len(COLUMNAS_ESTUDIANTE_MIGRADO))}, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP) "
+    f"ON CONFLICT DO NOTHING"
+)
+
+# Sentencias fijas de la base de control: el mismo texto en cada llamada para que
+# el caché de sentencias de sqlite3 reutilice la ya compilada
+SQL_INSERTAR_MIGRACION = (
+    "INSERT INTO migraciones (tipo_migracion, descripcion, estado, fecha_programada, "
+    "fecha_inicio, usuario_ejecutor, configuracion) VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+SQL_INSERTAR_REGISTRO_MIGRADO = (
+    "INSERT INTO registros_migrados (migracion_id, registro_origen_id, registro_destino_id, "
+    "tabla_origen, tabla_destino, datos_origen, datos_destino, estado, error_mensaje) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+# Secuencia numérica final de una matrícula generada (p. ej. '26ING0007' -> '0007')
+PATRON_SECUENCIA_MATRICULA = re.compile(r'\d+$')
 
 # Estados de migración
-ESTADOS_MIGRACION = [
+ESTADOS_MIGRACION = (
     'pendiente',
     'en_progreso',
     'completada',
     'fallida',
     'revertida'
-]
+)
+ESTADOS_MIGRACION_VALIDOS = frozenset(ESTADOS_MIGRACION)
+
+@st.cache_data(persist="disk", show_spinner=False)
+def _plantillas_en_cache(_sistema, activas: bool):
+    """Plantillas de migración, guardadas también en disco
+    
+    Es una tabla de referencia que casi nunca cambia: persist="disk" evita releerla
+    tras reiniciar la app. Streamlit no admite ttl con persist="disk", así que la
+    invalidación es explícita (_plantillas_en_cache.clear() al guardar una plantilla).
+    """
+    return _sistema._leer_plantillas_migracion(activas)
+
+@st.cache_resource(ttl=600, max_entries=8, show_spinner=False)
+def _historial_en_cache(_sistema, limite: int, version: int):
+    """Historial de migraciones y su tabla (DataFrame), compartidos entre reruns
+    
+    cache_resource devuelve el mismo objeto en cada acierto, sin serializarlo ni
+    copiarlo: quien necesite modificar la tabla debe trabajar sobre tabla.copy().
+    version (SistemaMigracion._version_historial) cambia con cada registro de
+    migración creado o actualizado.
+    """
+    import pandas as pd
+    
+    historial = _sistema.obtener_historial_migraciones(limite=limite)
+    tabla = pd.DataFrame([
+        {
+            'ID': mig['id'],
+            'Tipo': mig['tipo_migracion'],
+            'Estado': mig['estado'],
+            'Registros': f"{mig.get('registros_exitosos', 0)}/{mig.get('total_registros', 0)}",
+            'Duración': f"{mig.get('duracion_segundos', 0):.1f}s" if mig.get('duracion_segundos') else 'N/A',
+            'Fecha Inicio': mig.get('fecha_inicio', '')[:19],
+            'Usuario': mig.get('usuario_ejecutor', 'sistema')
+        }
+        for mig in historial
+    ])
+    return historial, tabla
 
 # =============================================================================
 # CLASE PRINCIPAL DEL SISTEMA DE MIGRACIÓN
@@ -88,6 +231,17 @@ ESTADOS_MIGRACION = [
 class SistemaMigracion:
     """Clase principal del sistema de migración"""
     
+    # Versión del historial (clave de _historial_en_cache), a nivel de clase
+    _version_historial = 0
+    
+    # Excluye los checkpoints en segundo plano del cierre de bases locales
+    _lock_checkpoint = threading.Lock()
+    
+    # La instancia se comparte entre sesiones (obtener_sistema_migracion): las
+    # migraciones, la subida y el reemplazo de réplicas locales en la
+    # sincronización nunca se ejecutan a la vez
+    _lock_bases = threading.RLock()
+    
     def __init__(self):
         self.config = config
         self.logger = logger
@@ -103,6 +257,12 @@ class SistemaMigracion:
         self.conexiones = {}
         self.migraciones_activas = {}
         
+        # Cursor reutilizable de la base de control (ver _cursor_migracion)
+        self._cursor_control = None
+        
+        # Base local de control (historial de migraciones y plantillas)
+        self.db_migracion_path = "migracion_control.db"
+        
         # Inicializar
         self._inicializar_sistema()
     
@@ -110,32 +270,28 @@ class SistemaMigracion:
         """Inicializar el sistema de migración"""
         self.logger.info("🚀 Inicializando Sistema de Migración")
         
-        # Verificar si ya está inicializado
-        if not self.estado.esta_inicializada():
+        # Verificar si ya está inicializado (y la base de control sigue en disco)
+        if not self.estado.esta_inicializada() or not os.path.exists(self.db_migracion_path):
             self._inicializar_base_datos_migracion()
         else:
-            self.logger.info(f"✅ Sistema ya inicializado el {self.estado.obtener_fecha_inicializacion()}")
+            self.conexiones['migracion'] = self._abrir_conexion(self.db_migracion_path)
+            self.logger.info("✅ Sistema ya inicializado el %s", self.estado.obtener_fecha_inicializacion())
         
         # Sincronizar si está configurado
         if self.config.get('sync_on_start', True):
             self.sincronizar_bases_datos()
     
     def _inicializar_base_datos_migracion(self):
-        """Inicializar la base de datos de migración"""
+        """Inicializar la base de datos de migración
+        
+        La base existente se conserva (con su historial): la estructura se crea con
+        IF NOT EXISTS y solo se completa lo que falte.
+        """
         try:
             self.logger.info("🔄 Inicializando base de datos de migración...")
             
-            # Crear base de datos local para migración
-            self.db_migracion_path = "migracion_control.db"
-            
-            if os.path.exists(self.db_migracion_path):
-                os.remove(self.db_migracion_path)
-            
-            self.conexiones['migracion'] = sqlite3.connect(
-                self.db_migracion_path, 
-                check_same_thread=False
-            )
-            self.conexiones['migracion'].row_factory = sqlite3.Row
+            self.conexiones['migracion'] = self._abrir_conexion(self.db_migracion_path)
+            self._cursor_control = None
             
             # Crear estructura de tablas de control
             self._crear_estructura_bd_migracion()
@@ -145,9 +301,48 @@ class SistemaMigracion:
             self.logger.info("✅ Base de datos de migración inicializada")
             
         except Exception as e:
-            self.logger.error(f"❌ Error inicializando base de datos de migración: {e}")
+            self.logger.error("❌ Error inicializando base de datos de migración: %s", e)
             st.error(f"Error crítico al inicializar: {str(e)}")
     
+    @staticmethod
+    def _abrir_conexion(ruta: str) -> sqlite3.Connection:
+        """Abrir una conexión SQLite con la configuración común
+        
+        Las bases en memoria no admiten WAL ni mmap: solo reciben los PRAGMAs de
+        caché, temporales y espera.
+        """
+        conexion = sqlite3.connect(ruta, check_same_thread=False, cached_statements=256)
+        conexion.row_factory = sqlite3.Row
+        if ruta != ":memory:":
+            conexion.execute("PRAGMA journal_mode = WAL")
+            conexion.execute("PRAGMA synchronous = NORMAL")
+            conexion.execute(f"PRAGMA wal_autocheckpoint = {SQLITE_WAL_AUTOCHECKPOINT}")
+            conexion.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+        conexion.execute("PRAGMA temp_store = MEMORY")
+        conexion.execute(f"PRAGMA cache_size = {SQLITE_CACHE_SIZE_KIB}")
+        conexion.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+        return conexion
+    
+    def _cerrar_conexion_local(self, nombre: str):
+        """Volcar el WAL de una base local al archivo principal y cerrar su conexión
+        
+        Esta instancia es la única dueña de las conexiones del proceso: al cerrar
+        la última, SQLite retira él mismo el -wal/-shm (nunca se borran a mano,
+        pueden contener transacciones confirmadas).
+        """
+        with self._lock_checkpoint:
+            conexion = self.conexiones.pop(nombre, None)
+            if conexion is None:
+                return
+            try:
+                conexion.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except Exception as e:
+                self.logger.warning("⚠️ Error volcando WAL de %s: %s", nombre, e)
+            try:
+                conexion.close()
+            except Exception as e:
+                self.logger.warning("⚠️ Error cerrando base %s: %s", nombre, e)
+    
     def _crear_estructura_bd_migracion(self):
         """Crear estructura de la base de datos de control de migración"""
         cursor = self.conexiones['migracion'].cursor()
@@ -264,12 +459,38 @@ class SistemaMigracion:
             }
         ]
         
-        for plantilla in plantillas_base:
-            cursor.execute(
+        # Plantillas base solo en una base nueva (sin plantillas todavía)
+        cursor.execute("SELECT EXISTS(SELECT 1 FROM plantillas_migracion)")
+        if not cursor.fetchone()[0]:
+            cursor.executemany(
                 "INSERT OR IGNORE INTO plantillas_migracion (nombre, tipo_migracion, configuracion, descripcion) VALUES (?, ?, ?, ?)",
-                (plantilla['nombre'], plantilla['tipo_migracion'], plantilla['configuracion'], plantilla['descripcion'])
+                [(plantilla['nombre'], plantilla['tipo_migracion'], plantilla['configuracion'], plantilla['descripcion'])
+                 for plantilla in plantillas_base]
             )
         
+        # Índices de las consultas de control (filtro + orden en el mismo índice)
+        indices = [
+            # Detalle y conflictos de una migración, en orden de procesamiento
+            ('idx_registros_migracion_fecha', 'registros_migrados(migracion_id, fecha_procesamiento)'),
+            ('idx_registros_origen', 'registros_migrados(tabla_origen, registro_origen_id)'),
+            ('idx_conflictos_migracion_fecha', 'conflictos(migracion_id, fecha_deteccion)'),
+            # Historial (con y sin filtro por tipo) y última migración completada
+            ('idx_migraciones_fecha_inicio', 'migraciones(fecha_inicio DESC)'),
+            ('idx_migraciones_tipo_fecha', 'migraciones(tipo_migracion, fecha_inicio DESC)'),
+            ('idx_migraciones_estado_fecha', 'migraciones(estado, fecha_fin DESC)')
+        ]
+        
+        for nombre_idx, definicion in indices:
+            try:
+                cursor.execute(f'CREATE INDEX IF NOT EXISTS {nombre_idx} ON {definicion}')
+            except Exception as e:
+                self.logger.warning("⚠️ Error creando índice %s: %s", nombre_idx, e)
+        
+        # Estadísticas para el planificador: ANALYZE solo la primera vez
+        cursor.execute("SELECT EXISTS(SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1')")
+        if not cursor.fetchone()[0]:
+            cursor.execute("ANALYZE")
+        
         self.conexiones['migracion'].commit()
         self.logger.info("✅ Estructura de control de migración creada")
     
@@ -303,57 +524,140 @@ class SistemaMigracion:
                 ('inscritos_db', 'temp_inscritos.db')
             ]
             
-            for config_key, local_file in bases_datos:
-                ruta_remota = self.rutas.get(config_key)
-                if ruta_remota:
-                    try:
-                        self._descargar_base_datos(sftp, ruta_remota, local_file)
-                    except Exception as e:
-                        self.logger.warning(f"⚠️ Error descargando {config_key}: {e}")
+            # Ninguna migración ni subida usa las réplicas mientras se reemplazan
+            with self._lock_bases:
+                descargas = []
+                for config_key, local_file in bases_datos:
+                    ruta_remota = self.rutas.get(config_key)
+                    if ruta_remota:
+                        # El archivo se reemplaza: volcar su WAL y cerrar antes su conexión
+                        self._cerrar_conexion_local(config_key[:-len('_db')])
+                        descargas.append((config_key, ruta_remota, local_file))
+                
+                # Descargas en paralelo, cada una con su propia sesión SFTP
+                if descargas:
+                    with ThreadPoolExecutor(max_workers=len(descargas),
+                                            thread_name_prefix='descargas_migracion') as pool:
+                        futuros = {
+                            config_key: pool.submit(self._descargar_en_sesion_propia, ruta_remota, local_file)
+                            for config_key, ruta_remota, local_file in descargas
+                        }
+                        for config_key, futuro in futuros.items():
+                            try:
+                                futuro.result()
+                            except Exception as e:
+                                self.logger.warning("⚠️ Error descargando %s: %s", config_key, e)
+                
+                # Conectar a las bases de datos descargadas
+                self._conectar_bases_datos_locales()
             
             # Actualizar estado
             self.estado.marcar_sincronizacion()
             self.estado.set_ssh_conectado(True)
             
-            # Conectar a las bases de datos descargadas
-            self._conectar_bases_datos_locales()
-            
             self.logger.info("✅ Sincronización de bases completada")
             return True
             
         except Exception as e:
-            self.logger.error(f"❌ Error en sincronización: {e}")
+            self.logger.error("❌ Error en sincronización: %s", e)
             self.estado.set_ssh_conectado(False, str(e))
             return False
     
+    def _descargar_en_sesion_propia(self, ruta_remota: str, ruta_local: str):
+        """Descargar una base en una sesión SFTP abierta solo para este hilo"""
+        sftp = self.gestor_ssh.abrir_sftp_adicional()
+        if not sftp:
+            raise Exception("No se pudo abrir sesión SFTP")
+        try:
+            return self._descargar_base_datos(sftp, ruta_remota, ruta_local)
+        finally:
+            sftp.close()
+    
+    def _limpiar_backups_descarga(self, ruta_local: str):
+        """Conservar solo los backups de descarga más recientes de una base"""
+        try:
+            max_backups = self.config.get('backup', {}).get('max_backups', 10)
+            directorio = Path(ruta_local).parent
+            # El nombre lleva la marca de tiempo: el orden alfabético es cronológico
+            backups = sorted(directorio.glob(f"{Path(ruta_local).name}.backup_*"))
+            
+            for antiguo in backups[:-max_backups]:
+                try:
+                    antiguo.unlink()
+                    self.logger.debug("Backup antiguo eliminado: %s", antiguo)
+                except OSError as e:
+                    self.logger.warning("⚠️ No se pudo eliminar backup antiguo: %s", e)
+        except Exception as e:
+            self.logger.warning("⚠️ Error limpiando backups antiguos: %s", e)
+    
+    @staticmethod
+    def _copia_local_vigente(ruta_local: str, info_remota) -> bool:
+        """Indica si la copia local coincide con el archivo remoto en tamaño y fecha
+        
+        Tras cada descarga la copia local recibe la fecha de modificación remota;
+        cualquier escritura posterior (local o en el servidor) cambia alguna de las
+        dos y obliga a descargar de nuevo.
+        """
+        try:
+            info_local = os.stat(ruta_local)
+        except OSError:
+            return False
+        return (info_local.st_size == info_remota.st_size
+                and int(info_local.st_mtime) == int(info_remota.st_mtime))
+    
     def _descargar_base_datos(self, sftp, ruta_remota: str, ruta_local: str):
         """Descargar base de datos desde servidor remoto"""
         try:
-            self.logger.info(f"📥 Descargando {ruta_remota}...")
+            # Sin cambios en el servidor desde la última descarga: nada que transferir
+            info_remota = sftp.stat(ruta_remota)
+            if self._copia_local_vigente(ruta_local, info_remota):
+                self.logger.info("✅ %s sin cambios en el servidor, se conserva la copia local", ruta_local)
+                return True
+            
+            self.logger.info("📥 Descargando %s...", ruta_remota)
             
-            # Crear backup del archivo local si existe
+            # Crear backup del archivo local si existe: enlace duro (sin copiar datos);
+            # la descarga crea un archivo nuevo, así que el enlace conserva el anterior
             if os.path.exists(ruta_local):
                 timestamp = self.util.generar_timestamp()
                 backup_path = f"{ruta_local}.backup_{timestamp}"
-                import shutil
-                shutil.copy2(ruta_local, backup_path)
-                self.logger.debug(f"Backup creado: {backup_path}")
-            
-            # Descargar archivo
-            sftp.get(ruta_remota, ruta_local)
+                try:
+                    os.link(ruta_local, backup_path)
+                except OSError:
+                    # Sistema de archivos sin enlaces duros: copia completa
+                    shutil.copy2(ruta_local, backup_path)
+                self.logger.debug("Backup creado: %s", backup_path)
+                self._limpiar_backups_descarga(ruta_local)
+            
+            # Descargar a un archivo temporal (lecturas anticipadas, muchas peticiones
+            # en vuelo, y copia en bloques de BLOQUE_COPIA_SFTP) y reemplazar al final:
+            # nuevo inodo y sin copias a medias si la descarga falla
+            ruta_temporal = f"{ruta_local}.tmp"
+            try:
+                with sftp.open(ruta_remota, 'rb') as remoto:
+                    remoto.prefetch(info_remota.st_size)
+                    with open(ruta_temporal, 'wb') as local:
+                        shutil.copyfileobj(remoto, local, BLOQUE_COPIA_SFTP)
+                os.replace(ruta_temporal, ruta_local)
+            finally:
+                if os.path.exists(ruta_temporal):
+                    os.remove(ruta_temporal)
+            
+            # La copia local toma la fecha del archivo remoto (ver _copia_local_vigente)
+            os.utime(ruta_local, (info_remota.st_atime, info_remota.st_mtime))
             
             # Verificar que el archivo se descargó correctamente
             if os.path.exists(ruta_local) and os.path.getsize(ruta_local) > 0:
-                self.logger.info(f"✅ Base de datos descargada: {ruta_local} ({os.path.getsize(ruta_local)} bytes)")
+                self.logger.info("✅ Base de datos descargada: %s (%s bytes)", ruta_local, os.path.getsize(ruta_local))
                 return True
             else:
                 raise Exception("Archivo descargado vacío o no existe")
             
         except FileNotFoundError:
-            self.logger.warning(f"⚠️ Archivo remoto no encontrado: {ruta_remota}")
+            self.logger.warning("⚠️ Archivo remoto no encontrado: %s", ruta_remota)
             return False
         except Exception as e:
-            self.logger.error(f"❌ Error descargando base de datos: {e}")
+            self.logger.error("❌ Error descargando base de datos: %s", e)
             raise
     
     def _conectar_bases_datos_locales(self):
@@ -367,16 +671,16 @@ class SistemaMigracion:
             }
             
             for nombre, archivo in bases.items():
+                if nombre in self.conexiones:
+                    continue
                 if os.path.exists(archivo):
-                    conexion = sqlite3.connect(archivo, check_same_thread=False)
-                    conexion.row_factory = sqlite3.Row
-                    self.conexiones[nombre] = conexion
-                    self.logger.info(f"✅ Conectado a base de datos: {nombre}")
+                    self.conexiones[nombre] = self._abrir_conexion(archivo)
+                    self.logger.info("✅ Conectado a base de datos: %s", nombre)
                 else:
-                    self.logger.warning(f"⚠️ Archivo no encontrado: {archivo}")
+                    self.logger.warning("⚠️ Archivo no encontrado: %s", archivo)
             
         except Exception as e:
-            self.logger.error(f"❌ Error conectando bases de datos: {e}")
+            self.logger.error("❌ Error conectando bases de datos: %s", e)
     
     def subir_base_datos(self, nombre_base: str, ruta_local: str):
         """Subir base de datos al servidor"""
@@ -404,18 +708,24 @@ class SistemaMigracion:
             
             try:
                 sftp.get(ruta_remota, backup_remoto)
-                self.logger.info(f"Backup remoto creado: {backup_remoto}")
+                self.logger.info("Backup remoto creado: %s", backup_remoto)
             except:
                 self.logger.warning("No se pudo crear backup remoto (primera subida?)")
             
-            # Subir archivo
-            sftp.put(ruta_local, ruta_remota)
+            # Volcar el WAL al archivo principal (se sube solo ese archivo) sin que
+            # una migración escriba mientras tanto
+            with self._lock_bases:
+                if nombre_base in self.conexiones:
+                    self.conexiones[nombre_base].execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                
+                # Subir archivo
+                sftp.put(ruta_local, ruta_remota)
             
-            self.logger.info(f"✅ Base de datos {nombre_base} subida al servidor")
+            self.logger.info("✅ Base de datos %s subida al servidor", nombre_base)
             return True
             
         except Exception as e:
-            self.logger.error(f"❌ Error subiendo base de datos {nombre_base}: {e}")
+            self.logger.error("❌ Error subiendo base de datos %s: %s", nombre_base, e)
             raise
     
     # =============================================================================
@@ -423,18 +733,30 @@ class SistemaMigracion:
     # =============================================================================
     
     def ejecutar_migracion(self, tipo_migracion: str, configuracion: dict = None, 
-                          usuario: str = None):
-        """Ejecutar una migración específica"""
+                          usuario: str = None, al_progresar=None):
+        """Ejecutar una migración específica
+        
+        al_progresar(procesados, etapa), si se indica, recibe el avance lote a lote
+        de las migraciones que lo notifican (consolidación, limpieza de duplicados).
+        Las migraciones de distintas sesiones se ejecutan de una en una.
+        """
+        with self._lock_bases:
+            return self._ejecutar_migracion(tipo_migracion, configuracion, usuario, al_progresar)
+    
+    def _ejecutar_migracion(self, tipo_migracion: str, configuracion: dict,
+                            usuario: str, al_progresar):
+        """Cuerpo de ejecutar_migracion (con _lock_bases tomado)"""
+        self._al_progresar = al_progresar
         try:
-            self.logger.info(f"🔄 Iniciando migración: {tipo_migracion}")
+            self.logger.info("🔄 Iniciando migración: %s", tipo_migracion)
             
             # Validar tipo de migración
-            if tipo_migracion not in TIPOS_MIGRACION:
+            if tipo_migracion not in TIPOS_MIGRACION_VALIDOS:
                 raise ValueError(f"Tipo de migración no válido: {tipo_migracion}")
             
             # Crear registro de migración
             migracion_id = self._crear_registro_migracion(
-                tipo_migracion, configuracion, usuario
+                tipo_migracion, configuracion, usuario, datetime.now().isoformat()
             )
             
             # Ejecutar migración específica
@@ -462,7 +784,7 @@ class SistemaMigracion:
                 'estado': 'completada' if resultado['exito'] else 'fallida',
                 'fecha_fin': datetime.now().isoformat(),
                 'duracion_segundos': duracion,
-                'resultado': json.dumps(resultado, ensure_ascii=False),
+                'resultado': UtilidadesCompartidas.json_texto(resultado),
                 'total_registros': resultado.get('total', 0),
                 'registros_exitosos': resultado.get('exitosos', 0),
                 'registros_fallidos': resultado.get('fallidos', 0)
@@ -471,90 +793,197 @@ class SistemaMigracion:
             # Registrar en estado general
             self.estado.registrar_migracion(resultado['exito'], duracion)
             
-            self.logger.info(f"✅ Migración {tipo_migracion} completada en {duracion:.2f} segundos")
+            self.logger.info("✅ Migración %s completada en %.2f segundos", tipo_migracion, duracion)
             return resultado
             
         except Exception as e:
-            self.logger.error(f"❌ Error en migración {tipo_migracion}: {e}")
+            self.logger.error("❌ Error en migración %s: %s", tipo_migracion, e)
             
             # Actualizar registro como fallido
             if 'migracion_id' in locals():
                 self._actualizar_registro_migracion(migracion_id, {
                     'estado': 'fallida',
                     'fecha_fin': datetime.now().isoformat(),
-                    'resultado': json.dumps({'error': str(e)}, ensure_ascii=False),
+                    'resultado': UtilidadesCompartidas.json_texto({'error': str(e)}),
                     'errores': str(e)
                 })
             
             self.estado.registrar_migracion(False, 0)
             raise
+        
+        finally:
+            self._al_progresar = None
+            self._checkpoint_en_segundo_plano()
+    
+    def _checkpoint_en_segundo_plano(self):
+        """Vaciar los WAL de las bases en un hilo aparte al terminar una migración
+        
+        El hilo abre sus propias conexiones (las de self.conexiones no se comparten
+        entre hilos), de modo que el próximo commit no paga un checkpoint grande.
+        """
+        rutas = []
+        for conexion in self.conexiones.values():
+            try:
+                ruta = conexion.execute("PRAGMA database_list").fetchone()['file']
+            except Exception:
+                continue
+            if ruta:
+                rutas.append(ruta)
+        
+        def vaciar_wal():
+            with self._lock_checkpoint:
+                for ruta in rutas:
+                    if not os.path.exists(ruta):
+                        continue
+                    try:
+                        conexion = sqlite3.connect(ruta, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+                        try:
+                            conexion.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                        finally:
+                            conexion.close()
+                    except Exception as e:
+                        self.logger.debug("Checkpoint de %s no completado: %s", ruta, e)
+        
+        if rutas:
+            threading.Thread(target=vaciar_wal, name='checkpoint_wal', daemon=True).start()
+    
+    def _notificar_progreso(self, procesados: int, etapa: str):
+        """Informar del avance de la migración en curso (si alguien escucha)"""
+        if not getattr(self, '_al_progresar', None):
+            return
+        try:
+            self._al_progresar(procesados, etapa)
+        except Exception as e:
+            self.logger.debug("Error notificando progreso: %s", e)
+    
+    def _ejecutar_migracion_con_estado(self, tipo_migracion: str, configuracion: dict = None,
+                                       usuario: str = None):
+        """Ejecutar una migración mostrando su avance en un st.status"""
+        with st.status(f"Ejecutando migración {tipo_migracion}...", expanded=True) as estado_ui:
+            def al_progresar(procesados, etapa):
+                estado_ui.update(label=f"🔄 {etapa}: {procesados} registros procesados")
+            
+            try:
+                resultado = self.ejecutar_migracion(tipo_migracion, configuracion, usuario,
+                                                    al_progresar=al_progresar)
+            except Exception:
+                estado_ui.update(label=f"❌ Migración {tipo_migracion} fallida", state="error")
+                raise
+            
+            estado_ui.update(label=f"✅ Migración {tipo_migracion} finalizada",
+                             state="complete", expanded=False)
+        return resultado
     
     def _crear_registro_migracion(self, tipo_migracion: str, configuracion: dict = None, 
-                                 usuario: str = None) -> int:
-        """Crear registro de migración en la base de control"""
-        cursor = self.conexiones['migracion'].cursor()
+                                 usuario: str = None, instante: str = None) -> int:
+        """Crear registro de migración en la base de control
         
-        cursor.execute('''
-            INSERT INTO migraciones (
-                tipo_migracion, descripcion, estado, fecha_programada,
-                fecha_inicio, usuario_ejecutor, configuracion
-            ) VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
+        instante (ISO) se usa como fecha programada y de inicio; por defecto, ahora.
+        """
+        instante = instante or datetime.now().isoformat()
+        cursor = self._cursor_migracion()
+        
+        cursor.execute(SQL_INSERTAR_MIGRACION, (
             tipo_migracion,
             f"Migración automática: {tipo_migracion}",
             'en_progreso',
-            datetime.now().isoformat(),
-            datetime.now().isoformat(),
+            instante,
+            instante,
             usuario or 'sistema',
-            json.dumps(configuracion or {}, ensure_ascii=False)
+            UtilidadesCompartidas.json_texto(configuracion or {})
         ))
         
         self.conexiones['migracion'].commit()
+        SistemaMigracion._version_historial += 1
         migracion_id = cursor.lastrowid
         
-        self.logger.info(f"📝 Registro de migración creado: ID {migracion_id}")
+        self.logger.info("📝 Registro de migración creado: ID %s", migracion_id)
         return migracion_id
     
     def _actualizar_registro_migracion(self, migracion_id: int, datos: dict):
         """Actualizar registro de migración"""
-        cursor = self.conexiones['migracion'].cursor()
-        
-        set_clauses = []
-        valores = []
+        if 'estado' in datos and datos['estado'] not in ESTADOS_MIGRACION_VALIDOS:
+            raise ValueError(f"Estado de migración no válido: {datos['estado']}")
         
-        for campo, valor in datos.items():
-            set_clauses.append(f"{campo} = ?")
-            valores.append(valor)
-        
-        valores.append(migracion_id)
-        query = f"UPDATE migraciones SET {', '.join(set_clauses)} WHERE id = ?"
-        
-        cursor.execute(query, valores)
+        cursor = self._cursor_migracion()
+        cursor.execute(self._sql_actualizar_migracion(tuple(datos)),
+                       (*datos.values(), migracion_id))
         self.conexiones['migracion'].commit()
+        SistemaMigracion._version_historial += 1
     
-    def _registrar_registro_migrado(self, migracion_id: int, datos: dict):
-        """Registrar un registro migrado individualmente"""
-        cursor = self.conexiones['migracion'].cursor()
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _sql_actualizar_migracion(campos: tuple) -> str:
+        """Construir (una sola vez por combinación de campos) el UPDATE de una migración
+        
+        Las combinaciones son pocas (inicio, finalización, error), así que el texto
+        SQL se repite y el caché de sentencias de sqlite3 lo reaprovecha.
+        """
+        return f"UPDATE migraciones SET {', '.join(f'{campo} = ?' for campo in campos)} WHERE id = ?"
+    
+    def _cursor_migracion(self) -> sqlite3.Cursor:
+        """Cursor de la base de control compartido por los registros de migración
+        
+        Se crea una vez por conexión; solo lo usan sentencias que leen su resultado
+        de inmediato (ninguna deja una iteración abierta sobre él).
+        """
+        if self._cursor_control is None:
+            self._cursor_control = self.conexiones['migracion'].cursor()
+        return self._cursor_control
+    
+    def _registrar_registros_migrados(self, migracion_id: int, lista_datos: list, confirmar: bool = True):
+        """Registrar varios registros migrados con un solo executemany
         
-        cursor.execute('''
-            INSERT INTO registros_migrados (
-                migracion_id, registro_origen_id, registro_destino_id,
-                tabla_origen, tabla_destino, datos_origen, datos_destino,
-                estado, error_mensaje
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            migracion_id,
-            datos.get('registro_origen_id'),
-            datos.get('registro_destino_id'),
-            datos.get('tabla_origen'),
-            datos.get('tabla_destino'),
-            json.dumps(datos.get('datos_origen', {}), ensure_ascii=False),
-            json.dumps(datos.get('datos_destino', {}), ensure_ascii=False),
-            datos.get('estado', 'exitoso'),
-            datos.get('error_mensaje')
-        ))
+        Con confirmar=False el commit queda a cargo del llamador (p. ej. junto con
+        el lote de datos migrados al que corresponden).
+        """
+        if not lista_datos:
+            return
         
-        self.conexiones['migracion'].commit()
+        cursor = self._cursor_migracion()
+        cursor.executemany(SQL_INSERTAR_REGISTRO_MIGRADO, [
+            (
+                migracion_id,
+                datos.get('registro_origen_id'),
+                datos.get('registro_destino_id'),
+                datos.get('tabla_origen'),
+                datos.get('tabla_destino'),
+                self._json_detalle(datos.get('datos_origen')),
+                self._json_detalle(datos.get('datos_destino')),
+                datos.get('estado', 'exitoso'),
+                datos.get('error_mensaje')
+            )
+            for datos in lista_datos
+        ])
+        
+        if confirmar:
+            self.conexiones['migracion'].commit()
+    
+    @staticmethod
+    def _json_detalle(valor) -> str:
+        """JSON de los datos de un registro migrado ('{}' sin serializar si no hay datos)"""
+        return UtilidadesCompartidas.json_texto(valor) if valor else JSON_VACIO
+    
+    @staticmethod
+    def _iterar_lotes(cursor, tamano_lote: int = TAMANO_LOTE_INICIAL):
+        """Iterar el resultado de un cursor en lotes de fetchmany de tamaño adaptativo
+        
+        Se mide cuánto tarda cada lote (lectura y procesado del llamador, entre un
+        yield y el siguiente) y el siguiente se escala para acercarse a
+        TIEMPO_OBJETIVO_LOTE, entre TAMANO_LOTE_INICIAL y TAMANO_LOTE_MAXIMO.
+        """
+        while True:
+            inicio = time.perf_counter()
+            lote = cursor.fetchmany(tamano_lote)
+            if not lote:
+                break
+            yield lote
+            
+            transcurrido = time.perf_counter() - inicio
+            if transcurrido > 0:
+                tamano_lote = max(TAMANO_LOTE_INICIAL, min(
+                    TAMANO_LOTE_MAXIMO, int(tamano_lote * TIEMPO_OBJETIVO_LOTE / transcurrido)
+                ))
     
     # =============================================================================
     # MIGRACIONES ESPECÍFICAS
@@ -590,81 +1019,116 @@ class SistemaMigracion:
                 params.append(criterios['fecha_ingreso_maxima'])
             
             cursor = self.conexiones['escuela'].cursor()
-            cursor.execute(query, params)
-            estudiantes = cursor.fetchall()
+            cursor.execute(query.replace("SELECT *", "SELECT COUNT(*)", 1), params)
+            total = cursor.fetchone()[0]
             
-            total = len(estudiantes)
+            # Los estudiantes se leen por lotes desde un cursor propio (el otro
+            # cursor ejecuta las escrituras) en lugar de cargarlos todos con fetchall()
+            cursor_lectura = self.conexiones['escuela'].cursor()
+            cursor_lectura.execute(query, params)
             exitosos = 0
             fallidos = 0
             detalles = []
             
-            self.logger.info(f"📊 Migrando {total} estudiantes a egresados")
+            self.logger.info("📊 Migrando %s estudiantes a egresados", total)
             
-            for estudiante in estudiantes:
-                try:
-                    # Verificar si ya es egresado
-                    cursor.execute(
-                        "SELECT COUNT(*) FROM egresados WHERE estudiante_id = ?",
-                        (estudiante['id'],)
-                    )
-                    
-                    if cursor.fetchone()[0] > 0:
-                        self.logger.debug(f"Estudiante {estudiante['id']} ya es egresado, omitiendo")
+            pendientes = []
+            fecha_egreso = config.get('fecha_egreso', datetime.now().date().isoformat())
+            procesados = 0
+            
+            # Por lotes: una consulta de existencia, un executemany por sentencia y un
+            # commit por lote (sentencias preparadas una vez y reutilizadas por fila)
+            for lote in self._iterar_lotes(cursor_lectura):
+                ids_lote = [estudiante['id'] for estudiante in lote]
+                cursor.execute(
+                    f"SELECT estudiante_id FROM egresados WHERE estudiante_id IN ({','.join('?' * len(ids_lote))})",
+                    ids_lote
+                )
+                ya_egresados = {fila[0] for fila in cursor.fetchall()}
+                
+                nuevos = []
+                for estudiante in lote:
+                    if estudiante['id'] in ya_egresados:
+                        self.logger.debug("Estudiante %s ya es egresado, omitiendo", estudiante['id'])
                         detalles.append({
                             'estudiante_id': estudiante['id'],
                             'estado': 'omitido',
                             'razon': 'Ya es egresado'
                         })
-                        continue
-                    
-                    # Insertar como egresado
-                    fecha_egreso = config.get('fecha_egreso', datetime.now().date().isoformat())
-                    
-                    cursor.execute('''
+                    else:
+                        nuevos.append(estudiante)
+                
+                procesados += len(lote)
+                self._notificar_progreso(procesados, 'estudiantes')
+                if not nuevos:
+                    continue
+                
+                ids_nuevos = [estudiante['id'] for estudiante in nuevos]
+                marcadores = ','.join('?' * len(ids_nuevos))
+                try:
+                    # Insertar el lote como egresados con una sola sentencia que lee los
+                    # datos de estudiantes (título: el configurado o la carrera)
+                    insertar_egresados = f'''
                         INSERT INTO egresados (
                             estudiante_id, fecha_egreso, titulo_obtenido,
                             promedio_final, fecha_registro
-                        ) VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
-                    ''', (
-                        estudiante['id'],
-                        fecha_egreso,
-                        config.get('titulo_obtenido', estudiante.get('carrera', '')),
-                        estudiante.get('promedio', 0.0)
-                    ))
+                        )
+                        SELECT id, ?, COALESCE(?, carrera, ''), COALESCE(promedio, 0.0), CURRENT_TIMESTAMP
+                        FROM estudiantes WHERE id IN ({marcadores})
+                    '''
+                    parametros = [fecha_egreso, config.get('titulo_obtenido')] + ids_nuevos
                     
-                    # Actualizar estado del estudiante
+                    # Ids de egresado asignados en este lote (con RETURNING, en la misma sentencia)
+                    if SQLITE_ADMITE_RETURNING:
+                        cursor.execute(insertar_egresados + " RETURNING estudiante_id, id", parametros)
+                    else:
+                        cursor.execute(insertar_egresados, parametros)
+                        cursor.execute(
+                            f"SELECT estudiante_id, id FROM egresados WHERE estudiante_id IN ({marcadores})",
+                            ids_nuevos
+                        )
+                    destinos = dict(cursor.fetchall())
+                    
+                    # Actualizar estado de los estudiantes del lote
                     cursor.execute(
-                        "UPDATE estudiantes SET estado_estudiante = 'Egresado' WHERE id = ?",
-                        (estudiante['id'],)
+                        f"UPDATE estudiantes SET estado_estudiante = 'Egresado' WHERE id IN ({marcadores})",
+                        ids_nuevos
                     )
-                    
-                    egresado_id = cursor.lastrowid
+                    self.conexiones['escuela'].commit()
                     
                     # Registrar en detalle
-                    self._registrar_registro_migrado(migracion_id, {
-                        'registro_origen_id': estudiante['id'],
-                        'registro_destino_id': egresado_id,
-                        'tabla_origen': 'estudiantes',
-                        'tabla_destino': 'egresados',
-                        'datos_origen': dict(estudiante),
-                        'estado': 'exitoso'
-                    })
-                    
-                    exitosos += 1
+                    for estudiante in nuevos:
+                        pendientes.append({
+                            'registro_origen_id': estudiante['id'],
+                            'registro_destino_id': destinos.get(estudiante['id']),
+                            'tabla_origen': 'estudiantes',
+                            'tabla_destino': 'egresados',
+                            'datos_origen': dict(estudiante),
+                            'estado': 'exitoso'
+                        })
+                    exitosos += len(nuevos)
                     
                 except Exception as e:
-                    fallidos += 1
-                    self.logger.error(f"Error migrando estudiante {estudiante['id']}: {e}")
+                    self.conexiones['escuela'].rollback()
+                    fallidos += len(nuevos)
+                    self.logger.error("Error migrando lote de estudiantes: %s", e)
                     
-                    self._registrar_registro_migrado(migracion_id, {
-                        'registro_origen_id': estudiante['id'],
-                        'tabla_origen': 'estudiantes',
-                        'tabla_destino': 'egresados',
-                        'estado': 'fallido',
-                        'error_mensaje': str(e)
-                    })
+                    for estudiante in nuevos:
+                        pendientes.append({
+                            'registro_origen_id': estudiante['id'],
+                            'tabla_origen': 'estudiantes',
+                            'tabla_destino': 'egresados',
+                            'estado': 'fallido',
+                            'error_mensaje': str(e)
+                        })
+                
+                if len(pendientes) >= LOTE_REGISTROS_MIGRADOS:
+                    self._registrar_registros_migrados(migracion_id, pendientes, confirmar=False)
+                    pendientes = []
             
             self.conexiones['escuela'].commit()
+            self._registrar_registros_migrados(migracion_id, pendientes, confirmar=False)
+            self.conexiones['migracion'].commit()
             
             resultado = {
                 'exito': exitosos > 0,
@@ -674,11 +1138,11 @@ class SistemaMigracion:
                 'detalles': detalles
             }
             
-            self.logger.info(f"✅ Migración completada: {exitosos}/{total} exitosos")
+            self.logger.info("✅ Migración completada: %s/%s exitosos", exitosos, total)
             return resultado
             
         except Exception as e:
-            self.logger.error(f"❌ Error en migración estudiantes->egresados: {e}")
+            self.logger.error("❌ Error en migración estudiantes->egresados: %s", e)
             raise
     
     def _migrar_aspirantes_a_estudiantes(self, migracion_id: int, configuracion: dict = None):
@@ -706,26 +1170,41 @@ class SistemaMigracion:
                 params.append(criterios['puntaje_minimo'])
             
             cursor_aspirantes = self.conexiones['aspirantes'].cursor()
-            cursor_aspirantes.execute(query, params)
-            aspirantes = cursor_aspirantes.fetchall()
+            cursor_aspirantes.execute(query.replace("SELECT *", "SELECT COUNT(*)", 1), params)
+            total = cursor_aspirantes.fetchone()[0]
             
-            total = len(aspirantes)
+            # Lectura fila a fila desde un cursor propio (cursor_aspirantes ejecuta
+            # las actualizaciones) en lugar de cargar todo con fetchall()
+            cursor_lectura = self.conexiones['aspirantes'].cursor()
+            cursor_lectura.execute(query, params)
             exitosos = 0
             fallidos = 0
             
-            self.logger.info(f"📊 Migrando {total} aspirantes a estudiantes")
-            
-            for aspirante in aspirantes:
+            self.logger.info("📊 Migrando %s aspirantes a estudiantes", total)
+            
+            # CURPs y matrículas ya registradas: una sola lectura en lugar de una
+            # consulta de existencia por aspirante
+            cursor_escuela = self.conexiones['escuela'].cursor()
+            cursor_escuela.execute("SELECT curp, matricula FROM estudiantes")
+            curps_existentes = set()
+            matriculas_existentes = set()
+            for curp, matricula in cursor_escuela:
+                if curp is not None:
+                    curps_existentes.add(curp)
+                matriculas_existentes.add(matricula)
+            
+            pendientes = []
+            fecha_ingreso = datetime.now().date().isoformat()
+            for aspirante in map(dict, cursor_lectura):
+                if len(pendientes) >= LOTE_REGISTROS_MIGRADOS:
+                    self._registrar_registros_migrados(migracion_id, pendientes, confirmar=False)
+                    pendientes = []
+                
                 try:
                     # Verificar si ya es estudiante
-                    cursor_escuela = self.conexiones['escuela'].cursor()
-                    cursor_escuela.execute(
-                        "SELECT COUNT(*) FROM estudiantes WHERE curp = ? OR matricula = ?",
-                        (aspirante.get('curp'), aspirante.get('matricula_aspirante'))
-                    )
-                    
-                    if cursor_escuela.fetchone()[0] > 0:
-                        self.logger.debug(f"Aspirante {aspirante['id']} ya es estudiante, omitiendo")
+                    if (aspirante.get('curp') in curps_existentes
+                            or aspirante.get('matricula_aspirante') in matriculas_existentes):
+                        self.logger.debug("Aspirante %s ya es estudiante, omitiendo", aspirante['id'])
                         continue
                     
                     # Mapear campos de aspirante a estudiante
@@ -747,33 +1226,30 @@ class SistemaMigracion:
                         'carrera': aspirante.get('carrera_solicitada'),
                         'semestre': 1,  # Siempre empiezan en primer semestre
                         'turno': aspirante.get('turno_preferido'),
-                        'fecha_ingreso': datetime.now().date().isoformat(),
+                        'fecha_ingreso': fecha_ingreso,
                         'estado_estudiante': 'Activo'
                     }
                     
-                    # Insertar como estudiante
-                    campos = []
-                    placeholders = []
-                    valores = []
-                    
-                    for campo, valor in datos_estudiante.items():
-                        if valor is not None:
-                            campos.append(campo)
-                            placeholders.append('?')
-                            valores.append(valor)
-                    
-                    campos.append('fecha_creacion')
-                    campos.append('fecha_actualizacion')
-                    placeholders.append('CURRENT_TIMESTAMP')
-                    placeholders.append('CURRENT_TIMESTAMP')
-                    
-                    query_insert = f"""
-                        INSERT INTO estudiantes ({', '.join(campos)}) 
-                        VALUES ({', '.join(placeholders)})
-                    """
-                    
-                    cursor_escuela.execute(query_insert, valores)
+                    # Insertar como estudiante (misma sentencia para todas las filas)
+                    cursor_escuela.execute(
+                        SQL_INSERTAR_ESTUDIANTE_MIGRADO,
+                        [datos_estudiante[columna] for columna in COLUMNAS_ESTUDIANTE_MIGRADO]
+                    )
+                    if cursor_escuela.rowcount == 0:
+                        # Conflicto UNIQUE no visto en los conjuntos (p. ej. matrícula generada repetida)
+                        self.logger.debug("Aspirante %s omitido: CURP o matrícula ya registrada", aspirante['id'])
+                        pendientes.append({
+                            'registro_origen_id': aspirante['id'],
+                            'tabla_origen': 'aspirantes',
+                            'tabla_destino': 'estudiantes',
+                            'estado': 'omitido',
+                            'error_mensaje': 'CURP o matrícula ya registrada'
+                        })
+                        continue
                     estudiante_id = cursor_escuela.lastrowid
+                    matriculas_existentes.add(datos_estudiante['matricula'])
+                    if datos_estudiante['curp'] is not None:
+                        curps_existentes.add(datos_estudiante['curp'])
                     
                     # Actualizar estado del aspirante
                     cursor_aspirantes.execute(
@@ -782,7 +1258,7 @@ class SistemaMigracion:
                     )
                     
                     # Registrar en detalle
-                    self._registrar_registro_migrado(migracion_id, {
+                    pendientes.append({
                         'registro_origen_id': aspirante['id'],
                         'registro_destino_id': estudiante_id,
                         'tabla_origen': 'aspirantes',
@@ -796,9 +1272,9 @@ class SistemaMigracion:
                     
                 except Exception as e:
                     fallidos += 1
-                    self.logger.error(f"Error migrando aspirante {aspirante['id']}: {e}")
+                    self.logger.error("Error migrando aspirante %s: %s", aspirante['id'], e)
                     
-                    self._registrar_registro_migrado(migracion_id, {
+                    pendientes.append({
                         'registro_origen_id': aspirante['id'],
                         'tabla_origen': 'aspirantes',
                         'tabla_destino': 'estudiantes',
@@ -808,6 +1284,8 @@ class SistemaMigracion:
             
             self.conexiones['aspirantes'].commit()
             self.conexiones['escuela'].commit()
+            self._registrar_registros_migrados(migracion_id, pendientes, confirmar=False)
+            self.conexiones['migracion'].commit()
             
             resultado = {
                 'exito': exitosos > 0,
@@ -816,12 +1294,66 @@ class SistemaMigracion:
                 'fallidos': fallidos
             }
             
-            self.logger.info(f"✅ Migración completada: {exitosos}/{total} exitosos")
+            self.logger.info("✅ Migración completada: %s/%s exitosos", exitosos, total)
             return resultado
             
         except Exception as e:
-            self.logger.error(f"❌ Error en migración aspirantes->estudiantes: {e}")
+            self.logger.error("❌ Error en migración aspirantes->estudiantes: %s", e)
+            raise
+    
+    def _consolidar_adjuntando(self, migracion_id: int, base_nombre: str,
+                               tabla_origen: str, tabla_destino: str) -> int:
+        """Consolidar una tabla adjuntando su base a la de control (ATTACH DATABASE)
+        
+        Dos sentencias INSERT ... SELECT: los registros aún no consolidados (datos
+        completos armados con json_object) y su detalle en registros_migrados.
+        Devuelve cuántos registros se copiaron. Si algo falla (p. ej. columnas BLOB,
+        que json_object no admite) lanza la excepción y el llamador usa la copia por lotes.
+        """
+        conexion = self.conexiones['migracion']
+        ruta_origen = self.conexiones[base_nombre].execute("PRAGMA database_list").fetchone()['file']
+        if not ruta_origen:
+            raise Exception("base en memoria")
+        
+        origen = f"{base_nombre}.{tabla_origen}"
+        conexion.commit()  # ATTACH no se admite dentro de una transacción
+        cursor = conexion.cursor()
+        cursor.execute("ATTACH DATABASE ? AS origen_consolidacion", (ruta_origen,))
+        try:
+            cursor.execute(f'PRAGMA origen_consolidacion.table_info("{tabla_origen}")')
+            pares = ', '.join(
+                "'{0}', \"{1}\"".format(fila['name'].replace("'", "''"), fila['name'].replace('"', '""'))
+                for fila in cursor.fetchall()
+            )
+            
+            cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {tabla_destino}")
+            ultimo_id = cursor.fetchone()[0]
+            
+            cursor.execute(f'''
+                INSERT INTO {tabla_destino} (origen_tabla, origen_id, tipo_registro, datos_completos)
+                SELECT ?, id, ?, json_object({pares})
+                FROM origen_consolidacion."{tabla_origen}"
+                WHERE id NOT IN (SELECT origen_id FROM {tabla_destino} WHERE origen_tabla = ?)
+            ''', (origen, base_nombre, origen))
+            nuevos = cursor.rowcount
+            
+            cursor.execute(f'''
+                INSERT INTO registros_migrados (
+                    migracion_id, registro_origen_id, registro_destino_id,
+                    tabla_origen, tabla_destino, datos_origen, datos_destino, estado
+                )
+                SELECT ?, origen_id, id, ?, ?, ?, ?, 'exitoso'
+                FROM {tabla_destino}
+                WHERE id > ? AND origen_tabla = ?
+            ''', (migracion_id, origen, tabla_destino, JSON_VACIO, JSON_VACIO, ultimo_id, origen))
+            
+            conexion.commit()
+            return nuevos
+        except Exception:
+            conexion.rollback()
             raise
+        finally:
+            cursor.execute("DETACH DATABASE origen_consolidacion")
     
     def _generar_matricula(self, aspirante: dict) -> str:
         """Generar matrícula única para nuevo estudiante"""
@@ -842,8 +1374,7 @@ class SistemaMigracion:
             if resultado:
                 ultima_matricula = resultado['matricula']
                 # Extraer secuencia numérica
-                import re
-                match = re.search(r'\d+$', ultima_matricula)
+                match = PATRON_SECUENCIA_MATRICULA.search(ultima_matricula)
                 if match:
                     secuencia = int(match.group()) + 1
                 else:
@@ -883,7 +1414,7 @@ class SistemaMigracion:
             
             for base_nombre in bases_origen:
                 if base_nombre not in self.conexiones:
-                    self.logger.warning(f"Base {base_nombre} no disponible, omitiendo")
+                    self.logger.warning("Base %s no disponible, omitiendo", base_nombre)
                     continue
                 
                 # Obtener todos los registros de la base origen
@@ -899,56 +1430,86 @@ class SistemaMigracion:
                     continue
                 
                 tabla_origen = tabla_origen['name']
-                cursor_origen.execute(f"SELECT * FROM {tabla_origen}")
-                registros = cursor_origen.fetchall()
+                origen = f"{base_nombre}.{tabla_origen}"
+                self.logger.info("📊 Consolidando registros de %s", origen)
+                
+                # Vía directa: la copia se hace dentro de SQLite, sin pasar las filas por Python
+                try:
+                    nuevos = self._consolidar_adjuntando(
+                        migracion_id, base_nombre, tabla_origen, tabla_destino
+                    )
+                    total_general += nuevos
+                    exitosos_general += nuevos
+                    self._notificar_progreso(total_general, origen)
+                    continue
+                except Exception as e:
+                    self.conexiones['migracion'].rollback()
+                    self.logger.warning("⚠️ Consolidación directa de %s no disponible (%s), se copia por lotes", origen, e)
                 
-                self.logger.info(f"📊 Consolidando {len(registros)} registros de {base_nombre}.{tabla_origen}")
+                cursor_origen.execute(f"SELECT * FROM {tabla_origen}")
                 
-                for registro in registros:
+                # Por lotes: una consulta de existencia, un executemany y un commit por lote
+                for lote in self._iterar_lotes(cursor_origen):
+                    ids_lote = [registro['id'] for registro in lote]
+                    marcadores = ','.join('?' * len(ids_lote))
+                    cursor.execute(
+                        f"SELECT origen_id FROM {tabla_destino} WHERE origen_tabla = ? AND origen_id IN ({marcadores})",
+                        [origen] + ids_lote
+                    )
+                    ya_consolidados = {fila[0] for fila in cursor.fetchall()}
+                    nuevos = [registro for registro in lote if registro['id'] not in ya_consolidados]
+                    if not nuevos:
+                        continue
+                    
+                    total_general += len(nuevos)
                     try:
-                        # Verificar si ya existe consolidado
-                        cursor.execute(
-                            f"SELECT COUNT(*) FROM {tabla_destino} WHERE origen_tabla = ? AND origen_id = ?",
-                            (f"{base_nombre}.{tabla_origen}", registro['id'])
-                        )
-                        
-                        if cursor.fetchone()[0] > 0:
-                            continue
-                        
-                        # Insertar consolidado
-                        cursor.execute(f'''
+                        cursor.executemany(f'''
                             INSERT INTO {tabla_destino} (origen_tabla, origen_id, tipo_registro, datos_completos)
                             VALUES (?, ?, ?, ?)
-                        ''', (
-                            f"{base_nombre}.{tabla_origen}",
-                            registro['id'],
-                            base_nombre,
-                            json.dumps(dict(registro), ensure_ascii=False, default=str)
-                        ))
+                        ''', [
+                            (origen, registro['id'], base_nombre,
+                             UtilidadesCompartidas.json_texto(dict(registro)))
+                            for registro in nuevos
+                        ])
                         
-                        exitosos_general += 1
+                        # Ids de destino asignados en este lote
+                        ids_nuevos = [registro['id'] for registro in nuevos]
+                        cursor.execute(
+                            f"SELECT origen_id, id FROM {tabla_destino} WHERE origen_tabla = ? "
+                            f"AND origen_id IN ({','.join('?' * len(ids_nuevos))})",
+                            [origen] + ids_nuevos
+                        )
+                        destinos = dict(cursor.fetchall())
                         
                         # Registrar en detalle
-                        self._registrar_registro_migrado(migracion_id, {
-                            'registro_origen_id': registro['id'],
-                            'registro_destino_id': cursor.lastrowid,
-                            'tabla_origen': f"{base_nombre}.{tabla_origen}",
-                            'tabla_destino': tabla_destino,
-                            'estado': 'exitoso'
-                        })
+                        self._registrar_registros_migrados(migracion_id, [
+                            {
+                                'registro_origen_id': origen_id,
+                                'registro_destino_id': destinos.get(origen_id),
+                                'tabla_origen': origen,
+                                'tabla_destino': tabla_destino,
+                                'estado': 'exitoso'
+                            }
+                            for origen_id in ids_nuevos
+                        ], confirmar=False)
+                        self.conexiones['migracion'].commit()
+                        exitosos_general += len(nuevos)
+                        self._notificar_progreso(total_general, origen)
                         
                     except Exception as e:
-                        self.logger.error(f"Error consolidando registro {registro['id']}: {e}")
+                        self.conexiones['migracion'].rollback()
+                        self.logger.error("Error consolidando lote de %s: %s", origen, e)
                         
-                        self._registrar_registro_migrado(migracion_id, {
-                            'registro_origen_id': registro['id'],
-                            'tabla_origen': f"{base_nombre}.{tabla_origen}",
-                            'tabla_destino': tabla_destino,
-                            'estado': 'fallido',
-                            'error_mensaje': str(e)
-                        })
-                    
-                    total_general += 1
+                        self._registrar_registros_migrados(migracion_id, [
+                            {
+                                'registro_origen_id': registro['id'],
+                                'tabla_origen': origen,
+                                'tabla_destino': tabla_destino,
+                                'estado': 'fallido',
+                                'error_mensaje': str(e)
+                            }
+                            for registro in nuevos
+                        ])
             
             self.conexiones['migracion'].commit()
             
@@ -960,11 +1521,11 @@ class SistemaMigracion:
                 'tabla_creada': tabla_destino
             }
             
-            self.logger.info(f"✅ Consolidación completada: {exitosos_general}/{total_general} registros")
+            self.logger.info("✅ Consolidación completada: %s/%s registros", exitosos_general, total_general)
             return resultado
             
         except Exception as e:
-            self.logger.error(f"❌ Error en consolidación: {e}")
+            self.logger.error("❌ Error en consolidación: %s", e)
             raise
     
     def _limpiar_duplicados(self, migracion_id: int, configuracion: dict = None):
@@ -991,60 +1552,60 @@ class SistemaMigracion:
                 
                 for tabla_info in tablas:
                     tabla = tabla_info['name']
+                    self._notificar_progreso(total_analizados, f"{base_nombre}.{tabla}")
                     
                     # Identificar columnas únicas potenciales
                     cursor.execute(f"PRAGMA table_info({tabla})")
                     columnas = cursor.fetchall()
                     
+                    # Mantener el registro más reciente (si hay fecha)
+                    tiene_fecha_creacion = any(c[1] == 'fecha_creacion' for c in columnas)
+                    
                     # Buscar columnas que podrían identificar duplicados
-                    columnas_unicas = []
                     for col in columnas:
-                        col_name = col[1].lower()
-                        if any(keyword in col_name for keyword in ['id', 'codigo', 'matricula', 'curp', 'rfc', 'email', 'unique']):
-                            # Esta columna podría ser única, buscar duplicados
-                            cursor.execute(f"SELECT {col[1]}, COUNT(*) as cnt FROM {tabla} GROUP BY {col[1]} HAVING cnt > 1")
-                            duplicados = cursor.fetchall()
+                        if self._es_columna_candidata_duplicados(col[1]):
+                            # Esta columna podría ser única: una sola consulta con funciones de
+                            # ventana numera cada grupo de duplicados (el más reciente es el 1),
+                            # en lugar de una consulta por cada valor repetido
+                            orden = "fecha_creacion DESC, id DESC" if tiene_fecha_creacion else "id DESC"
+                            cursor.execute(f"""
+                                SELECT id, valor, posicion FROM (
+                                    SELECT id, {col[1]} AS valor,
+                                           ROW_NUMBER() OVER (PARTITION BY {col[1]} ORDER BY {orden}) AS posicion,
+                                           COUNT(*) OVER (PARTITION BY {col[1]}) AS repeticiones
+                                    FROM {tabla}
+                                    WHERE {col[1]} IS NOT NULL
+                                ) WHERE repeticiones > 1
+                            """)
+                            filas_duplicadas = cursor.fetchall()
                             
-                            if duplicados:
-                                self.logger.info(f"Encontrados {len(duplicados)} duplicados en {base_nombre}.{tabla} por columna {col[1]}")
+                            if filas_duplicadas:
+                                total_analizados += len(filas_duplicadas)
                                 
-                                for valor, cnt in duplicados:
-                                    total_analizados += cnt
-                                    
-                                    # Mantener el registro más reciente (si hay fecha)
-                                    if 'fecha_creacion' in [c[1] for c in columnas]:
-                                        cursor.execute(
-                                            f"SELECT id FROM {tabla} WHERE {col[1]} = ? ORDER BY fecha_creacion DESC",
-                                            (valor,)
-                                        )
-                                    else:
-                                        cursor.execute(
-                                            f"SELECT id FROM {tabla} WHERE {col[1]} = ? ORDER BY id DESC",
-                                            (valor,)
-                                        )
+                                # Mantener el primero de cada grupo, eliminar los demás
+                                eliminar = [(fila['id'], fila['valor']) for fila in filas_duplicadas if fila['posicion'] > 1]
+                                self.logger.info("Encontrados %s duplicados en %s.%s por columna %s", len(filas_duplicadas) - len(eliminar), base_nombre, tabla, col[1])
+                                
+                                try:
+                                    cursor.executemany(
+                                        f"DELETE FROM {tabla} WHERE id = ?",
+                                        [(eliminar_id,) for eliminar_id, _ in eliminar]
+                                    )
+                                    total_eliminados += len(eliminar)
                                     
-                                    registros = cursor.fetchall()
+                                    # Registrar en detalle
+                                    self._registrar_registros_migrados(migracion_id, [
+                                        {
+                                            'registro_origen_id': eliminar_id,
+                                            'tabla_origen': tabla,
+                                            'estado': 'exitoso',
+                                            'datos_origen': {'razon': 'duplicado', 'campo': col[1], 'valor': valor}
+                                        }
+                                        for eliminar_id, valor in eliminar
+                                    ])
                                     
-                                    # Mantener el primero, eliminar los demás
-                                    if len(registros) > 1:
-                                        mantener_id = registros[0]['id']
-                                        eliminar_ids = [r['id'] for r in registros[1:]]
-                                        
-                                        for eliminar_id in eliminar_ids:
-                                            try:
-                                                cursor.execute(f"DELETE FROM {tabla} WHERE id = ?", (eliminar_id,))
-                                                total_eliminados += 1
-                                                
-                                                # Registrar en detalle
-                                                self._registrar_registro_migrado(migracion_id, {
-                                                    'registro_origen_id': eliminar_id,
-                                                    'tabla_origen': tabla,
-                                                    'estado': 'exitoso',
-                                                    'datos_origen': {'razon': 'duplicado', 'campo': col[1], 'valor': valor}
-                                                })
-                                                
-                                            except Exception as e:
-                                                self.logger.error(f"Error eliminando duplicado {eliminar_id}: {e}")
+                                except Exception as e:
+                                    self.logger.error("Error eliminando duplicados por %s: %s", col[1], e)
             
             # Para cada base afectada, hacer commit
             for base_nombre in bases_a_limpiar:
@@ -1058,11 +1619,11 @@ class SistemaMigracion:
                 'espacio_liberado_estimado': total_eliminados * 1024  # 1KB por registro estimado
             }
             
-            self.logger.info(f"✅ Limpieza de duplicados: {total_eliminados} registros eliminados")
+            self.logger.info("✅ Limpieza de duplicados: %s registros eliminados", total_eliminados)
             return resultado
             
         except Exception as e:
-            self.logger.error(f"❌ Error en limpieza de duplicados: {e}")
+            self.logger.error("❌ Error en limpieza de duplicados: %s", e)
             raise
     
     def _migrar_historico(self, migracion_id: int, configuracion: dict = None):
@@ -1089,7 +1650,7 @@ class SistemaMigracion:
             return resultado
             
         except Exception as e:
-            self.logger.error(f"❌ Error en migración histórica: {e}")
+            self.logger.error("❌ Error en migración histórica: %s", e)
             raise
     
     # =============================================================================
@@ -1097,31 +1658,34 @@ class SistemaMigracion:
     # =============================================================================
     
     def obtener_plantillas_migracion(self, activas: bool = True):
-        """Obtener plantillas de migración disponibles"""
+        """Obtener plantillas de migración disponibles (desde _plantillas_en_cache)"""
         try:
-            cursor = self.conexiones['migracion'].cursor()
-            
-            query = "SELECT * FROM plantillas_migracion WHERE 1=1"
-            params = []
-            
-            if activas:
-                query += " AND activa = 1"
-            
-            query += " ORDER BY nombre"
-            cursor.execute(query, params)
-            
-            plantillas = []
-            for row in cursor.fetchall():
-                plantilla = dict(row)
-                plantilla['configuracion'] = json.loads(plantilla['configuracion'])
-                plantillas.append(plantilla)
-            
-            return plantillas
-            
+            return _plantillas_en_cache(self, activas)
         except Exception as e:
-            self.logger.error(f"❌ Error obteniendo plantillas: {e}")
+            self.logger.error("❌ Error obteniendo plantillas: %s", e)
             return []
     
+    def _leer_plantillas_migracion(self, activas: bool):
+        """Leer las plantillas de la base de control (los errores se propagan para no cachearlos)"""
+        cursor = self.conexiones['migracion'].cursor()
+        
+        query = "SELECT * FROM plantillas_migracion WHERE 1=1"
+        params = []
+        
+        if activas:
+            query += " AND activa = 1"
+        
+        query += " ORDER BY nombre"
+        cursor.execute(query, params)
+        
+        plantillas = []
+        for row in cursor.fetchall():
+            plantilla = dict(row)
+            plantilla['configuracion'] = json.loads(plantilla['configuracion'])
+            plantillas.append(plantilla)
+        
+        return plantillas
+    
     def guardar_plantilla_migracion(self, nombre: str, tipo_migracion: str, 
                                    configuracion: dict, descripcion: str = None):
         """Guardar o actualizar una plantilla de migración"""
@@ -1148,11 +1712,12 @@ class SistemaMigracion:
                 ''', (nombre, tipo_migracion, json.dumps(configuracion), descripcion))
             
             self.conexiones['migracion'].commit()
-            self.logger.info(f"✅ Plantilla guardada: {nombre}")
+            _plantillas_en_cache.clear()
+            self.logger.info("✅ Plantilla guardada: %s", nombre)
             return True
             
         except Exception as e:
-            self.logger.error(f"❌ Error guardando plantilla: {e}")
+            self.logger.error("❌ Error guardando plantilla: %s", e)
             raise
     
     # =============================================================================
@@ -1198,7 +1763,7 @@ class SistemaMigracion:
             return migraciones
             
         except Exception as e:
-            self.logger.error(f"❌ Error obteniendo historial: {e}")
+            self.logger.error("❌ Error obteniendo historial: %s", e)
             return []
     
     def obtener_estadisticas_migracion(self):
@@ -1250,7 +1815,7 @@ class SistemaMigracion:
             return estadisticas
             
         except Exception as e:
-            self.logger.error(f"❌ Error obteniendo estadísticas: {e}")
+            self.logger.error("❌ Error obteniendo estadísticas: %s", e)
             return {}
     
     def generar_reporte_migracion(self, migracion_id: int):
@@ -1297,13 +1862,24 @@ class SistemaMigracion:
             return reporte
             
         except Exception as e:
-            self.logger.error(f"❌ Error generando reporte: {e}")
+            self.logger.error("❌ Error generando reporte: %s", e)
             raise
     
     # =============================================================================
     # UTILIDADES
     # =============================================================================
     
+    def obtener_estado_ssh(self) -> dict:
+        """Estado de la conexión SSH ({'conectado', 'error'}) sin bloquear
+        
+        Se lee lo último observado por el hilo de vigilancia; sin conexión abierta,
+        el último resultado registrado en el estado persistente.
+        """
+        conectado = self.gestor_ssh.estado_vigilado['conectado']
+        if conectado is None:
+            conectado = bool(self.estado.estado.get('ssh_conectado'))
+        return {'conectado': conectado, 'error': self.estado.estado.get('ssh_error')}
+    
     def verificar_estado_bases(self):
         """Verificar estado de todas las bases de datos"""
         try:
@@ -1330,30 +1906,29 @@ class SistemaMigracion:
             return estado_bases
             
         except Exception as e:
-            self.logger.error(f"❌ Error verificando bases: {e}")
+            self.logger.error("❌ Error verificando bases: %s", e)
             return {}
     
     def crear_backup_migracion(self):
         """Crear backup de las bases de datos de migración"""
         try:
-            backup_dir = self.config.get('backup_dir', 'backups_migracion')
-            self.util.crear_directorio_si_no_existe(backup_dir)
-            
             timestamp = self.util.generar_timestamp()
             
             # Backup de base de control de migración
             if os.path.exists(self.db_migracion_path):
-                import shutil
-                backup_file = os.path.join(backup_dir, f"migracion_backup_{timestamp}.db")
-                shutil.copy2(self.db_migracion_path, backup_file)
+                backup_file = str(BACKUP_DIR / f"migracion_backup_{timestamp}.db")
+                if not self.util.respaldar_sqlite(self.db_migracion_path, backup_file,
+                                                  self.conexiones.get('migracion')):
+                    self.logger.error("❌ No se pudo copiar la base de control de migración")
+                    return None
                 
-                self.logger.info(f"✅ Backup de migración creado: {backup_file}")
+                self.logger.info("✅ Backup de migración creado: %s", backup_file)
                 return backup_file
             
             return None
             
         except Exception as e:
-            self.logger.error(f"❌ Error creando backup: {e}")
+            self.logger.error("❌ Error creando backup: %s", e)
             return None
     
     # =============================================================================
@@ -1362,13 +1937,15 @@ class SistemaMigracion:
     
     def mostrar_panel_control(self):
         """Mostrar panel de control principal"""
+        import pandas as pd  # importación diferida: solo las vistas con tablas la usan
+        
         st.title("🔄 Panel de Control - Sistema de Migración")
         
         # Verificar estado de conexión
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            if self.estado.estado.get('ssh_conectado'):
+            if self.obtener_estado_ssh()['conectado']:
                 st.success("✅ Conectado al servidor")
             else:
                 st.error("❌ Desconectado del servidor")
@@ -1467,25 +2044,24 @@ class SistemaMigracion:
                 
                 # Botón para ejecutar
                 if st.button(f"▶️ Ejecutar {plantilla['nombre']}", key=f"ejecutar_{plantilla['id']}"):
-                    with st.spinner(f"Ejecutando {plantilla['nombre']}..."):
-                        try:
-                            resultado = self.ejecutar_migracion(
-                                plantilla['tipo_migracion'],
-                                config,
-                                usuario=st.session_state.get('usuario', 'admin')
-                            )
+                    try:
+                        resultado = self._ejecutar_migracion_con_estado(
+                            plantilla['tipo_migracion'],
+                            config,
+                            usuario=st.session_state.get('usuario', 'admin')
+                        )
                             
-                            if resultado['exito']:
-                                st.success(f"✅ Migración completada: {resultado['exitosos']} registros exitosos")
-                            else:
-                                st.error(f"❌ Migración fallida: {resultado.get('fallidos', 0)} errores")
+                        if resultado['exito']:
+                            st.success(f"✅ Migración completada: {resultado['exitosos']} registros exitosos")
+                        else:
+                            st.error(f"❌ Migración fallida: {resultado.get('fallidos', 0)} errores")
                             
-                            # Mostrar detalles
-                            with st.expander("Ver detalles"):
-                                st.json(resultado)
+                        # Mostrar detalles
+                        with st.expander("Ver detalles"):
+                            st.json(resultado)
                                 
-                        except Exception as e:
-                            st.error(f"❌ Error ejecutando migración: {e}")
+                    except Exception as e:
+                        st.error(f"❌ Error ejecutando migración: {e}")
     
     def mostrar_migracion_personalizada(self):
         """Mostrar interfaz para migración personalizada"""
@@ -1566,55 +2142,54 @@ class SistemaMigracion:
             confirmar = st.checkbox("✅ Confirmar ejecución de migración")
             
             if confirmar:
-                with st.spinner(f"Ejecutando migración {tipo_migracion}..."):
-                    try:
-                        resultado = self.ejecutar_migracion(
-                            tipo_migracion,
-                            configuracion,
-                            usuario=st.session_state.get('usuario', 'admin')
-                        )
+                try:
+                    resultado = self._ejecutar_migracion_con_estado(
+                        tipo_migracion,
+                        configuracion,
+                        usuario=st.session_state.get('usuario', 'admin')
+                    )
                         
-                        # Mostrar resultados
-                        st.subheader("📊 Resultados de la Migración")
+                    # Mostrar resultados
+                    st.subheader("📊 Resultados de la Migración")
                         
-                        col1, col2, col3 = st.columns(3)
+                    col1, col2, col3 = st.columns(3)
                         
-                        with col1:
-                            st.metric("Total", resultado.get('total', 0))
+                    with col1:
+                        st.metric("Total", resultado.get('total', 0))
                         
-                        with col2:
-                            st.metric("Exitosos", resultado.get('exitosos', 0))
+                    with col2:
+                        st.metric("Exitosos", resultado.get('exitosos', 0))
                         
-                        with col3:
-                            st.metric("Fallidos", resultado.get('fallidos', 0))
+                    with col3:
+                        st.metric("Fallidos", resultado.get('fallidos', 0))
                         
-                        # Mostrar detalles si hay errores
-                        if resultado.get('fallidos', 0) > 0:
-                            with st.expander("📋 Ver errores detallados"):
-                                if 'detalles' in resultado:
-                                    for detalle in resultado['detalles']:
-                                        if detalle.get('estado') == 'fallido':
-                                            st.error(f"ID {detalle.get('registro_id')}: {detalle.get('razon', 'Error desconocido')}")
+                    # Mostrar detalles si hay errores
+                    if resultado.get('fallidos', 0) > 0:
+                        with st.expander("📋 Ver errores detallados"):
+                            if 'detalles' in resultado:
+                                for detalle in resultado['detalles']:
+                                    if detalle.get('estado') == 'fallido':
+                                        st.error(f"ID {detalle.get('registro_id')}: {detalle.get('razon', 'Error desconocido')}")
                         
-                        # Opción para guardar como plantilla
-                        if st.checkbox("💾 Guardar configuración como plantilla"):
-                            nombre_plantilla = st.text_input("Nombre de la plantilla:")
-                            descripcion = st.text_area("Descripción:")
+                    # Opción para guardar como plantilla
+                    if st.checkbox("💾 Guardar configuración como plantilla"):
+                        nombre_plantilla = st.text_input("Nombre de la plantilla:")
+                        descripcion = st.text_area("Descripción:")
                             
-                            if nombre_plantilla and st.button("Guardar Plantilla"):
-                                try:
-                                    self.guardar_plantilla_migracion(
-                                        nombre_plantilla,
-                                        tipo_migracion,
-                                        configuracion,
-                                        descripcion
-                                    )
-                                    st.success(f"✅ Plantilla '{nombre_plantilla}' guardada")
-                                except Exception as e:
-                                    st.error(f"❌ Error guardando plantilla: {e}")
+                        if nombre_plantilla and st.button("Guardar Plantilla"):
+                            try:
+                                self.guardar_plantilla_migracion(
+                                    nombre_plantilla,
+                                    tipo_migracion,
+                                    configuracion,
+                                    descripcion
+                                )
+                                st.success(f"✅ Plantilla '{nombre_plantilla}' guardada")
+                            except Exception as e:
+                                st.error(f"❌ Error guardando plantilla: {e}")
                         
-                    except Exception as e:
-                        st.error(f"❌ Error ejecutando migración: {e}")
+                except Exception as e:
+                    st.error(f"❌ Error ejecutando migración: {e}")
     
     def _configurar_estudiantes_a_egresados(self):
         """Configurar migración estudiantes -> egresados"""
@@ -1805,7 +2380,7 @@ class SistemaMigracion:
                 return {'estimados': 0, 'nota': 'Vista previa no disponible para este tipo'}
                 
         except Exception as e:
-            self.logger.error(f"❌ Error generando vista previa: {e}")
+            self.logger.error("❌ Error generando vista previa: %s", e)
             return None
     
     def _vista_previa_estudiantes_a_egresados(self, configuracion: dict):
@@ -1890,17 +2465,50 @@ class SistemaMigracion:
             'bases_a_consolidar': bases_origen
         }
     
+    @staticmethod
+    def _es_columna_candidata_duplicados(nombre_columna: str) -> bool:
+        """Indica si la columna podría identificar un registro (se buscan duplicados en ella)"""
+        nombre = nombre_columna.lower()
+        return any(palabra in nombre for palabra in PALABRAS_COLUMNAS_UNICAS)
+    
     def _vista_previa_limpiar_duplicados(self, configuracion: dict):
-        """Vista previa para limpiar duplicados"""
-        # Esta es una estimación simple
+        """Vista previa para limpiar duplicados
+        
+        Cuenta en SQLite, sin traer filas a Python, cuántos registros sobran por
+        columna candidata: COUNT(col) - COUNT(DISTINCT col).
+        """
+        total_estimado = 0
+        
+        for base_nombre in configuracion.get('bases', ['escuela']):
+            if base_nombre not in self.conexiones:
+                continue
+            
+            cursor = self.conexiones[base_nombre].cursor()
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
+            )
+            for tabla_info in cursor.fetchall():
+                tabla = tabla_info['name']
+                cursor.execute(f"PRAGMA table_info({tabla})")
+                candidatas = [col[1] for col in cursor.fetchall()
+                              if self._es_columna_candidata_duplicados(col[1])]
+                if not candidatas:
+                    continue
+                
+                sobrantes = ', '.join(f"COUNT({col}) - COUNT(DISTINCT {col})" for col in candidatas)
+                cursor.execute(f"SELECT {sobrantes} FROM {tabla}")
+                total_estimado += sum(cursor.fetchone())
+        
         return {
-            'estimados': 100,  # Estimación por defecto
+            'estimados': total_estimado,
             'tipo': 'limpiar_duplicados',
-            'nota': 'La cantidad exacta de duplicados se determina durante la ejecución'
+            'nota': 'Máximo estimado: un registro repetido en varias columnas se cuenta una vez por columna'
         }
     
     def mostrar_historial_detallado(self):
         """Mostrar historial detallado de migraciones"""
+        import pandas as pd  # importación diferida: solo las vistas con tablas la usan
+        
         st.title("📋 Historial de Migraciones")
         
         # Filtros
@@ -1909,13 +2517,13 @@ class SistemaMigracion:
         with col1:
             filtro_tipo = st.selectbox(
                 "Filtrar por tipo:",
-                ['Todos'] + TIPOS_MIGRACION
+                ('Todos',) + TIPOS_MIGRACION
             )
         
         with col2:
             filtro_estado = st.selectbox(
                 "Filtrar por estado:",
-                ['Todos'] + ESTADOS_MIGRACION
+                ('Todos',) + ESTADOS_MIGRACION
             )
         
         with col3:
@@ -1926,32 +2534,22 @@ class SistemaMigracion:
                 value=50
             )
         
-        # Obtener historial
-        historial = self.obtener_historial_migraciones(limite=limite)
+        # Obtener historial (objetos cacheados: no se modifican, se filtran a copias)
+        historial, tabla = _historial_en_cache(self, limite, SistemaMigracion._version_historial)
         
         # Aplicar filtros
-        if filtro_tipo != 'Todos':
-            historial = [m for m in historial if m['tipo_migracion'] == filtro_tipo]
-        
-        if filtro_estado != 'Todos':
-            historial = [m for m in historial if m['estado'] == filtro_estado]
+        if filtro_tipo != 'Todos' or filtro_estado != 'Todos':
+            seleccion = [
+                (filtro_tipo == 'Todos' or m['tipo_migracion'] == filtro_tipo)
+                and (filtro_estado == 'Todos' or m['estado'] == filtro_estado)
+                for m in historial
+            ]
+            historial = [m for m, elegida in zip(historial, seleccion) if elegida]
+            tabla = tabla[seleccion]
         
         if historial:
             # Mostrar tabla
-            datos = []
-            for mig in historial:
-                datos.append({
-                    'ID': mig['id'],
-                    'Tipo': mig['tipo_migracion'],
-                    'Estado': mig['estado'],
-                    'Registros': f"{mig.get('registros_exitosos', 0)}/{mig.get('total_registros', 0)}",
-                    'Duración': f"{mig.get('duracion_segundos', 0):.1f}s" if mig.get('duracion_segundos') else 'N/A',
-                    'Fecha Inicio': mig.get('fecha_inicio', '')[:19],
-                    'Usuario': mig.get('usuario_ejecutor', 'sistema')
-                })
-            
-            df = pd.DataFrame(datos)
-            st.dataframe(df, use_container_width=True)
+            st.dataframe(tabla, use_container_width=True)
             
             # Seleccionar migración para ver detalles
             st.subheader("🔍 Ver Detalles de Migración")
@@ -2011,8 +2609,7 @@ class SistemaMigracion:
                     
                     # Opción para exportar reporte
                     if st.button("📤 Exportar Reporte a JSON"):
-                        import json as json_lib
-                        json_str = json_lib.dumps(reporte, indent=2, ensure_ascii=False, default=str)
+                        json_str = json.dumps(reporte, indent=2, ensure_ascii=False, default=str)
                         
                         st.download_button(
                             label="⬇️ Descargar Reporte JSON",
@@ -2028,6 +2625,8 @@ class SistemaMigracion:
     
     def mostrar_estadisticas(self):
         """Mostrar estadísticas del sistema de migración"""
+        import pandas as pd  # importación diferida: solo las vistas con tablas la usan
+        
         st.title("📊 Estadísticas del Sistema de Migración")
         
         estadisticas = self.obtener_estadisticas_migracion()
@@ -2194,6 +2793,8 @@ class SistemaMigracion:
     
     def _mostrar_gestion_backups(self):
         """Mostrar gestión de backups"""
+        import pandas as pd  # importación diferida: solo las vistas con tablas la usan
+        
         st.subheader("💾 Gestión de Backups")
         
         # Crear backup manual
@@ -2206,20 +2807,18 @@ class SistemaMigracion:
                     st.error("❌ Error creando backup")
         
         # Listar backups existentes
-        backup_dir = self.config.get('backup_dir', 'backups_migracion')
-        
-        if os.path.exists(backup_dir):
+        if BACKUP_DIR.is_dir():
             backups = []
-            for file in os.listdir(backup_dir):
-                if file.endswith('.db'):
-                    file_path = os.path.join(backup_dir, file)
-                    size_mb = os.path.getsize(file_path) / (1024 * 1024)
-                    mtime = datetime.fromtimestamp(os.path.getmtime(file_path))
-                    backups.append({
-                        'Archivo': file,
-                        'Tamaño (MB)': f"{size_mb:.2f}",
-                        'Fecha': mtime.strftime('%Y-%m-%d %H:%M:%S')
-                    })
+            for ruta in BACKUP_DIR.glob('*.db'):
+                # Un único stat por archivo para tamaño y fecha
+                info = ruta.stat()
+                size_mb = info.st_size / (1024 * 1024)
+                mtime = datetime.fromtimestamp(info.st_mtime)
+                backups.append({
+                    'Archivo': ruta.name,
+                    'Tamaño (MB)': f"{size_mb:.2f}",
+                    'Fecha': mtime.strftime('%Y-%m-%d %H:%M:%S')
+                })
             
             if backups:
                 st.write(f"**📦 Backups encontrados ({len(backups)}):**")
@@ -2377,59 +2976,105 @@ class SistemaMigracion:
             
             # Prueba de migración
             if st.button("🧪 Ejecutar Prueba de Migración"):
-                with st.spinner("Ejecutando prueba..."):
-                    try:
-                        resultado = self.ejecutar_migracion(
-                            'estudiantes_a_egresados',
-                            {
-                                'criterios': {'estado_estudiante': 'Activo', 'semestre_minimo': 10},
-                                'opciones': {'modo_prueba': True}
-                            },
-                            usuario='admin_prueba'
-                        )
+                try:
+                    resultado = self._ejecutar_migracion_con_estado(
+                        'estudiantes_a_egresados',
+                        {
+                            'criterios': {'estado_estudiante': 'Activo', 'semestre_minimo': 10},
+                            'opciones': {'modo_prueba': True}
+                        },
+                        usuario='admin_prueba'
+                    )
                         
-                        if resultado.get('exito'):
-                            st.success(f"✅ Prueba exitosa: {resultado.get('exitosos', 0)} registros simulados")
-                        else:
-                            st.error(f"❌ Prueba fallida")
+                    if resultado.get('exito'):
+                        st.success(f"✅ Prueba exitosa: {resultado.get('exitosos', 0)} registros simulados")
+                    else:
+                        st.error(f"❌ Prueba fallida")
                         
-                        with st.expander("Ver detalles de prueba"):
-                            st.json(resultado)
+                    with st.expander("Ver detalles de prueba"):
+                        st.json(resultado)
                             
-                    except Exception as e:
-                        st.error(f"❌ Error en prueba: {e}")
+                except Exception as e:
+                    st.error(f"❌ Error en prueba: {e}")
 
 # =============================================================================
 # FUNCIÓN PRINCIPAL DE LA APLICACIÓN
 # =============================================================================
 
-def main():
-    """Función principal de la aplicación"""
+# Módulos de la navegación: opción del menú -> método que la muestra
+MODULOS = {
+    "🏠 Panel de Control": SistemaMigracion.mostrar_panel_control,
+    "🚀 Migraciones Rápidas": SistemaMigracion.mostrar_migraciones_rapidas,
+    "🎛️ Migración Personalizada": SistemaMigracion.mostrar_migracion_personalizada,
+    "📋 Historial de Migraciones": SistemaMigracion.mostrar_historial_detallado,
+    "📊 Estadísticas": SistemaMigracion.mostrar_estadisticas,
+    "⚙️ Administración": SistemaMigracion.mostrar_administracion
+}
+OPCIONES_MODULOS = tuple(MODULOS)
+
+@st.fragment
+def _fragmento_barra_lateral(sistema):
+    """Estado del sistema, acciones rápidas e información de la barra lateral
     
-    # Configurar página de Streamlit
-    st.set_page_config(
-        page_title=APP_TITLE,
-        page_icon=APP_ICON,
-        layout="wide",
-        initial_sidebar_state="expanded"
-    )
+    Al ser un fragmento, pulsar sus botones solo re-ejecuta este bloque y no el
+    módulo abierto en el área principal.
+    """
+    # Estado del sistema
+    st.subheader("📊 Estado del Sistema")
     
-    # Verificar si es administrador (simulado)
-    # En un sistema real, aquí iría la autenticación
-    es_administrador = st.sidebar.checkbox("🔐 Modo Administrador", value=True)
+    if sistema.estado.esta_inicializada():
+        st.success("✅ Sistema listo")
+    else:
+        st.error("❌ Sistema no inicializado")
     
-    if not es_administrador:
-        st.error("⛔ Acceso denegado. Se requiere permisos de administrador.")
-        st.stop()
+    estado_bases = sistema.verificar_estado_bases()
+    bases_ok = sum(1 for b in estado_bases.values() if b.get('conectada'))
+    st.write(f"Bases: {bases_ok}/{len(estado_bases)} conectadas")
     
-    # Inicializar sistema
-    try:
-        sistema = SistemaMigracion()
-        logger.info("✅ Sistema de Migración inicializado")
-    except Exception as e:
-        st.error(f"❌ Error crítico al inicializar el sistema: {e}")
-        logger.error(f"❌ Error inicializando sistema: {e}")
-        return
+    st.markdown("---")
+    
+    # Acciones rápidas
+    st.subheader("⚡ Acciones Rápidas")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("🔄 Sync"):
+            with st.spinner("Sincronizando..."):
+                if sistema.sincronizar_bases_datos():
+                    st.success("✅ Sync OK")
+                    # Las bases recién descargadas afectan también al módulo abierto
+                    st.rerun()
+    
+    with col2:
+        if st.button("💾 Backup"):
+            backup_path = sistema.crear_backup_migracion()
+            if backup_path:
+                st.success("✅ Backup OK")
+    
+    st.markdown("---")
+    
+    # Información del sistema
+    estadisticas = sistema.obtener_estadisticas_migracion()
+    total_mig = estadisticas.get('generales', {}).get('total_migraciones', 0)
+    
+    st.caption(f"Versión: 3.0")
+    st.caption(f"Migraciones: {total_mig}")
+    st.caption(f"Última sync: {sistema.estado.fecha_legible('ultima_sincronizacion') or 'Nunca'}")
+
+@st.cache_resource(show_spinner=False)
+def obtener_sistema_migracion():
+    """Sistema de migración compartido por todas las sesiones del proceso
+    
+    Un único dueño de las conexiones a las réplicas locales: la inicialización y
+    la sincronización inicial se hacen una vez, no en cada rerun o pestaña.
+    """
+    sistema = SistemaMigracion()
+    logger.info("✅ Sistema de Migración inicializado")
+    return sistema
+
+def _ejecutar_aplicacion():
+    """Obtener el sistema, dibujar la barra lateral y mostrar el módulo elegido"""
+    sistema = obtener_sistema_migracion()
     
     # Barra lateral con navegación
     with st.sidebar:
@@ -2437,81 +3082,51 @@ def main():
         st.title(APP_TITLE)
         st.markdown("---")
         
-        # Estado del sistema
-        st.subheader("📊 Estado del Sistema")
-        
-        if sistema.estado.esta_inicializada():
-            st.success("✅ Sistema listo")
-        else:
-            st.error("❌ Sistema no inicializado")
-        
-        estado_bases = sistema.verificar_estado_bases()
-        bases_ok = sum(1 for b in estado_bases.values() if b.get('conectada'))
-        st.write(f"Bases: {bases_ok}/{len(estado_bases)} conectadas")
-        
-        st.markdown("---")
-        
         # Navegación
         st.subheader("🧭 Navegación")
         opcion = st.radio(
             "Seleccionar módulo:",
-            [
-                "🏠 Panel de Control",
-                "🚀 Migraciones Rápidas",
-                "🎛️ Migración Personalizada",
-                "📋 Historial de Migraciones",
-                "📊 Estadísticas",
-                "⚙️ Administración"
-            ]
+            OPCIONES_MODULOS
         )
         
         st.markdown("---")
         
-        # Acciones rápidas
-        st.subheader("⚡ Acciones Rápidas")
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            if st.button("🔄 Sync"):
-                with st.spinner("Sincronizando..."):
-                    if sistema.sincronizar_bases_datos():
-                        st.success("✅ Sync OK")
-                        st.rerun()
-        
-        with col2:
-            if st.button("💾 Backup"):
-                backup_path = sistema.crear_backup_migracion()
-                if backup_path:
-                    st.success("✅ Backup OK")
-        
-        st.markdown("---")
-        
-        # Información del sistema
-        estadisticas = sistema.obtener_estadisticas_migracion()
-        total_mig = estadisticas.get('generales', {}).get('total_migraciones', 0)
-        
-        st.caption(f"Versión: 3.0")
-        st.caption(f"Migraciones: {total_mig}")
-        st.caption(f"Última sync: {sistema.estado.estado.get('ultima_sincronizacion', 'Nunca')}")
+        # Estado, acciones rápidas e información: fragmento propio
+        _fragmento_barra_lateral(sistema)
     
     # Contenido principal basado en la selección
-    if opcion == "🏠 Panel de Control":
-        sistema.mostrar_panel_control()
+    MODULOS.get(opcion, SistemaMigracion.mostrar_panel_control)(sistema)
+
+def main():
+    """Función principal de la aplicación"""
     
-    elif opcion == "🚀 Migraciones Rápidas":
-        sistema.mostrar_migraciones_rapidas()
+    # Configurar página de Streamlit
+    st.set_page_config(
+        page_title=APP_TITLE,
+        page_icon=APP_ICON,
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
     
-    elif opcion == "🎛️ Migración Personalizada":
-        sistema.mostrar_migracion_personalizada()
+    # Verificar si es administrador (simulado)
+    # En un sistema real, aquí iría la autenticación
+    es_administrador = st.sidebar.checkbox("🔐 Modo Administrador", value=True)
     
-    elif opcion == "📋 Historial de Migraciones":
-        sistema.mostrar_historial_detallado()
+    # Recolección completa periódica para acotar el crecimiento del heap
+    st.session_state['num_ejecucion'] = st.session_state.get('num_ejecucion', 0) + 1
+    if st.session_state['num_ejecucion'] % GC_RECOLECTAR_CADA == 0:
+        gc.collect()
     
-    elif opcion == "📊 Estadísticas":
-        sistema.mostrar_estadisticas()
+    if not es_administrador:
+        st.error("⛔ Acceso denegado. Se requiere permisos de administrador.")
+        st.stop()
     
-    elif opcion == "⚙️ Administración":
-        sistema.mostrar_administracion()
+    # Un único manejador para la inicialización y el módulo elegido
+    try:
+        _ejecutar_aplicacion()
+    except Exception as e:
+        st.error(f"❌ Error crítico en el sistema de migración: {e}")
+        logger.error("❌ Error en la aplicación: %s", e, exc_info=True)
     
     # Pie de página
     st.markdown("---")
@@ -7,11 +7,23 @@ Versión corregida para Streamlit Cloud - Error de socket resuelto
 import os
 import sys
 import logging
+import logging.handlers
+import atexit
+import queue
 import json
+import re
+import threading
+import time
 from datetime import datetime
 from typing import Dict, Any, Optional, Tuple
 import warnings
-warnings.filterwarnings('ignore')
+
+# Advertencias silenciadas para todas las apps (los filtros son globales al proceso):
+# solo categorías y módulos de origen conocidos y ruidosos, no un 'ignore' general
+warnings.filterwarnings('ignore', category=FutureWarning, module='pandas')
+warnings.filterwarnings('ignore', category=DeprecationWarning, module='paramiko')
+# Algoritmos obsoletos que paramiko sigue registrando (avisos de cryptography)
+warnings.filterwarnings('ignore', message='.*(TripleDES|Blowfish)', module='paramiko')
 
 # =============================================================================
 # IMPORTACIONES CONDICIONALES - CORREGIDO
@@ -32,24 +44,42 @@ except ImportError:
         HAS_TOMLLIB = False
         tomllib = None
 
+# orjson (opcional): serialización más rápida del estado persistente
+HAS_ORJSON = False
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    orjson = None
+
 # =============================================================================
 # CONFIGURACIÓN DE LOGGING COMPARTIDO
 # =============================================================================
 
 class SistemaLogging:
-    """Sistema de logging centralizado para todos los sistemas"""
+    """Sistema de logging centralizado para todos los sistemas
+    
+    Los loggers solo encolan los registros (QueueHandler); un QueueListener en
+    segundo plano los formatea y escribe en consola/archivo, de modo que las
+    rutas de la interfaz no esperan por la E/S de los logs.
+    """
     
     _instancias = {}
+    _listeners = []
     
     @classmethod
-    def obtener_logger(cls, nombre_sistema: str, archivo_log: str = None):
-        """Obtener o crear logger para un sistema específico"""
+    def obtener_logger(cls, nombre_sistema: str, archivo_log: str = None, nivel: str = 'DEBUG'):
+        """Obtener o crear logger para un sistema específico
+        
+        nivel filtra en el propio logger (Logger.isEnabledFor): los registros por
+        debajo se descartan antes de formatear el mensaje o encolarlo.
+        """
         if nombre_sistema not in cls._instancias:
-            cls._instancias[nombre_sistema] = cls._crear_logger(nombre_sistema, archivo_log)
+            cls._instancias[nombre_sistema] = cls._crear_logger(nombre_sistema, archivo_log, nivel)
         return cls._instancias[nombre_sistema]
     
     @staticmethod
-    def _crear_logger(nombre_sistema: str, archivo_log: str = None):
+    def _crear_logger(nombre_sistema: str, archivo_log: str = None, nivel: str = 'DEBUG'):
         """Crear logger específico para un sistema"""
         logger = logging.getLogger(f"escuela.{nombre_sistema}")
         
@@ -57,7 +87,7 @@ class SistemaLogging:
         if logger.handlers:
             return logger
         
-        logger.setLevel(logging.DEBUG)
+        logger.setLevel(getattr(logging, str(nivel).upper(), logging.DEBUG))
         
         # Formato detallado
         formatter = logging.Formatter(
@@ -86,8 +116,33 @@ class SistemaLogging:
                 print(f"⚠️ No se pudo crear archivo de log {archivo_log}: {e}")
                 # Continuar solo con consola
         
-        logger.addHandler(console_handler)
+        handlers = [console_handler] + [h for h in logger.handlers]
+        logger.handlers.clear()
+        
+        # Encolar registros y escribirlos desde un hilo en segundo plano
+        cola_logs = queue.SimpleQueue()
+        logger.addHandler(logging.handlers.QueueHandler(cola_logs))
+        
+        listener = logging.handlers.QueueListener(cola_logs, *handlers, respect_handler_level=True)
+        listener.start()
+        SistemaLogging._listeners.append(listener)
+        
         return logger
+    
+    @classmethod
+    def detener_listeners(cls):
+        """Vaciar las colas pendientes y detener los hilos de logging"""
+        while cls._listeners:
+            try:
+                cls._listeners.pop().stop()
+            except Exception:
+                pass
+
+
+atexit.register(SistemaLogging.detener_listeners)
+
+# Logger del módulo compartido
+_logger = SistemaLogging.obtener_logger('compartido')
 
 # =============================================================================
 # CARGADOR DE CONFIGURACIÓN CENTRALIZADO
@@ -97,6 +152,7 @@ class CargadorConfiguracion:
     """Carga y gestiona configuración desde secrets.toml"""
     
     _config_cache = None
+    _configs_sistema: Dict[str, Dict[str, Any]] = {}
     
     @classmethod
     def cargar_configuracion(cls):
@@ -105,7 +161,7 @@ class CargadorConfiguracion:
             try:
                 cls._config_cache = cls._cargar_desde_archivo()
             except Exception as e:
-                print(f"⚠️ Error cargando configuración: {e}")
+                _logger.warning("⚠️ Error cargando configuración: %s", e)
                 cls._config_cache = cls._configuracion_por_defecto()
         return cls._config_cache
     
@@ -130,7 +186,7 @@ class CargadorConfiguracion:
         for ruta in posibles_rutas:
             if os.path.exists(ruta):
                 ruta_encontrada = ruta
-                print(f"✅ Encontrado secrets.toml en: {ruta}")
+                _logger.info("✅ Encontrado secrets.toml en: %s", ruta)
                 break
         
         if not ruta_encontrada:
@@ -140,13 +196,13 @@ class CargadorConfiguracion:
         with open(ruta_encontrada, 'rb') as f:
             config = tomllib.load(f)
         
-        print(f"✅ Configuración cargada desde {ruta_encontrada}")
+        _logger.info("✅ Configuración cargada desde %s", ruta_encontrada)
         return config
     
     @staticmethod
     def _configuracion_por_defecto() -> Dict[str, Any]:
         """Configuración por defecto cuando no hay secrets.toml"""
-        print("⚠️ Usando configuración por defecto (modo local sin SSH)")
+        _logger.warning("⚠️ Usando configuración por defecto (modo local sin SSH)")
         
         return {
             'ssh': {
@@ -196,7 +252,18 @@ class CargadorConfiguracion:
     
     @classmethod
     def obtener_config_sistema(cls, nombre_sistema: str) -> Dict[str, Any]:
-        """Obtener configuración específica para un sistema"""
+        """Obtener configuración específica para un sistema
+        
+        La fusión y validación se hacen una sola vez por sistema; las llamadas
+        siguientes devuelven el mismo diccionario.
+        """
+        if nombre_sistema not in cls._configs_sistema:
+            cls._configs_sistema[nombre_sistema] = cls._construir_config_sistema(nombre_sistema)
+        return cls._configs_sistema[nombre_sistema]
+    
+    @classmethod
+    def _construir_config_sistema(cls, nombre_sistema: str) -> Dict[str, Any]:
+        """Fusionar la configuración común con la del sistema y validarla"""
         config = cls.cargar_configuracion()
         
         # Configuración base común (siempre disponible)
@@ -216,9 +283,9 @@ class CargadorConfiguracion:
             if isinstance(sistema_config, dict):
                 config_base.update(sistema_config)
             else:
-                print(f"⚠️ Configuración para {nombre_sistema} no es un diccionario, ignorando")
+                _logger.warning("⚠️ Configuración para %s no es un diccionario, ignorando", nombre_sistema)
         else:
-            print(f"⚠️ No se encontró configuración específica para {nombre_sistema}")
+            _logger.warning("⚠️ No se encontró configuración específica para %s", nombre_sistema)
         
         # Validar y completar configuraciones faltantes
         config_base = ValidacionConfiguracion.validar_y_completar_config(config_base, nombre_sistema)
@@ -310,11 +377,37 @@ class ValidacionConfiguracion:
 class EstadoPersistenteBase:
     """Clase base para estado persistente de cualquier sistema"""
     
+    # Segundos mínimos entre dos escrituras del archivo de estado; los cambios
+    # dentro del intervalo se agrupan en una sola escritura diferida
+    INTERVALO_MINIMO_GUARDADO = 2.0
+    
+    # Formato legible de los instantes del estado ('<clave>_str', calculado al escribir)
+    FORMATO_FECHA_LEGIBLE = '%Y-%m-%d %H:%M:%S'
+    
+    # Atributos compartidos por archivo de estado: Streamlit crea una instancia nueva
+    # en cada rerun y todas deben leer y escribir el mismo dict (una sola escritura
+    # diferida y un solo volcado al salir por proceso)
+    _compartidos: Dict[str, Dict[str, Any]] = {}
+    _lock_compartidos = threading.Lock()
+    
     def __init__(self, archivo_estado: str, nombre_sistema: str):
-        self.archivo_estado = archivo_estado
-        self.nombre_sistema = nombre_sistema
-        self.logger = SistemaLogging.obtener_logger(nombre_sistema)
-        self.estado = self._cargar_estado()
+        with EstadoPersistenteBase._lock_compartidos:
+            compartido = EstadoPersistenteBase._compartidos.get(archivo_estado)
+            if compartido is not None:
+                self.__dict__ = compartido
+                return
+            
+            self.archivo_estado = archivo_estado
+            self.nombre_sistema = nombre_sistema
+            self.logger = SistemaLogging.obtener_logger(nombre_sistema)
+            self.estado = self._cargar_estado()
+            
+            self._lock_guardado = threading.Lock()
+            self._ultimo_guardado = 0.0
+            self._guardado_programado = None
+            EstadoPersistenteBase._compartidos[archivo_estado] = self.__dict__
+        
+        atexit.register(self._volcar_pendiente)
     
     def _cargar_estado(self) -> Dict[str, Any]:
         """Cargar estado desde archivo JSON"""
@@ -325,15 +418,15 @@ class EstadoPersistenteBase:
             estado_path = os.path.join(temp_dir, self.archivo_estado)
             
             if os.path.exists(estado_path):
-                with open(estado_path, 'r', encoding='utf-8') as f:
-                    estado = json.load(f)
+                with open(estado_path, 'rb') as f:
+                    estado = self._deserializar_estado(f.read())
                     # Asegurar estructura básica
                     return self._migrar_estructura_estado(estado)
             else:
                 # Verificar también en directorio actual por compatibilidad
                 if os.path.exists(self.archivo_estado):
-                    with open(self.archivo_estado, 'r', encoding='utf-8') as f:
-                        estado = json.load(f)
+                    with open(self.archivo_estado, 'rb') as f:
+                        estado = self._deserializar_estado(f.read())
                         return self._migrar_estructura_estado(estado)
                         
         except Exception as e:
@@ -389,43 +482,101 @@ class EstadoPersistenteBase:
             'version_estructura': '2.0'
         }
     
+    @staticmethod
+    def _serializar_estado(estado: Dict[str, Any]) -> bytes:
+        """Serializar el estado a JSON (orjson si está instalado)"""
+        if HAS_ORJSON:
+            return orjson.dumps(estado, default=str,
+                                option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        return json.dumps(estado, indent=2, default=str).encode('utf-8')
+    
+    @staticmethod
+    def _deserializar_estado(contenido: bytes) -> Dict[str, Any]:
+        """Leer el JSON del estado (orjson si está instalado)"""
+        if HAS_ORJSON:
+            return orjson.loads(contenido)
+        return json.loads(contenido.decode('utf-8'))
+    
+    @staticmethod
+    def _escribir_atomico(ruta: str, contenido: bytes):
+        """Escribir en un temporal y reemplazar: el archivo nunca queda a medio escribir"""
+        ruta_temporal = f"{ruta}.tmp"
+        with open(ruta_temporal, 'wb') as f:
+            f.write(contenido)
+        os.replace(ruta_temporal, ruta)
+    
     def guardar_estado(self):
-        """Guardar estado a archivo JSON"""
-        try:
-            # En Streamlit Cloud, usar directorio temporal
-            import tempfile
-            temp_dir = tempfile.gettempdir()
-            estado_path = os.path.join(temp_dir, self.archivo_estado)
+        """Guardar estado a archivo JSON
+        
+        Como mucho una escritura cada INTERVALO_MINIMO_GUARDADO segundos: si la
+        anterior fue hace menos, se programa una sola escritura diferida que recoge
+        todos los cambios hechos mientras tanto.
+        """
+        with self._lock_guardado:
+            if self._guardado_programado is not None:
+                return
+            
+            espera = self._ultimo_guardado + self.INTERVALO_MINIMO_GUARDADO - time.monotonic()
+            if espera > 0:
+                self._guardado_programado = threading.Timer(espera, self.volcar_estado)
+                self._guardado_programado.daemon = True
+                self._guardado_programado.start()
+                return
+        
+        self.volcar_estado()
+    
+    def volcar_estado(self):
+        """Escribir el estado en disco inmediatamente"""
+        with self._lock_guardado:
+            self._guardado_programado = None
+            self._ultimo_guardado = time.monotonic()
+            
+            try:
+                contenido = self._serializar_estado(self.estado)
+            except Exception as e:
+                self.logger.error(f"❌ Error serializando estado: {e}")
+                return
             
-            with open(estado_path, 'w', encoding='utf-8') as f:
-                json.dump(self.estado, f, indent=2, default=str)
-            self.logger.debug(f"Estado guardado en {estado_path}")
-        except Exception as e:
-            self.logger.error(f"❌ Error guardando estado: {e}")
-            # Intentar en directorio actual como fallback
             try:
-                with open(self.archivo_estado, 'w', encoding='utf-8') as f:
-                    json.dump(self.estado, f, indent=2, default=str)
-            except Exception as e2:
-                self.logger.error(f"❌ Error crítico guardando estado: {e2}")
+                # En Streamlit Cloud, usar directorio temporal
+                import tempfile
+                temp_dir = tempfile.gettempdir()
+                estado_path = os.path.join(temp_dir, self.archivo_estado)
+                
+                self._escribir_atomico(estado_path, contenido)
+                self.logger.debug(f"Estado guardado en {estado_path}")
+            except Exception as e:
+                self.logger.error(f"❌ Error guardando estado: {e}")
+                # Intentar en directorio actual como fallback
+                try:
+                    self._escribir_atomico(self.archivo_estado, contenido)
+                except Exception as e2:
+                    self.logger.error(f"❌ Error crítico guardando estado: {e2}")
+    
+    def _volcar_pendiente(self):
+        """Al salir del proceso, escribir la escritura diferida que quede pendiente"""
+        programado = self._guardado_programado
+        if programado is not None:
+            programado.cancel()
+            self.volcar_estado()
     
     def marcar_db_inicializada(self):
         """Marcar la base de datos como inicializada"""
         self.estado['db_inicializada'] = True
-        self.estado['fecha_inicializacion'] = self._timestamp_actual()
+        self._marcar_instante('fecha_inicializacion')
         self.guardar_estado()
         self.logger.info(f"✅ Base de datos marcada como inicializada para {self.nombre_sistema}")
     
     def marcar_sincronizacion(self):
         """Marcar última sincronización"""
-        self.estado['ultima_sincronizacion'] = self._timestamp_actual()
+        self._marcar_instante('ultima_sincronizacion')
         self.guardar_estado()
     
     def set_ssh_conectado(self, conectado: bool, error: str = None):
         """Establecer estado de conexión SSH"""
         self.estado['ssh_conectado'] = conectado
         self.estado['ssh_error'] = error
-        self.estado['ultima_verificacion'] = self._timestamp_actual()
+        self._marcar_instante('ultima_verificacion')
         self.guardar_estado()
     
     def registrar_migracion(self, exitosa: bool = True, tiempo_ejecucion: float = 0):
@@ -438,7 +589,7 @@ class EstadoPersistenteBase:
             self.estado['estadisticas_migracion']['fallidas'] += 1
         
         self.estado['estadisticas_migracion']['total_tiempo'] += tiempo_ejecucion
-        self.estado['ultima_migracion'] = self._timestamp_actual()
+        self._marcar_instante('ultima_migracion')
         self.guardar_estado()
     
     def registrar_backup(self):
@@ -450,6 +601,30 @@ class EstadoPersistenteBase:
         """Obtener timestamp actual en formato ISO"""
         return datetime.now().isoformat()
     
+    def _marcar_instante(self, clave: str):
+        """Guardar el instante actual en ISO y, junto a él, su versión legible ('<clave>_str')"""
+        ahora = datetime.now()
+        self.estado[clave] = ahora.isoformat()
+        self.estado[f'{clave}_str'] = ahora.strftime(self.FORMATO_FECHA_LEGIBLE)
+    
+    def fecha_legible(self, clave: str) -> Optional[str]:
+        """Instante del estado ya formateado para mostrar (None si no existe)
+        
+        Se lee la versión precalculada al escribir; los archivos de estado antiguos,
+        sin ella, se formatean aquí a partir del valor ISO.
+        """
+        legible = self.estado.get(f'{clave}_str')
+        if legible:
+            return legible
+        
+        valor = self.estado.get(clave)
+        if not valor:
+            return None
+        try:
+            return datetime.fromisoformat(valor).strftime(self.FORMATO_FECHA_LEGIBLE)
+        except (TypeError, ValueError):
+            return valor
+    
     def esta_inicializada(self) -> bool:
         """Verificar si la BD está inicializada"""
         return self.estado.get('db_inicializada', False)
@@ -479,6 +654,21 @@ class GestorSSHCompartido:
     _ssh_client = None
     _sftp_client = None
     
+    # Último estado consultado con conexion_activa(): (instante monotónico, valor)
+    VIGENCIA_ESTADO_CONEXION = 2.0
+    _estado_conexion = None
+    
+    # Ventana y paquete máximo de los canales (SFTP incluido): con los valores por
+    # defecto de paramiko las transferencias quedan limitadas por la latencia
+    VENTANA_CANAL = 2 ** 27
+    PAQUETE_MAXIMO_CANAL = 2 ** 19
+    
+    # Vigilancia en segundo plano: un hilo por proceso y el último estado observado,
+    # que la interfaz lee sin bloquear ('conectado' es None si no hay conexión abierta)
+    _hilo_vigilancia = None
+    _oyentes_vigilancia = []
+    estado_vigilado = {'conectado': None, 'actualizado': None}
+    
     def __new__(cls):
         if cls._instancia is None:
             cls._instancia = super().__new__(cls)
@@ -499,13 +689,21 @@ class GestorSSHCompartido:
             self.ssh_config = {'enabled': False}
     
     def conectar(self) -> bool:
+        """Establecer conexión SSH con el servidor remoto (invalida el estado cacheado)"""
+        try:
+            return self._conectar()
+        finally:
+            self._estado_conexion = None
+            self._actualizar_estado_vigilado(self.conexion_activa())
+    
+    def _conectar(self) -> bool:
         """Establecer conexión SSH con el servidor remoto - CORREGIDO ERROR DE SOCKET"""
         # IMPORTAR socket y paramiko DENTRO de la función para evitar problemas de scope
         try:
             import paramiko
             import socket  # ← Importado dentro de la función
         except ImportError as e:
-            self.logger.error(f"❌ Librerías SSH no disponibles: {e}")
+            self.logger.error("❌ Librerías SSH no disponibles: %s", e)
             self.logger.info("⚠️ Instalar con: pip install paramiko")
             return False
         
@@ -522,7 +720,7 @@ class GestorSSHCompartido:
                 self.logger.debug("Conexión SSH ya activa, reutilizando")
                 return True
             
-            self.logger.info(f"🔗 Conectando SSH a {self.ssh_config['host']}:{self.ssh_config.get('port', 22)}...")
+            self.logger.info("🔗 Conectando SSH a %s:%s...", self.ssh_config['host'], self.ssh_config.get('port', 22))
             
             self._ssh_client = paramiko.SSHClient()
             self._ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
@@ -537,27 +735,39 @@ class GestorSSHCompartido:
                 timeout=timeout,
                 banner_timeout=timeout,
                 allow_agent=False,
-                look_for_keys=False
+                look_for_keys=False,
+                # zlib en el transporte: las bases SQLite se comprimen bien y las
+                # descargas mueven menos bytes (ssh.compress: false en redes rápidas)
+                compress=self.ssh_config.get('compress', True)
             )
             
+            # Keepalive del transporte (hilo propio de paramiko) para que la conexión
+            # compartida no se cierre por inactividad entre usos
+            transporte = self._ssh_client.get_transport()
+            transporte.set_keepalive(self.ssh_config.get('keepalive_interval', 30))
+            
+            # Los canales abiertos a partir de aquí usan la ventana ampliada
+            transporte.default_window_size = self.VENTANA_CANAL
+            transporte.default_max_packet_size = self.PAQUETE_MAXIMO_CANAL
+            
             self._sftp_client = self._ssh_client.open_sftp()
             sftp_timeout = self.ssh_config.get('timeout', 300)
             self._sftp_client.get_channel().settimeout(sftp_timeout)
             
-            self.logger.info(f"✅ Conexión SSH establecida a {self.ssh_config['host']}")
+            self.logger.info("✅ Conexión SSH establecida a %s", self.ssh_config['host'])
             return True
             
         except socket.timeout:  # ← AHORA socket está en el scope correcto
-            self.logger.error(f"❌ Timeout conectando a {self.ssh_config.get('host', 'desconocido')}")
+            self.logger.error("❌ Timeout conectando a %s", self.ssh_config.get('host', 'desconocido'))
             return False
         except paramiko.AuthenticationException:
             self.logger.error("❌ Error de autenticación SSH - Credenciales incorrectas")
             return False
         except paramiko.SSHException as e:
-            self.logger.error(f"❌ Error SSH: {str(e)}")
+            self.logger.error("❌ Error SSH: %s", e)
             return False
         except Exception as e:
-            self.logger.error(f"❌ Error de conexión SSH: {str(e)}")
+            self.logger.error("❌ Error de conexión SSH: %s", e)
             return False
     
     def _verificar_conexion_activa(self) -> bool:
@@ -572,6 +782,62 @@ class GestorSSHCompartido:
             pass
         return False
     
+    def conexion_activa(self) -> Optional[bool]:
+        """Estado del transporte sin conectar: None si no hay conexión abierta
+        
+        El resultado se reutiliza durante VIGENCIA_ESTADO_CONEXION segundos; conectar()
+        y desconectar() lo invalidan, de modo que un cambio real no se pierde.
+        """
+        guardado = self._estado_conexion
+        if guardado is not None and time.monotonic() - guardado[0] < self.VIGENCIA_ESTADO_CONEXION:
+            return guardado[1]
+        
+        valor = None if self._ssh_client is None else self._verificar_conexion_activa()
+        self._estado_conexion = (time.monotonic(), valor)
+        return valor
+    
+    def iniciar_vigilancia(self, intervalo: float = 10, al_cambiar=None):
+        """Arrancar el hilo daemon de vigilancia SSH (uno solo por proceso)
+        
+        Cada 'intervalo' segundos consulta conexion_activa() (local, sin tráfico de
+        red) y deja el resultado en estado_vigilado. al_cambiar(conectado), si se
+        indica, se llama cada vez que el valor observado cambia.
+        """
+        if al_cambiar is not None and al_cambiar not in self._oyentes_vigilancia:
+            self._oyentes_vigilancia.append(al_cambiar)
+        
+        if self._hilo_vigilancia is not None and self._hilo_vigilancia.is_alive():
+            return
+        
+        hilo = threading.Thread(target=self._vigilar, args=(intervalo,),
+                                name='vigilancia_ssh', daemon=True)
+        GestorSSHCompartido._hilo_vigilancia = hilo
+        hilo.start()
+        self.logger.info("✅ Vigilancia SSH iniciada (cada %ss)", intervalo)
+    
+    def _vigilar(self, intervalo: float):
+        """Bucle del hilo de vigilancia"""
+        while True:
+            try:
+                self._actualizar_estado_vigilado(self.conexion_activa())
+            except Exception as e:
+                self.logger.warning("⚠️ Error en vigilancia SSH: %s", e)
+            time.sleep(intervalo)
+    
+    def _actualizar_estado_vigilado(self, conectado: Optional[bool]):
+        """Publicar un nuevo estado observado y avisar a los oyentes si cambió"""
+        anterior = self.estado_vigilado['conectado']
+        # Se reemplaza el diccionario completo: los lectores nunca ven uno a medias
+        GestorSSHCompartido.estado_vigilado = {'conectado': conectado, 'actualizado': datetime.now()}
+        
+        if conectado is None or conectado == anterior:
+            return
+        for oyente in list(self._oyentes_vigilancia):
+            try:
+                oyente(conectado)
+            except Exception as e:
+                self.logger.warning("⚠️ Error notificando cambio de estado SSH: %s", e)
+    
     def desconectar(self):
         """Cerrar conexión SSH"""
         try:
@@ -585,6 +851,8 @@ class GestorSSHCompartido:
         finally:
             self._ssh_client = None
             self._sftp_client = None
+            self._estado_conexion = None
+            self._actualizar_estado_vigilado(None)
     
     def obtener_sftp(self):
         """Obtener cliente SFTP (conectar si es necesario)"""
@@ -593,6 +861,19 @@ class GestorSSHCompartido:
                 return None
         return self._sftp_client
     
+    def abrir_sftp_adicional(self):
+        """Abrir una sesión SFTP propia sobre el transporte compartido
+        
+        Para transferencias en paralelo: cada hilo usa su propio canal en lugar de
+        compartir el cliente SFTP. Quien la abre debe cerrarla.
+        """
+        if not self._verificar_conexion_activa():
+            if not self.conectar():
+                return None
+        sftp = self._ssh_client.open_sftp()
+        sftp.get_channel().settimeout(self.ssh_config.get('timeout', 300))
+        return sftp
+    
     def obtener_ssh(self):
         """Obtener cliente SSH (conectar si es necesario)"""
         if not self._verificar_conexion_activa():
@@ -623,6 +904,25 @@ class GestorSSHCompartido:
 class UtilidadesCompartidas:
     """Utilidades compartidas para todos los sistemas"""
     
+    # Patrones de validación compilados una sola vez
+    PATRON_EMAIL = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+    PATRON_DIGITO = re.compile(r'\d')
+    PATRON_CURP = re.compile(r'^[A-Z]{4}[0-9]{6}[HM][A-Z]{5}[0-9A-Z]{2}$')
+    PATRON_FECHA_ISO = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+    
+    # Primeros 16 bytes de todo archivo de base de datos SQLite 3
+    CABECERA_SQLITE = b"SQLite format 3\x00"
+    
+    @staticmethod
+    def json_texto(valor: Any) -> str:
+        """Serializar a texto JSON sin escapar acentos (orjson si está instalado)
+        
+        Los valores no serializables se convierten con str(), igual en ambas vías.
+        """
+        if HAS_ORJSON:
+            return orjson.dumps(valor, default=str, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        return json.dumps(valor, ensure_ascii=False, default=str)
+    
     @staticmethod
     def verificar_espacio_disco(ruta: str, espacio_minimo_mb: int = 100) -> Tuple[bool, float]:
         """Verificar espacio disponible en disco"""
@@ -637,10 +937,10 @@ class UtilidadesCompartidas:
             return True, espacio_disponible_mb
             
         except ImportError:
-            print("⚠️ psutil no está instalado. Instalar con: pip install psutil")
+            _logger.warning("⚠️ psutil no está instalado. Instalar con: pip install psutil")
             return True, 0  # Asumir que hay espacio
         except Exception as e:
-            print(f"⚠️ Error verificando espacio en disco: {e}")
+            _logger.warning("⚠️ Error verificando espacio en disco: %s", e)
             return True, 0  # Asumir que hay espacio
     
     @staticmethod
@@ -664,7 +964,7 @@ class UtilidadesCompartidas:
                 return True
             return False
         except Exception as e:
-            print(f"⚠️ Error creando directorio {ruta}: {e}")
+            _logger.warning("⚠️ Error creando directorio %s: %s", ruta, e)
             return False
     
     @staticmethod
@@ -675,33 +975,41 @@ class UtilidadesCompartidas:
     @staticmethod
     def validar_email(email: str) -> bool:
         """Validar formato de email"""
-        import re
         if not email:
             return False
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return bool(re.match(pattern, email))
+        return bool(UtilidadesCompartidas.PATRON_EMAIL.match(email))
     
     @staticmethod
     def validar_matricula(matricula: str) -> bool:
         """Validar formato de matrícula"""
         if not matricula:
             return False
-        return len(matricula) >= 3 and any(char.isdigit() for char in matricula)
+        return len(matricula) >= 3 and bool(UtilidadesCompartidas.PATRON_DIGITO.search(matricula))
     
     @staticmethod
     def validar_curp(curp: str) -> bool:
         """Validar formato básico de CURP"""
-        import re
         if not curp or len(curp) != 18:
             return False
-        pattern = r'^[A-Z]{4}[0-9]{6}[HM][A-Z]{5}[0-9A-Z]{2}$'
-        return bool(re.match(pattern, curp))
+        return bool(UtilidadesCompartidas.PATRON_CURP.match(curp))
+    
+    @staticmethod
+    def parsear_fecha(fecha: str) -> datetime:
+        """Convertir 'YYYY-MM-DD' a datetime
+        
+        Las fechas ISO con ceros a la izquierda (las que producen los formularios)
+        usan datetime.fromisoformat, implementado en C; el resto recurre a strptime.
+        Lanza ValueError si el formato no es válido.
+        """
+        if UtilidadesCompartidas.PATRON_FECHA_ISO.match(fecha):
+            return datetime.fromisoformat(fecha)
+        return datetime.strptime(fecha, '%Y-%m-%d')
     
     @staticmethod
     def calcular_edad(fecha_nacimiento: str) -> Optional[int]:
         """Calcular edad a partir de fecha de nacimiento"""
         try:
-            nacimiento = datetime.strptime(fecha_nacimiento, '%Y-%m-%d')
+            nacimiento = UtilidadesCompartidas.parsear_fecha(fecha_nacimiento)
             hoy = datetime.now()
             edad = hoy.year - nacimiento.year
             if (hoy.month, hoy.day) < (nacimiento.month, nacimiento.day):
@@ -721,6 +1029,40 @@ class UtilidadesCompartidas:
         import tempfile
         return tempfile.gettempdir()
     
+    @staticmethod
+    def respaldar_sqlite(ruta_origen: str, ruta_destino: str, conexion_origen=None) -> bool:
+        """Crear copia consistente de una BD SQLite con la API de backup en línea
+        
+        Si se proporciona conexion_origen se respalda desde esa conexión abierta,
+        de lo contrario se abre ruta_origen en modo solo lectura.
+        """
+        import sqlite3
+        origen = conexion_origen
+        try:
+            if origen is None:
+                origen = sqlite3.connect(f"file:{ruta_origen}?mode=ro", uri=True)
+            destino = sqlite3.connect(ruta_destino)
+            try:
+                origen.backup(destino)
+            finally:
+                destino.close()
+            return True
+        except Exception as e:
+            _logger.warning("⚠️ Error respaldando %s: %s", ruta_origen, e)
+            return False
+        finally:
+            if conexion_origen is None and origen is not None:
+                origen.close()
+    
+    @staticmethod
+    def es_archivo_sqlite(ruta: str) -> bool:
+        """Verificar la cabecera mágica de SQLite sin abrir una conexión"""
+        try:
+            with open(ruta, 'rb') as f:
+                return f.read(16) == UtilidadesCompartidas.CABECERA_SQLITE
+        except OSError:
+            return False
+    
     @staticmethod
     def crear_archivo_temporal(extension: str = ".tmp") -> str:
         """Crear archivo temporal con extensión específica"""